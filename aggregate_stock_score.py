@@ -1,52 +1,115 @@
-from db_config import get_connection
+import argparse
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+from db_config import db_connection
+from score_buckets import BUCKET_MINUTES, BUCKET_REBUILD_SQL, WINDOWS
+from score_engine import compute_weighted_scores
 
 
 # 집계 주기마다 실행해서 Stocks_score 테이블 업데이트
 # cron으로 감정점수 업데이트하는 주기와 일치해야함
+#
+# Sentiments 를 저장할 때 db_insert 가 Sentiment_buckets(회사별 15분 버킷 합계/건수)를 같이 갱신하므로
+# 여기서는 최근 버킷만 더해서 평균을 계산 (Sentiments 테이블 크기와 상관없이 비용 일정)
+#
+# 최초 적용 시 또는 버킷이 어긋났을 때:  python aggregate_stock_score.py --rebuild-buckets
+#
+# --engine weighted : 단순 평균 대신 score_engine 의 최신성 + 확신도 가중 평균 (Sentiments 를 직접 읽음)
 
+load_dotenv()
+# Stocks_score 에 기록할 구간 (15m | 1h | 1d)
+STOCK_SCORE_WINDOW = os.getenv("STOCK_SCORE_WINDOW", "1h")
+# bucket (단순 평균) | weighted (score_engine)
+STOCK_SCORE_ENGINE = os.getenv("STOCK_SCORE_ENGINE", "bucket")
 
-def main():
-    conn = get_connection()
 
-    #집계 볌위가 1시간단위 -> 바꾸려면 where절 수정 ex)  INTERVAL 15 MINUTE, INTERVAL 1 DAY
-    select_sql = """
-        SELECT
-            c.id AS company_id,
-            AVG(s.score) AS avg_score
-        FROM sentiments s
-        JOIN news n ON s.news_id = n.id
-        JOIN companies c ON n.company_id = c.id
-        WHERE s.date >= NOW() - INTERVAL 1 HOUR
-        GROUP BY c.id
+def compute_window_scores(cur, now):
     """
+    버킷을 한 번 읽어서 WINDOWS 의 모든 구간 평균을 계산
+    구간 = 시작 시각이 (now - 구간 길이) 이후인 버킷들 (버킷 크기만큼 오차)
+    반환: {company_id: {"15m": 평균 또는 None, "1h": ..., "1d": ...}}
+    """
+    starts = {name: now - timedelta(minutes=minutes) for name, minutes in WINDOWS.items()}
+    columns = []
+    params = []
+    for name in WINDOWS:
+        columns.append(f"SUM(CASE WHEN bucket_start > %s THEN score_sum ELSE 0 END) AS sum_{name}")
+        columns.append(f"SUM(CASE WHEN bucket_start > %s THEN score_count ELSE 0 END) AS cnt_{name}")
+        params.extend([starts[name], starts[name]])
+
+    select_sql = f"""
+        SELECT b.company_id, {", ".join(columns)}
+        FROM Sentiment_buckets b
+        JOIN companies c ON b.company_id = c.id
+        WHERE b.bucket_start > %s
+        GROUP BY b.company_id
+    """
+    params.append(min(starts.values()))
+    cur.execute(select_sql, params)
+
+    scores = {}
+    for row in cur.fetchall():
+        scores[row["company_id"]] = {
+            name: float(row[f"sum_{name}"]) / int(row[f"cnt_{name}"]) if row[f"cnt_{name}"] else None
+            for name in WINDOWS
+        }
+    return scores
+
 
+def rebuild_buckets(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM Sentiment_buckets")
+        cur.execute(BUCKET_REBUILD_SQL)
+    conn.commit()
+    print(f"Sentiment_buckets 재생성 완료 ({BUCKET_MINUTES}분 버킷)")
+
+
+def main(rebuild=False, engine=STOCK_SCORE_ENGINE):
     upsert_sql = """
     INSERT INTO Stocks_score (company_id, score, date)
-    VALUES (%s, %s, DATE_FORMAT(NOW(), '%%Y-%%m-%%d %%H:00:00'))
+    VALUES (%s, %s, %s)
     ON DUPLICATE KEY UPDATE
         score = VALUES(score)
     """
 
-    try:
+    with db_connection() as conn:
+        if rebuild:
+            rebuild_buckets(conn)
+
         with conn.cursor() as cur:
-            cur.execute(select_sql)
-            rows = cur.fetchall()
+            cur.execute("SELECT NOW() AS now")
+            now = cur.fetchone()["now"]
+            if engine == "weighted":
+                scores = compute_weighted_scores(cur)
+            else:
+                scores = compute_window_scores(cur, now)
 
+            # 집계 시각은 기존과 같이 정시 단위
+            hour = now.replace(minute=0, second=0, microsecond=0)
+            rows = [
+                (company_id, windows[STOCK_SCORE_WINDOW], hour)
+                for company_id, windows in scores.items()
+                if windows[STOCK_SCORE_WINDOW] is not None
+            ]
             if not rows:
                 return
 
-            for row in rows:
-                company_id = row["company_id"]
-                avg_score = row["avg_score"]
-                if avg_score is None:
-                    continue
-
-                cur.execute(upsert_sql, (company_id, float(avg_score)))
+            cur.executemany(upsert_sql, rows)
 
         conn.commit()
 
-    finally:
-        conn.close()
+        print(f"Stocks_score 집계 완료 ({engine}, {STOCK_SCORE_WINDOW}): {len(rows)}개 종목")
+        for company_id, windows in sorted(scores.items()):
+            summary = ", ".join(
+                f"{name}={value:.1f}" if value is not None else f"{name}=-"
+                for name, value in windows.items()
+            )
+            print(f" - {company_id}: {summary}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Stocks_score 집계")
+    parser.add_argument("--rebuild-buckets", action="store_true", help="Sentiments 전체로 버킷 재생성 후 집계")
+    parser.add_argument("--engine", choices=["bucket", "weighted"], default=STOCK_SCORE_ENGINE)
+    args = parser.parse_args()
+    main(rebuild=args.rebuild_buckets, engine=args.engine)
@@ -0,0 +1,124 @@
+import argparse
+import time
+
+from db_config import ConnectionPool, get_connection
+from db_insert import save_step2_results_to_db, save_step4_results_to_db
+from score_buckets import BUCKET_UPSERT_SQL, bucket_deltas
+
+# db_insert 저장 속도 측정 (로컬 MySQL/MariaDB 컨테이너 대상, 스키마는 sql/local_schema.sql)
+# 운영 DB 에 실행하지 말 것 - bench.local URL 로 기사를 넣고 끝나면 삭제함
+#
+# 사용법
+#   python -m bench.bench_db_insert --articles 2000
+
+BENCH_URL_PREFIX = "http://bench.local/db/"
+
+
+def build_articles(n, with_sentiment):
+    articles = []
+    for i in range(n):
+        art = {
+            "id": i + 1,
+            "company_id": "005930",
+            "title": f"벤치마크 기사 {i}",
+            "url": f"{BENCH_URL_PREFIX}{i}",
+            "date": "2025-01-01 00:00:00",
+            "full_text": "벤치마크 본문 " * 200,
+        }
+        if with_sentiment:
+            art.update({
+                "summary_text": f"벤치마크 요약 {i}",
+                "sentiment_label": "POSITIVE",
+                "p_positive": 0.7,
+                "p_neutral": 0.2,
+                "p_negative": 0.1,
+                "k_index": 78.0,
+            })
+        articles.append(art)
+    return articles
+
+
+def cleanup(conn, pattern=BENCH_URL_PREFIX + "%"):
+    # pattern: 지울 벤치마크 기사 URL 의 LIKE 패턴
+    with conn.cursor() as cur:
+        # 벤치마크 감정점수가 Sentiment_buckets 에 남지 않도록 먼저 빼줌
+        cur.execute(
+            """
+            SELECT n.company_id, s.date, s.score
+            FROM Sentiments s JOIN News n ON s.news_id = n.id
+            WHERE n.url LIKE %s
+            """,
+            (pattern,),
+        )
+        old_scores = [(row["company_id"], row["date"], row["score"]) for row in cur.fetchall()]
+        cur.executemany(BUCKET_UPSERT_SQL, bucket_deltas([], old_scores))
+        cur.execute(
+            "DELETE s FROM Sentiments s JOIN News n ON s.news_id = n.id WHERE n.url LIKE %s",
+            (pattern,),
+        )
+        cur.execute("DELETE FROM News WHERE url LIKE %s", (pattern,))
+    conn.commit()
+
+
+def bench_checkout(n):
+    # 매번 새로 연결 vs 풀에서 빌리기 (SELECT 1 포함)
+    started = time.perf_counter()
+    for _ in range(n):
+        conn = get_connection()
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.close()
+    fresh = time.perf_counter() - started
+
+    pool = ConnectionPool(size=1)
+    started = time.perf_counter()
+    for _ in range(n):
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+    pooled = time.perf_counter() - started
+    pool.close()
+    return fresh, pooled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="db_insert 저장 속도 벤치마크")
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--checkouts", type=int, default=50)
+    args = parser.parse_args()
+
+    fresh, pooled = bench_checkout(args.checkouts)
+
+    conn = get_connection()
+    try:
+        cleanup(conn)
+
+        step2_articles = build_articles(args.articles, with_sentiment=False)
+        started = time.perf_counter()
+        save_step2_results_to_db(conn, step2_articles)
+        step2_elapsed = time.perf_counter() - started
+        cleanup(conn)
+
+        step4_articles = build_articles(args.articles, with_sentiment=True)
+        started = time.perf_counter()
+        save_step4_results_to_db(conn, step4_articles)
+        step4_elapsed = time.perf_counter() - started
+
+        # 같은 입력으로 다시 저장: News 는 전부 기존 행, Sentiments 는 UPSERT
+        started = time.perf_counter()
+        save_step4_results_to_db(conn, step4_articles)
+        rerun_elapsed = time.perf_counter() - started
+        cleanup(conn)
+    finally:
+        conn.close()
+
+    print("bench db_insert 결과")
+    print(f" - step2 저장: {args.articles}건 {step2_elapsed:.2f}s ({args.articles / step2_elapsed:.0f} 행/s)")
+    print(f" - step4 저장: {args.articles}건 {step4_elapsed:.2f}s ({args.articles / step4_elapsed:.0f} 행/s)")
+    print(f" - step4 재저장: {args.articles}건 {rerun_elapsed:.2f}s")
+    print(f" - 커넥션 {args.checkouts}회: 새로 연결 {fresh * 1000 / args.checkouts:.1f}ms/회, "
+          f"풀 {pooled * 1000 / args.checkouts:.2f}ms/회")
+
+
+if __name__ == "__main__":
+    main()
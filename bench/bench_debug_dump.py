@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import debug_dump
+
+# 디버깅 덤프 포맷별 쓰기/읽기 확인 (gzip / zstd)
+# 실행 두 번을 같은 파일에 이어 쓰고 read_runs 로 두 실행이 모두 그대로 읽히는지 확인, 크기와 소요 시간 출력
+# 하나라도 다시 읽은 결과가 다르면 종료 코드 1 (zstandard 가 없으면 zstd 는 건너뜀)
+#
+# 사용법
+#   python -m bench.bench_debug_dump --records 2000
+
+
+def build_records(n, run):
+    return [
+        {"id": i, "run": run, "title": f"벤치마크 기사 {run}-{i}", "summary_text": "요약 문장이다. " * 5}
+        for i in range(n)
+    ]
+
+
+def round_trip(fmt, n):
+    runs = [build_records(n, run) for run in range(2)]
+    with tempfile.TemporaryDirectory(prefix="bench_dump_") as tmp:
+        debug_dump.DEBUG_DUMP = fmt
+        debug_dump.DEBUG_DUMP_DIR = tmp
+        started = time.perf_counter()
+        for records in runs:
+            debug_dump.dump_records("bench", records)
+            # 실행 헤더의 시각(초 단위)으로 정렬하므로 두 실행을 구분
+            time.sleep(1.0)
+        write_seconds = time.perf_counter() - started - len(runs)
+        size = os.path.getsize(debug_dump._path("bench", fmt))
+
+        started = time.perf_counter()
+        read_back = debug_dump.read_runs("bench")
+        read_seconds = time.perf_counter() - started
+
+    ok = [records for _, records in read_back] == runs
+    return ok, len(read_back), size, write_seconds, read_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="디버깅 덤프 gzip/zstd 쓰기/읽기 확인")
+    parser.add_argument("--records", type=int, default=1000, help="실행당 기사 수")
+    args = parser.parse_args()
+
+    print("bench debug_dump 결과")
+    failed = False
+    for fmt in ("gzip", "zstd"):
+        if fmt == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                print(" - zstd: zstandard 패키지 없음, 건너뜀")
+                continue
+        ok, n_runs, size, write_s, read_s = round_trip(fmt, args.records)
+        failed |= not ok
+        print(
+            f" - {fmt}: 실행 {n_runs}개 읽음 ({'일치' if ok else '불일치'}), {size / 1024:.1f}KB, "
+            f"쓰기 {write_s * 1000:.1f}ms, 읽기 {read_s * 1000:.1f}ms"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+
+from bench.fixture_server import FIXTURE_DIR, write_synthetic_fixtures
+from extractors import extract_article, find_extractor, newspaper_extract
+
+# 저장한 기사 HTML 로 본문 추출 시간 비교 (newspaper 만 vs 언론사별 추출기 + newspaper fallback)
+# record_fixtures 로 녹화한 HTML 을 쓰고, 없으면 합성 HTML 사용
+# 빠른 경로를 탄 기사는 newspaper 결과와 문단 단위로 비교해서 추출기가 본문을 제대로 잡는지 같이 확인
+#  - 네이버 뉴스 사본은 newspaper 가 <br> 문단을 못 잡으므로 같은 기사의 언론사 원문 newspaper 결과와 비교
+#  - 평균 일치도가 --min-agreement 미만이면 종료 코드 1
+#
+# 사용법
+#   python -m bench.bench_extract --fixtures bench/fixtures/default --repeat 3
+#   python -m bench.bench_extract --synthetic 20 --min-agreement 0.9
+
+_charset = re.compile(r"charset=([\w-]+)", re.I)
+
+
+def load_pages(fixture_dir):
+    # step2 fetch_html 과 같은 입력: Content-Type 에 charset 이 있으면 str, 없으면 bytes
+    html_dir = os.path.join(fixture_dir, "html")
+    with open(os.path.join(html_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    pages = []
+    for url, entry in manifest.items():
+        if not 200 <= entry.get("status", 200) < 300:
+            continue
+        with open(os.path.join(html_dir, entry["file"]), "rb") as f:
+            body = f.read()
+        match = _charset.search(entry.get("content_type", ""))
+        if match:
+            try:
+                body = body.decode(match.group(1), errors="replace")
+            except LookupError:
+                pass
+        pages.append((url, body))
+    return pages
+
+
+def load_originals(fixture_dir):
+    # 네이버 검색 결과의 link(네이버 사본) -> originallink(언론사 원문)
+    naver_dir = os.path.join(fixture_dir, "naver")
+    originals = {}
+    if not os.path.isdir(naver_dir):
+        return originals
+    for name in sorted(os.listdir(naver_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(naver_dir, name), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for page in data["pages"]:
+            for item in page.get("items", []):
+                link, original = item.get("link"), item.get("originallink")
+                if link and original and link != original:
+                    originals[link] = original
+    return originals
+
+
+def _paragraphs(text):
+    return {p.strip() for p in (text or "").split("\n") if p.strip()}
+
+
+def agreement(a, b):
+    # 문단 집합 Jaccard (둘 다 비어 있으면 1)
+    pa, pb = _paragraphs(a), _paragraphs(b)
+    if not pa and not pb:
+        return 1.0
+    return len(pa & pb) / len(pa | pb)
+
+
+def run(pages, repeat):
+    newspaper_seconds = []
+    fast_seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        baseline = [newspaper_extract(url, html) for url, html in pages]
+        newspaper_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        results = [extract_article(url, html) for url, html in pages]
+        fast_seconds.append(time.perf_counter() - started)
+    return baseline, results, min(newspaper_seconds), min(fast_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="본문 추출(파싱) 속도 벤치마크")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="record_fixtures 로 녹화한 디렉터리")
+    parser.add_argument("--synthetic", type=int, default=0, help="녹화한 fixture 대신 회사별 N건 합성 HTML 사용")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worst", type=int, default=10, help="newspaper 결과와 가장 다른 도메인 N개 출력")
+    parser.add_argument("--min-agreement", type=float, default=0.9, help="빠른 경로 평균 일치도 하한 (미만이면 실패)")
+    args = parser.parse_args()
+
+    from config_companies import COMPANIES
+
+    fixture_dir = args.fixtures
+    tmp_dir = None
+    if args.synthetic or not os.path.isfile(os.path.join(fixture_dir, "html", "manifest.json")):
+        tmp_dir = tempfile.TemporaryDirectory(prefix="bench_extract_")
+        fixture_dir = tmp_dir.name
+        write_synthetic_fixtures(fixture_dir, COMPANIES, per_company=args.synthetic or 20)
+        print(f"bench: 합성 HTML 사용 (회사별 {args.synthetic or 20}건)")
+
+    pages = load_pages(fixture_dir)
+    originals = load_originals(fixture_dir)
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    if not pages:
+        print("bench: 기사 HTML 이 없음")
+        return 1
+
+    baseline, results, newspaper_s, fast_s = run(pages, max(1, args.repeat))
+
+    paths = Counter(path for _, path in results)
+    baseline_of = {url: base for (url, _), base in zip(pages, baseline)}
+    by_domain = defaultdict(list)
+    for (url, _), (text, path), base in zip(pages, results, baseline):
+        if path != "fast":
+            continue
+        if url in originals:
+            # 원문이 없으면(404 등) 비교할 기준이 없음
+            if originals[url] not in baseline_of:
+                continue
+            base = baseline_of[originals[url]]
+        extractor = find_extractor(url)
+        by_domain[extractor[0]].append(agreement(text, base))
+
+    n = len(pages)
+    print("bench extract 결과")
+    print(f" - 기사 수: {n}, 추출 경로: " + ", ".join(f"{k} {v}" for k, v in sorted(paths.items())))
+    print(f" - newspaper 만: {newspaper_s:.3f}s ({newspaper_s / n * 1000:.2f}ms/건)")
+    print(f" - 추출기 + fallback: {fast_s:.3f}s ({fast_s / n * 1000:.2f}ms/건)")
+    if fast_s > 0:
+        print(f" - 속도 향상: x{newspaper_s / fast_s:.2f}")
+
+    mean_agreement = None
+    if by_domain:
+        scores = [s for domain_scores in by_domain.values() for s in domain_scores]
+        mean_agreement = sum(scores) / len(scores)
+        print(f" - 빠른 경로 결과와 newspaper 결과 일치도(문단 Jaccard) 평균: {mean_agreement:.3f}")
+        ranked = sorted(by_domain.items(), key=lambda kv: sum(kv[1]) / len(kv[1]))
+        for domain, domain_scores in ranked[:args.worst]:
+            print(f"   {domain}: {len(domain_scores)}건, 평균 {sum(domain_scores) / len(domain_scores):.3f}")
+
+    fallback_hosts = Counter(urlparse(url).netloc for (url, _), (_, path) in zip(pages, results) if path == "fallback")
+    if fallback_hosts:
+        print(f" - fallback 많은 호스트 (추출기 점검 필요): {fallback_hosts.most_common(args.worst)}")
+
+    if mean_agreement is not None and mean_agreement < args.min_agreement:
+        print(f"bench: 일치도 {mean_agreement:.3f} < {args.min_agreement} (추출기 점검 필요)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
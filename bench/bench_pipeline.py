@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.fixture_server import FIXTURE_DIR, start_fixture_server, write_synthetic_fixtures
+from bench.mock_openai_server import start_server
+
+# 오프라인 파이프라인 벤치마크: step1 ~ step4 + db_insert 를 단계별로 측정
+#  - Naver API / 기사 HTML : bench.fixture_server (record_fixtures 로 녹화한 fixture, 없으면 합성 데이터)
+#  - OpenAI               : bench.mock_openai_server
+#  - DB                   : --db mysql 이면 로컬 MySQL/MariaDB (sql/local_schema.sql), 끝나면 벤치마크 행 삭제
+#  - step4 모델           : HF 캐시(또는 SENTIMENT_BACKEND=onnx 모델)가 로컬에 있어야 함, 없으면 --skip-step4
+#
+# 사용법
+#   python -m bench.bench_pipeline --synthetic 40 --openai-latency 0.3 --output bench_report.json
+#   python -m bench.bench_pipeline --baseline bench_report.json --tolerance 0.2   # 처리량 20% 이상 떨어지면 exit 1
+
+LATENCY_METRICS = [
+    "naver_request_seconds",
+    "article_fetch_seconds",
+    "article_parse_seconds",
+    "openai_request_seconds",
+    "sentiment_batch_seconds",
+    "sentiment_predict_seconds",
+    "db_batch_seconds",
+]
+
+
+def _prepare_env(naver_url, openai_url, args):
+    # step 모듈을 import 하기 전에 설정 (load_dotenv 는 이미 있는 값을 덮지 않음)
+    os.environ["NAVER_NEWS_API_URL"] = naver_url
+    os.environ["client_id"] = "bench"
+    os.environ["client_secret"] = "bench"
+    os.environ["gpt_base_url"] = openai_url
+    os.environ["gpt_key"] = "mock-key"
+    if not args.real_limits:
+        # 기본은 호출 한도를 풀어서 코드 자체의 처리량을 측정 (한도에 묶이면 회귀가 가려짐)
+        os.environ["STEP1_NAVER_QPS"] = "1000"
+        os.environ["OPENAI_RPM"] = "1000000"
+        os.environ["OPENAI_TPM"] = "1000000000"
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    os.environ["HTTP_CACHE_ENABLED"] = "0"
+    os.environ["URL_BLOOM_ENABLED"] = "0"
+    os.environ["DEBUG_DUMP"] = "off"
+    os.environ["METRICS_EXPORT"] = "off"
+
+
+def run_stages(args):
+    import metrics
+    from step1_naver_articles import step1_naver_articles
+    from step2_articles_with_content import step2_articles_with_content
+    from step3_articles_with_summary_and_groups import step3_articles_with_summary_and_groups
+
+    metrics.reset()
+    report = {}
+
+    def measure(name, fn, *fn_args, count_in=None, count_out=len):
+        started = time.perf_counter()
+        with metrics.stage(name):
+            result = fn(*fn_args)
+        seconds = time.perf_counter() - started
+        report[name] = {"in": count_in, "out": count_out(result), "seconds": seconds}
+        return result
+
+    step1 = measure("step1", step1_naver_articles, {})
+    conn_cm = None
+    if args.db == "mysql":
+        from db_config import db_connection
+        from db_insert import filter_step1_by_db_urls
+
+        conn_cm = db_connection()
+        conn = conn_cm.__enter__()
+        step1 = measure("step1 필터링", filter_step1_by_db_urls, conn, step1, count_in=len(step1))
+
+    try:
+        full, db_only = measure(
+            "step2", step2_articles_with_content, step1,
+            count_in=len(step1), count_out=lambda r: len(r[0]) + len(r[1]),
+        )
+        related = measure("step3", step3_articles_with_summary_and_groups, full, count_in=len(full))
+
+        scored = []
+        if not args.skip_step4:
+            from step4_articles_with_sentiment import get_sentiment_model, step4_articles_with_sentiment
+
+            # 모델 로딩은 처리량과 따로 측정
+            measure("step4 모델 로딩", get_sentiment_model, count_out=lambda r: 0)
+            scored = measure("step4", step4_articles_with_sentiment, related, count_in=len(related))
+
+        if conn_cm is not None:
+            from bench.bench_db_insert import cleanup
+            from db_insert import save_step2_results_to_db, save_step4_results_to_db
+
+            if scored:
+                measure("db 저장(step4)", save_step4_results_to_db, conn, scored,
+                        count_in=len(scored), count_out=lambda r: len(scored))
+            measure("db 저장(step2)", save_step2_results_to_db, conn, db_only,
+                    count_in=len(db_only), count_out=lambda r: len(db_only))
+            cleanup(conn, "http://127.0.0.%/a/%")
+    finally:
+        if conn_cm is not None:
+            conn_cm.__exit__(None, None, None)
+
+    snapshot = metrics.snapshot()
+    latencies = {}
+    for hist in snapshot["histograms"]:
+        if hist["name"] in LATENCY_METRICS:
+            label = ",".join(f"{k}={v}" for k, v in hist["labels"].items())
+            latencies[f"{hist['name']}{{{label}}}" if label else hist["name"]] = {
+                "count": hist["count"],
+                "mean": hist["sum"] / hist["count"] if hist["count"] else None,
+                "p50": hist["p50"],
+                "p95": hist["p95"],
+            }
+    errors = {
+        f"{c['labels']['stage']}:{c['labels']['type']}": c["value"]
+        for c in snapshot["counters"] if c["name"] == "errors_total"
+    }
+    return report, latencies, errors
+
+
+def print_report(report, latencies, errors, server_stats):
+    print("bench pipeline 결과")
+    print(f" {'단계':<16}{'입력':>8}{'출력':>8}{'시간(s)':>10}{'기사/s':>10}")
+    for name, r in report.items():
+        rate = (r["in"] if r["in"] is not None else r["out"]) / r["seconds"] if r["seconds"] > 0 else 0.0
+        count_in = "-" if r["in"] is None else r["in"]
+        print(f" {name:<16}{count_in:>8}{r['out']:>8}{r['seconds']:>10.2f}{rate:>10.1f}")
+    print(" 지연 시간 (p50/p95 는 히스토그램 버킷 상한)")
+    for name, h in latencies.items():
+        print(f"  {name}: {h['count']}건, 평균 {h['mean'] * 1000:.1f}ms, p50 <= {h['p50']}s, p95 <= {h['p95']}s")
+    if errors:
+        print(f" 오류: {errors}")
+    print(f" fixture 서버 요청: {server_stats}")
+
+
+def _throughput(r):
+    count = r["in"] if r["in"] is not None else r["out"]
+    return count / r["seconds"] if r["seconds"] > 0 and count else None
+
+
+def compare_baseline(report, baseline_path, tolerance):
+    # 단계별 처리량이 baseline 대비 tolerance 이상 떨어지면 회귀로 판단
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["stages"]
+    regressions = []
+    for name, r in report.items():
+        before = baseline.get(name)
+        now_rate = _throughput(r)
+        before_rate = _throughput(before) if before else None
+        if now_rate is None or before_rate is None:
+            continue
+        change = now_rate / before_rate - 1
+        mark = "회귀" if change < -tolerance else "ok"
+        print(f" baseline {name}: {before_rate:.1f} -> {now_rate:.1f} 기사/s ({change:+.0%}) {mark}")
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 파이프라인 벤치마크 (step1~step4 + DB)")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="record_fixtures 로 녹화한 디렉터리")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="녹화한 fixture 대신 회사별 N건 합성 데이터 사용 (fixture 가 없으면 기본 20)")
+    parser.add_argument("--spread-hosts", type=int, default=16, help="언론사 호스트를 나눌 루프백 주소 수")
+    parser.add_argument("--naver-latency", type=float, default=0.05)
+    parser.add_argument("--html-latency", type=float, default=0.2)
+    parser.add_argument("--real-limits", action="store_true", help="Naver/OpenAI 호출 한도를 .env 값 그대로 사용")
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--db", choices=["none", "mysql"], default="none")
+    parser.add_argument("--skip-step4", action="store_true", help="감정분석 모델이 로컬에 없을 때")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (다음 실행의 --baseline)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    from config_companies import COMPANIES
+
+    fixture_dir = args.fixtures
+    tmp_dir = None
+    if args.synthetic or not os.path.isdir(os.path.join(fixture_dir, "naver")):
+        tmp_dir = tempfile.TemporaryDirectory(prefix="bench_fixtures_")
+        fixture_dir = tmp_dir.name
+        write_synthetic_fixtures(fixture_dir, COMPANIES, per_company=args.synthetic or 20)
+        print(f"bench: 합성 fixture 사용 (회사별 {args.synthetic or 20}건)")
+
+    fixture_server, naver_url = start_fixture_server(
+        fixture_dir, spread_hosts=args.spread_hosts,
+        naver_latency=args.naver_latency, html_latency=args.html_latency,
+    )
+    openai_server, openai_url = start_server(latency=args.openai_latency, error_rate=args.openai_error_rate)
+    _prepare_env(naver_url, openai_url, args)
+
+    try:
+        report, latencies, errors = run_stages(args)
+    finally:
+        fixture_server.shutdown()
+        openai_server.shutdown()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    print_report(report, latencies, errors, fixture_server.RequestHandlerClass.stats)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"stages": report, "latencies": latencies, "errors": errors}, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        regressions = compare_baseline(report, args.baseline, args.tolerance)
+        if regressions:
+            print(f"bench: 처리량 회귀 - {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
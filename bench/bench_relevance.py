@@ -0,0 +1,206 @@
+import argparse
+import json
+import random
+
+import numpy as np
+
+from bench.bench_step3_agreement import load_labelled
+from relevance_filter import FEATURES, load_model, relevance_features, score_features
+
+# 로컬 관련도 필터(relevance_filter.py) 임계값별 precision / recall
+# "점수 < 임계값 이면 GPT 없이 관련 없음" 으로 처리할 때
+#  - 제외 비율       : GPT 호출을 아끼는 비율
+#  - 제외 precision  : 제외한 기사 중 실제로 관련 없는 기사 비율 (높을수록 좋음)
+#  - 관련 recall     : 실제 관련 기사 중 GPT 로 보내진 비율 (1 아래로 떨어지면 관련 기사를 잃음)
+#
+# 라벨 샘플은 bench_step3_agreement 와 같은 JSONL ({"company_name", "full_text", "related"}, 선택: "title", "query")
+#   임계값은 실제 기사로 만든 라벨 샘플로 정하는 것이 원칙 (record_fixtures 로 녹화한 기사를 사람이 라벨링)
+#   없으면 합성 기사 사용: 쉬운 기사 외에 경계 사례를 섞어서 임계값에 따라 곡선이 달라지도록 함
+#    - 관련: 회사가 주제 / 검색어 표기만 사용 / 리드에 한 번 나오고 이후 "회사는" / 제목에 없고 중간부터 등장
+#    - 무관: 제목에 여러 종목과 함께 나열 / 시황 중 한 번 언급 / 경쟁사 기사에서 비교 대상으로 여러 번 / 언급 없음
+# --train 을 주면 샘플 70% 로 로지스틱 회귀를 학습해서 저장하고, 나머지 30% 로 평가
+#
+# 사용법
+#   python -m bench.bench_relevance --labelled labelled.jsonl
+#   python -m bench.bench_relevance --labelled labelled.jsonl --train relevance_model.json
+
+THRESHOLDS = [0.0, 0.02, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
+
+MARKET_SENTENCES = [
+    "코스피 지수는 장 초반 강세를 보였으나 오후 들어 상승 폭을 줄였다.",
+    "외국인 투자자들은 최근 일주일 동안 반도체와 2차전지 업종을 순매수했다.",
+    "전문가들은 금리 인하 기대감이 커지면서 성장주 중심의 반등이 이어질 것으로 봤다.",
+    "원/달러 환율은 전 거래일보다 소폭 내린 수준에서 마감했다.",
+    "정부는 공급망 안정화를 위한 지원 방안을 이달 중 발표할 예정이다.",
+    "증권가에서는 연말까지 변동성이 큰 장세가 이어질 것이라는 관측이 나온다.",
+    "미국 국채 금리 상승으로 기술주 투자 심리가 다소 위축됐다.",
+    "업계 전반의 재고 조정이 마무리 단계에 들어섰다는 분석도 있다.",
+]
+COMPANY_SENTENCES = [
+    "{name}는 올해 3분기 실적 발표에서 시장 예상치를 웃도는 영업이익을 기록했다.",
+    "증권가에서는 {name}의 신규 수주가 내년 매출 성장으로 이어질 것으로 내다봤다.",
+    "{name}는 해외 생산 거점을 확대하겠다는 계획을 내놓았다.",
+    "{name} 주가는 이날 장중 한때 5% 넘게 올랐다.",
+]
+FOLLOW_SENTENCES = [
+    "회사 측은 설비 투자를 늘려 생산 능력을 두 배로 키울 계획이다.",
+    "동사는 신규 고객사와의 공급 계약도 막바지 협상 중이라고 설명했다.",
+    "회사는 내년 상반기 중 신제품 양산에 들어갈 예정이다.",
+    "경영진은 주주환원 정책을 강화하겠다고 밝혔다.",
+]
+# (종류, 관련 여부, 비율)
+SYNTHETIC_KINDS = [
+    ("focus", True, 3), ("alias", True, 1), ("pronoun", True, 2), ("late_focus", True, 2),
+    ("roundup_title", False, 2), ("passing", False, 2), ("competitor", False, 2), ("none", False, 2),
+]
+
+
+def _market(rng, n):
+    return [rng.choice(MARKET_SENTENCES) for _ in range(n)]
+
+
+def _synthetic_article(rng, kind, company, other):
+    name = company["company_name"]
+    query = company.get("query") or name
+    title = f"증시 마감 시황 ({rng.randrange(1000)})"
+    if kind == "focus":
+        title = f"{name}, 실적 개선 기대감에 주가 상승"
+        body = [s.format(name=name) for s in rng.sample(COMPANY_SENTENCES, 3)] + _market(rng, rng.randrange(2, 6))
+    elif kind == "alias":
+        # 회사명 대신 검색어 표기만 사용 (예: "SK 하이닉스" / "SK하이닉스")
+        title = f"{query}, 신규 수주 기대"
+        body = [s.format(name=query) for s in rng.sample(COMPANY_SENTENCES, 2)] + _market(rng, rng.randrange(3, 7))
+    elif kind == "pronoun":
+        title = f"{name} 투자 확대 발표"
+        body = [COMPANY_SENTENCES[0].format(name=name)] + rng.sample(FOLLOW_SENTENCES, 3) + _market(rng, rng.randrange(6, 12))
+    elif kind == "late_focus":
+        title = f"{company['sector']} 업계, 수주 경쟁 본격화"
+        body = _market(rng, rng.randrange(4, 8)) + [COMPANY_SENTENCES[1].format(name=name)] + rng.sample(FOLLOW_SENTENCES, 2)
+    elif kind == "roundup_title":
+        title = f"{other['company_name']}·{name} 등 대형주 일제히 하락"
+        body = _market(rng, rng.randrange(3, 6)) + [f"{name} 역시 1% 안팎 하락 마감했다."] + _market(rng, rng.randrange(3, 8))
+    elif kind == "passing":
+        body = _market(rng, rng.randrange(6, 12)) + [f"시가총액 상위 종목 가운데 {name}만 소폭 올랐다."] + _market(rng, 2)
+    elif kind == "competitor":
+        # 다른 회사 기사에서 비교 대상으로 여러 번 언급
+        other_name = other["company_name"]
+        title = f"{other_name}, 신규 공장 착공"
+        body = (
+            [s.format(name=other_name) for s in rng.sample(COMPANY_SENTENCES, 2)]
+            + [f"업계에서는 {other_name}가 {name}와의 점유율 격차를 좁힐 것으로 본다.",
+               f"{name} 역시 비슷한 규모의 투자를 검토 중인 것으로 알려졌다."]
+            + _market(rng, rng.randrange(2, 6))
+        )
+    else:
+        body = _market(rng, rng.randrange(5, 10))
+    return title, " ".join(body)
+
+
+def build_labelled(n, seed=0):
+    from config_companies import COMPANIES
+
+    rng = random.Random(seed)
+    kinds = [k for k in SYNTHETIC_KINDS for _ in range(k[2])]
+    articles = []
+    for i in range(n):
+        kind, related, _ = rng.choice(kinds)
+        company, other = rng.sample(COMPANIES, 2)
+        title, text = _synthetic_article(rng, kind, company, other)
+        articles.append({
+            "company_name": company["company_name"],
+            "query": company.get("query"),
+            "title": title,
+            "full_text": text,
+            "related": related,
+            "kind": kind,
+        })
+    return articles
+
+
+def feature_matrix(articles):
+    rows = [
+        relevance_features(a["company_name"], a.get("query"), a.get("title"), a["full_text"])
+        for a in articles
+    ]
+    return rows, np.array([[r[name] for name in FEATURES] for r in rows])
+
+
+def train_logistic(x, y, epochs=2000, lr=0.5, l2=1e-3):
+    # 특징이 5개뿐이라 numpy 경사하강법으로 충분 (sklearn 의존성 없이)
+    weights = np.zeros(x.shape[1])
+    bias = 0.0
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+        grad = p - y
+        weights -= lr * (x.T @ grad / len(y) + l2 * weights)
+        bias -= lr * grad.mean()
+    return weights, bias
+
+
+def sweep(scores, labels):
+    labels = np.asarray(labels, dtype=bool)
+    scores = np.asarray(scores)
+    print(f" {'임계값':>8}{'제외 비율':>10}{'제외 precision':>16}{'관련 recall':>13}{'잃은 관련 기사':>14}")
+    for threshold in THRESHOLDS:
+        rejected = scores < threshold
+        n_rejected = int(rejected.sum())
+        precision = (~labels[rejected]).mean() if n_rejected else 1.0
+        recall = (~rejected[labels]).mean() if labels.any() else 1.0
+        lost = int((rejected & labels).sum())
+        print(f" {threshold:>8.2f}{n_rejected / len(scores):>10.1%}{precision:>16.1%}{recall:>13.1%}{lost:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 관련도 필터 임계값 precision/recall")
+    parser.add_argument("--labelled", help="라벨 샘플 JSONL (없으면 합성 기사)")
+    parser.add_argument("--articles", type=int, default=200, help="합성 기사 수")
+    parser.add_argument("--model", help="평가할 로지스틱 회귀 가중치 JSON (없으면 기본 점수)")
+    parser.add_argument("--train", help="학습한 가중치를 저장할 경로 (RELEVANCE_MODEL_PATH)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.labelled:
+        articles = load_labelled(args.labelled)
+    else:
+        articles = build_labelled(args.articles, args.seed)
+        print(f"bench: 합성 기사 {len(articles)}건 사용 (경계 사례 포함, 실제 임계값은 라벨 샘플로 확인)")
+
+    rows, x = feature_matrix(articles)
+    labels = np.array([a["related"] for a in articles], dtype=float)
+
+    print("bench relevance 결과")
+    print(f" - 기사 수: {len(articles)} (관련 {int(labels.sum())})")
+
+    default_scores = [score_features(r) for r in rows]
+    print(" 기본 점수")
+    sweep(default_scores, labels)
+    if any("kind" in a for a in articles):
+        # 합성 기사 종류별 점수 범위 (어느 경계 사례가 임계값에 걸리는지)
+        by_kind = {}
+        for a, score in zip(articles, default_scores):
+            by_kind.setdefault((a["kind"], a["related"]), []).append(score)
+        print(" 종류별 기본 점수 (최소 / 평균 / 최대)")
+        for (kind, related), scores in sorted(by_kind.items(), key=lambda kv: np.mean(kv[1])):
+            print(f"  {kind:>14} ({'관련' if related else '무관'}): {min(scores):.2f} / {np.mean(scores):.2f} / {max(scores):.2f}")
+
+    model = load_model(args.model) if args.model else None
+    if model is not None:
+        print(f" 모델 점수 ({args.model})")
+        sweep([score_features(r, model) for r in rows], labels)
+
+    if args.train:
+        order = list(range(len(articles)))
+        random.Random(args.seed).shuffle(order)
+        cut = int(len(order) * 0.7)
+        train_idx, test_idx = order[:cut], order[cut:]
+        weights, bias = train_logistic(x[train_idx], labels[train_idx])
+        with open(args.train, "w", encoding="utf-8") as f:
+            json.dump({"features": list(FEATURES), "weights": weights.tolist(), "bias": float(bias)}, f, indent=2)
+        print(f" 학습한 모델 (학습 {len(train_idx)}건, 평가 {len(test_idx)}건) -> {args.train}")
+        print("  가중치: " + ", ".join(f"{name} {w:+.2f}" for name, w in zip(FEATURES, weights)) + f", bias {bias:+.2f}")
+        trained = (weights, float(bias))
+        sweep([score_features(rows[i], trained) for i in test_idx], labels[test_idx])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import numpy as np
+
+from score_engine import ENGINE_WINDOWS, score_companies
+
+# score_engine 계산 속도 측정 (DB 없이 합성 데이터)
+# 종목 수 x 기간 x 하루 기사 수 만큼의 Sentiments 행을 만들어서 전체 종목 점수를 한 번 계산
+#
+# 사용법
+#   python -m bench.bench_score_engine --companies 2500 --days 90 --per-day 20
+
+
+def build_arrays(companies, days, per_day, seed=0):
+    rng = np.random.default_rng(seed)
+    n = companies * days * per_day
+    # load_sentiment_arrays 와 같은 형태 (종목코드 목록 + 행별 정수 코드)
+    company_ids = [f"{i:06d}" for i in range(companies)]
+    codes = rng.integers(0, companies, n)
+    age_hours = rng.uniform(0, days * 24, n)
+    prob_neu = rng.uniform(0, 1, n)
+    scores = rng.uniform(0, 100, n)
+    return company_ids, codes, age_hours, scores, prob_neu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="score_engine 계산 속도 벤치마크")
+    parser.add_argument("--companies", type=int, default=2500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=20, help="종목당 하루 기사 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    arrays = build_arrays(args.companies, args.days, args.per_day)
+    rows = len(arrays[1])
+
+    elapsed = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        window_scores, window_counts = score_companies(*arrays)
+        elapsed.append(time.perf_counter() - started)
+
+    print("bench score_engine 결과")
+    print(f" - 종목 수: {args.companies}, 행 수: {rows:,} ({args.days}일)")
+    print(f" - 구간: {', '.join(ENGINE_WINDOWS)}")
+    print(f" - 소요 시간: 최소 {min(elapsed):.3f}s, 중앙값 {sorted(elapsed)[len(elapsed) // 2]:.3f}s")
+    print(f" - 처리량: {rows / min(elapsed) / 1e6:.1f}M 행/s")
+    for name in ENGINE_WINDOWS:
+        scored = int(np.count_nonzero(window_counts[name]))
+        print(f"   {name}: 점수 있는 종목 {scored}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import time
+
+from bench.mock_openai_server import start_server
+
+# step3 요약 처리량 측정 (로컬 mock OpenAI 서버 사용, API 비용 없음)
+#
+# 사용법
+#   python -m bench.bench_step3 --articles 200 --latency 0.8 --error-rate 0.05
+#   python -m bench.bench_step3 --real-limits     # .env 의 OPENAI_RPM/TPM 한도 그대로 (한도에 묶인 처리량)
+
+
+def build_articles(n):
+    from config_companies import COMPANIES, FULL_PIPELINE_COMPANY_NAMES
+
+    companies = [c for c in COMPANIES if c["company_name"] in FULL_PIPELINE_COMPANY_NAMES]
+    articles = []
+    for i in range(n):
+        company = companies[i % len(companies)]
+        # 절반은 회사명이 앞부분에 나오는 기사, 절반은 관련 없는 기사
+        lead = company["company_name"] if i % 2 == 0 else "코스피"
+        articles.append({
+            "id": i + 1,
+            "company_id": company["company_id"],
+            "company_name": company["company_name"],
+            "sector": company["sector"],
+            "title": f"{lead} 관련 벤치마크 기사 {i}",
+            "url": f"http://bench.local/article/{i}",
+            "date": "2025-01-01 00:00:00",
+            "full_text": f"{lead} 주가가 움직였다. " + "시장 전반의 흐름을 설명하는 문장이다. " * 40,
+        })
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="step3 요약 처리량 벤치마크")
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--real-limits", action="store_true", help="OPENAI_RPM/TPM 한도를 풀지 않고 측정")
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, error_rate=args.error_rate)
+    os.environ["gpt_base_url"] = base_url
+    os.environ.setdefault("gpt_key", "mock-key")
+    if not args.real_limits:
+        # 기본은 호출 한도를 풀어서 동시 요청/묶음 요청 자체의 처리량을 측정 (bench_pipeline 과 같음)
+        os.environ["OPENAI_RPM"] = "1000000"
+        os.environ["OPENAI_TPM"] = "1000000000"
+    # 처리량 측정용이므로 요청 수를 줄이는 기능은 끔 (설정은 step3 import 전에 읽힘)
+    #  - LLM 캐시: 두 번째 실행부터 요청 0건이 되고 llm_cache.sqlite3 가 남음
+    #  - 유사 기사 묶기 / 로컬 관련도 필터: 합성 기사 본문이 비슷해서 대부분 GPT 호출 없이 처리됨
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    os.environ["NEAR_DUP_ENABLED"] = "0"
+    os.environ["RELEVANCE_REJECT_BELOW"] = "0"
+
+    from step3_articles_with_summary_and_groups import (
+        OPENAI_RPM, OPENAI_TPM, SUMMARY_BATCH_SIZE, SUMMARY_WORKERS, step3_articles_with_summary_and_groups,
+    )
+
+    articles = build_articles(args.articles)
+    started = time.perf_counter()
+    related = step3_articles_with_summary_and_groups(articles)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    stats = server.RequestHandlerClass.stats
+    print("bench step3 결과")
+    print(f" - 기사 수: {len(articles)} (관련 {len(related)})")
+    print(f" - 동시 요청 수: {SUMMARY_WORKERS}, 묶음 {max(1, SUMMARY_BATCH_SIZE)}건씩, mock 지연: {args.latency}s")
+    if args.real_limits:
+        # RPM 한도만으로 정해지는 최대 처리량 (TPM 은 기사 길이에 따라 더 낮을 수 있음)
+        bound = OPENAI_RPM / 60.0 * max(1, SUMMARY_BATCH_SIZE)
+        print(f" - 호출 한도: RPM {OPENAI_RPM:.0f}, TPM {OPENAI_TPM:.0f} (RPM 기준 최대 {bound:.1f} 기사/s)")
+    else:
+        print(" - 호출 한도: 해제 (--real-limits 로 .env 한도 적용)")
+    print(f" - mock 요청 수: {stats['requests']} (오류 응답 {stats['errors']})")
+    print(f" - 소요 시간: {elapsed:.2f}s, 처리량: {len(articles) / elapsed:.1f} 기사/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.bench_step3 import build_articles
+from bench.mock_openai_server import start_server
+
+# step3 입력 줄이기(STEP3_INPUT_TOKENS) / 묶음 요청(STEP3_BATCH_SIZE) 이 판정을 바꾸지 않는지 확인
+# 같은 라벨 샘플을 기준 설정(본문 전체, 1건씩)과 비교 설정으로 각각 돌려서
+# 토큰 사용량, 요청 수, 지연 시간, 라벨 대비 정확도, 기준 설정 대비 판정 일치율을 출력
+#
+# 라벨 샘플: JSONL, 한 줄에 {"company_name": ..., "full_text": ..., "related": true/false}  (선택: "title", "query")
+#   (DEBUG_DUMP 로 남긴 step3_related / step3_not_related 를 사람이 확인해서 만듦)
+#   없으면 bench_step3 의 합성 기사 사용 (mock 서버 기준이라 정확도는 의미 없고 토큰/요청 수만 참고)
+#
+# 사용법
+#   python -m bench.bench_step3_agreement --labelled labelled.jsonl --real-api --input-tokens 600 --batch-size 5
+#   python -m bench.bench_step3_agreement --articles 100 --latency 0.3
+
+
+def load_labelled(path):
+    articles = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                articles.append({
+                    "company_name": row["company_name"],
+                    "full_text": row["full_text"],
+                    "related": bool(row["related"]),
+                    "title": row.get("title"),
+                    "query": row.get("query"),
+                })
+    return articles
+
+
+def run_config(articles, budget, batch_size, workers):
+    import metrics
+    from step3_articles_with_summary_and_groups import summarize_article, summarize_batch
+
+    metrics.reset()
+    pairs = [(a["company_name"], a["full_text"]) for a in articles]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if batch_size <= 1:
+            verdicts = list(pool.map(lambda p: summarize_article(p[0], p[1], budget), pairs))
+        else:
+            batches = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+            verdicts = [v for vs in pool.map(lambda b: summarize_batch(b, budget), batches) for v in vs]
+    elapsed = time.perf_counter() - started
+
+    snapshot = metrics.snapshot()
+    tokens = {"prompt": 0, "completion": 0}
+    for c in snapshot["counters"]:
+        if c["name"] == "openai_tokens_total":
+            tokens[c["labels"]["kind"]] += c["value"]
+    requests_count, request_seconds = 0, 0.0
+    for h in snapshot["histograms"]:
+        if h["name"] == "openai_request_seconds":
+            requests_count += h["count"]
+            request_seconds += h["sum"]
+    # GPT 오류(None)는 판정 없음으로 둠 (라벨/기준과 불일치로 집계)
+    return [None if v is None else v[1] for v in verdicts], {
+        "seconds": elapsed,
+        "requests": requests_count,
+        "mean_request_seconds": request_seconds / requests_count if requests_count else 0.0,
+        **tokens,
+    }
+
+
+def _rate(matches, total):
+    return f"{matches / total:.1%}" if total else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="step3 입력 줄이기 / 묶음 요청 판정 일치율 벤치마크")
+    parser.add_argument("--labelled", help="라벨 샘플 JSONL (없으면 합성 기사)")
+    parser.add_argument("--articles", type=int, default=100, help="합성 기사 수")
+    parser.add_argument("--real-api", action="store_true", help="mock 서버 대신 .env 의 OpenAI 설정 사용 (비용 발생)")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock 서버 응답 지연")
+    parser.add_argument("--input-tokens", type=int, default=int(os.getenv("STEP3_INPUT_TOKENS", "600")))
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server = None
+    if not args.real_api:
+        server, base_url = start_server(latency=args.latency)
+        os.environ["gpt_base_url"] = base_url
+        os.environ.setdefault("gpt_key", "mock-key")
+        # mock 서버는 호출 한도 없이 (요청 수/토큰 차이가 지연 시간에 그대로 보이도록)
+        os.environ["OPENAI_RPM"] = "1000000"
+        os.environ["OPENAI_TPM"] = "1000000000"
+    # 캐시가 있으면 두 번째 설정이 첫 번째 결과를 재사용하므로 끔
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+
+    if args.labelled:
+        articles = load_labelled(args.labelled)
+    else:
+        articles = [
+            {"company_name": a["company_name"], "full_text": a["full_text"], "related": a["id"] % 2 == 1}
+            for a in build_articles(args.articles)
+        ]
+    labels = [a["related"] for a in articles]
+
+    configs = [
+        ("기준 (본문 전체, 1건씩)", 0, 1),
+        (f"입력 {args.input_tokens}토큰, 1건씩", args.input_tokens, 1),
+        (f"입력 {args.input_tokens}토큰, {args.batch_size}건씩", args.input_tokens, args.batch_size),
+    ]
+    try:
+        results = [(name, *run_config(articles, budget, batch, args.workers)) for name, budget, batch in configs]
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    baseline = results[0][1]
+    print("bench step3 판정 일치율 결과")
+    print(f" - 기사 수: {len(articles)} (라벨 관련 {sum(labels)}), {'실제 API' if args.real_api else 'mock 서버'}")
+    for name, verdicts, stats in results:
+        accuracy = sum(v == label for v, label in zip(verdicts, labels))
+        agree = sum(v == b for v, b in zip(verdicts, baseline))
+        print(f" - {name}")
+        print(
+            f"   요청 {stats['requests']}건, 토큰 prompt {stats['prompt']:,} / completion {stats['completion']:,}, "
+            f"소요 {stats['seconds']:.2f}s (요청당 평균 {stats['mean_request_seconds'] * 1000:.0f}ms)"
+        )
+        print(f"   라벨 대비 정확도 {_rate(accuracy, len(labels))}, 기준 설정과 판정 일치 {_rate(agree, len(baseline))}")
+
+
+if __name__ == "__main__":
+    main()
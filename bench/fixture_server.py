@@ -0,0 +1,282 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 녹화한(또는 합성한) Naver 검색 응답과 기사 HTML 을 로컬에서 다시 서빙하는 서버
+#
+# fixture 디렉터리 구조
+#   naver/<company_id>.json   {"query": 검색어, "pages": [Naver 응답 body, ...]}
+#   html/manifest.json        {원본 URL: {"file": 파일명, "status": 200, "content_type": ...}}
+#   html/<sha1>.html          원본 응답 바이트 그대로
+#
+# Naver 응답의 originallink 는 http://127.0.0.<n>:<port>/a/<key><원본 경로> 로 바꿔서 내려줌
+# (원본 경로를 남겨서 URL 패턴으로 고르는 본문 추출기도 운영과 같게 동작)
+# link(네이버 뉴스 사본)가 originallink 와 다르면 같은 방식으로 바꿈
+# 원본 호스트마다 다른 루프백 주소를 써서 step2 의 호스트별 동시 연결 제한이 운영과 비슷하게 동작
+# (리눅스는 127.0.0.0/8 전체가 루프백, spread_hosts=1 이면 전부 127.0.0.1)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "default")
+
+
+def url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+def load_fixtures(fixture_dir):
+    """
+    반환: (검색어 -> pages, key -> (status, content_type, body))
+    """
+    naver_pages = {}
+    naver_dir = os.path.join(fixture_dir, "naver")
+    for name in sorted(os.listdir(naver_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(naver_dir, name), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        naver_pages[data["query"]] = data["pages"]
+
+    html = {}
+    html_dir = os.path.join(fixture_dir, "html")
+    with open(os.path.join(html_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    for url, entry in manifest.items():
+        with open(os.path.join(html_dir, entry["file"]), "rb") as f:
+            body = f.read()
+        html[url_key(url)] = (entry.get("status", 200), entry.get("content_type", "text/html"), body)
+    return naver_pages, html
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    naver_pages = {}
+    html = {}
+    spread_hosts = 1
+    naver_latency = 0.0
+    html_latency = 0.0
+    stats = {"naver": 0, "html": 0, "missing": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _send(self, status, content_type, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _local_url(self, url):
+        port = self.server.server_address[1]
+        if self.spread_hosts <= 1:
+            host = "127.0.0.1"
+        else:
+            host = f"127.0.0.{zlib.crc32(urlparse(url).netloc.encode('utf-8')) % self.spread_hosts + 1}"
+        parsed = urlparse(url)
+        path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        return f"http://{host}:{port}/a/{url_key(url)}{path}"
+
+    def _local_item(self, item):
+        item = dict(item)
+        original = item.get("originallink")
+        if item.get("link") and item["link"] != original:
+            item["link"] = self._local_url(item["link"])
+        if original:
+            item["originallink"] = self._local_url(original)
+            if item.get("link") == original:
+                item["link"] = item["originallink"]
+        return item
+
+    def _naver(self, query):
+        self._count("naver")
+        time.sleep(self.naver_latency)
+        params = {k: v[0] for k, v in query.items()}
+        pages = self.naver_pages.get(params.get("query"), [])
+        display = int(params.get("display", 20))
+        page_index = (int(params.get("start", 1)) - 1) // max(1, display)
+        if page_index < len(pages):
+            body = dict(pages[page_index])
+            body["items"] = [self._local_item(item) for item in body.get("items", [])]
+        else:
+            body = {"total": sum(len(p.get("items", [])) for p in pages), "items": []}
+        self._send(200, "application/json", json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.endswith("/search/news.json"):
+            self._naver(parse_qs(parsed.query))
+            return
+
+        if parsed.path.startswith("/a/"):
+            entry = self.html.get(parsed.path[len("/a/"):].split("/")[0])
+            if entry is not None:
+                self._count("html")
+                time.sleep(self.html_latency)
+                status, content_type, body = entry
+                # 조건부 요청(If-None-Match) 지원 - step2 HTTP 캐시 재검증 경로 확인용
+                etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send(status, content_type, body, etag if status == 200 else None)
+                return
+
+        self._count("missing")
+        self._send(404, "text/plain", b"not found")
+
+
+def start_fixture_server(fixture_dir, port=0, spread_hosts=16, naver_latency=0.0, html_latency=0.0):
+    """
+    백그라운드 스레드로 fixture 서버 실행
+    반환: (server, naver_api_url)  - 끝나면 server.shutdown()
+    """
+    naver_pages, html = load_fixtures(fixture_dir)
+    handler = type("Handler", (FixtureHandler,), {
+        "naver_pages": naver_pages,
+        "html": html,
+        "spread_hosts": spread_hosts,
+        "naver_latency": naver_latency,
+        "html_latency": html_latency,
+        "stats": {"naver": 0, "html": 0, "missing": 0},
+        "stats_lock": threading.Lock(),
+    })
+    # 127.0.0.x 여러 주소로 받으려면 전체 주소에 바인딩해야 함 (벤치마크용, 외부 노출 주의)
+    bind_host = "127.0.0.1" if spread_hosts <= 1 else "0.0.0.0"
+    server = ThreadingHTTPServer((bind_host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/search/news.json"
+
+
+SENTENCES = [
+    "{company}는 올해 3분기 실적 발표에서 시장 예상치를 웃도는 영업이익을 기록했다고 밝혔다.",
+    "증권가에서는 {company}의 신규 수주가 내년 매출 성장으로 이어질 것으로 내다봤다.",
+    "원자재 가격 상승과 환율 변동으로 업계 전반의 수익성이 악화될 수 있다는 우려도 나온다.",
+    "회사 측은 설비 투자를 늘리고 해외 생산 거점을 확대하겠다는 계획을 내놓았다.",
+    "외국인 투자자들은 최근 일주일 동안 관련 종목을 순매수한 것으로 집계됐다.",
+    "전문가들은 금리 인하 기대감이 커지면서 성장주 중심의 반등이 이어질 것으로 봤다.",
+    "정부는 공급망 안정화를 위한 지원 방안을 이달 중 발표할 예정이다.",
+    "코스피 지수는 장 초반 강세를 보였으나 오후 들어 상승 폭을 줄였다.",
+]
+
+
+def _article_html(title, paragraphs, ndsoft=False):
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    # ndsoft: 중소 언론사가 많이 쓰는 기사 CMS 마크업 (extractors.URL_PATTERN_XPATHS 로 빠른 경로)
+    article_attr = ' id="article-view-content-div"' if ndsoft else ""
+    return (
+        "<html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+        "<body><nav>홈 | 경제 | 증권</nav><h1>{title}</h1><article{attr}>{body}</article>"
+        "<footer>무단 전재 및 재배포 금지</footer></body></html>"
+    ).format(title=title, body=body, attr=article_attr)
+
+
+def _naver_article_html(title, paragraphs):
+    # n.news.naver.com 기사 페이지 구조 (본문은 article#dic_area, 문단은 <br> 로 구분)
+    body = "<br><br>".join(paragraphs)
+    photo = '<span class="end_photo_org"><img src="photo.jpg"><em class="img_desc">사진 설명</em></span>'
+    return (
+        "<html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+        "<body><div class=\"media_end_head\"><h2 id=\"title_area\">{title}</h2></div>"
+        "<div id=\"newsct_article\"><article id=\"dic_area\" class=\"go_trans _article_content\">"
+        "{photo}{body}</article></div><div class=\"media_end_copyright\">무단 전재 및 재배포 금지</div></body></html>"
+    ).format(title=title, body=body, photo=photo)
+
+
+def write_synthetic_fixtures(fixture_dir, companies, per_company=20, seed=0):
+    """
+    녹화한 fixture 가 없을 때 쓰는 합성 데이터
+    회사별 per_company 건: 관련 기사 / 무관한 기사 / 재배포(거의 같은 본문) / 404 / 빈 본문을 섞음
+    3건 중 2건은 네이버 뉴스 사본(link)도 있음 (원문이 404 여도 사본은 있음, 빈 본문 기사는 사본 없음)
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(fixture_dir, "naver"), exist_ok=True)
+    os.makedirs(os.path.join(fixture_dir, "html"), exist_ok=True)
+    manifest = {}
+    now = datetime.now(timezone(timedelta(hours=9)))
+
+    for company in companies:
+        name = company["company_name"]
+        items = []
+        previous_body = None
+        for i in range(per_company):
+            host_index = rng.randrange(12)
+            host = f"news{host_index}.example.com"
+            ndsoft = host_index % 2 == 0
+            if ndsoft:
+                url = f"https://{host}/news/articleView.html?idxno={company['company_id']}{i:04d}"
+            else:
+                url = f"https://{host}/article/{company['company_id']}/{i}"
+            pub = now - timedelta(minutes=7 * i + rng.randrange(5))
+            title = f"{name}, 실적 개선 기대감에 주가 상승 ({i})" if i % 3 else f"증시 마감 시황 ({i})"
+            link = url
+            # 빈 본문 기사(kind 8)는 네이버 사본도 없음
+            if i % 3 != 2 and i % 10 != 8:
+                link = f"https://n.news.naver.com/mnews/article/{host_index + 1:03d}/{company['company_id']}{i:04d}"
+            items.append({
+                "title": f"<b>{title}</b>",
+                "originallink": url,
+                "link": link,
+                "description": f"{name} 관련 기사 요약 {i}",
+                "pubDate": pub.strftime("%a, %d %b %Y %H:%M:%S %z"),
+            })
+
+            kind = i % 10
+            if kind == 9:
+                manifest[url] = {"status": 404, "content_type": "text/html", "body": "<html>없는 기사</html>"}
+                if link != url:
+                    paragraphs = [s.format(company=name) for s in rng.sample(SENTENCES, 6)]
+                    manifest[link] = {
+                        "status": 200,
+                        "content_type": "text/html; charset=utf-8",
+                        "body": _naver_article_html(title, paragraphs),
+                    }
+                continue
+            if kind == 8:
+                paragraphs = []
+            elif kind == 7 and previous_body:
+                # 다른 언론사가 같은 기사를 재배포 (마지막 문단만 다름)
+                paragraphs = previous_body[:-1] + ["(재배포) " + previous_body[-1]]
+            else:
+                lead = name if i % 3 else "코스피"
+                paragraphs = [s.format(company=lead) for s in rng.sample(SENTENCES, 6)]
+                previous_body = paragraphs
+            manifest[url] = {
+                "status": 200,
+                "content_type": "text/html; charset=utf-8",
+                "body": _article_html(title, paragraphs, ndsoft),
+            }
+            if link != url:
+                manifest[link] = {
+                    "status": 200,
+                    "content_type": "text/html; charset=utf-8",
+                    "body": _naver_article_html(title, paragraphs),
+                }
+
+        pages = [
+            {"total": len(items), "start": start + 1, "display": 20, "items": items[start:start + 20]}
+            for start in range(0, len(items), 20)
+        ]
+        with open(os.path.join(fixture_dir, "naver", f"{company['company_id']}.json"), "w", encoding="utf-8") as f:
+            json.dump({"query": company["query"], "pages": pages}, f, ensure_ascii=False)
+
+    for url, entry in manifest.items():
+        entry["file"] = f"{url_key(url)}.html"
+        with open(os.path.join(fixture_dir, "html", entry["file"]), "w", encoding="utf-8") as f:
+            f.write(entry.pop("body"))
+    with open(os.path.join(fixture_dir, "html", "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
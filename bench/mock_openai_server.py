@@ -0,0 +1,152 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 로컬 OpenAI 호환 mock 서버 (POST /v1/chat/completions 만 지원)
+#  - 본문 앞부분에 회사명이 있으면 [RELATED] 요약, 없으면 [NOT_RELATED] 응답
+#  - [기사 1], [기사 2] ... 로 묶은 요청은 기사마다 "번호. [RELATED] ..." 한 줄씩 응답
+#  - latency 로 응답 지연, error_rate 로 429/500 응답을 섞어서 재시도 경로 확인
+#
+# 사용법
+#   python -m bench.mock_openai_server --port 8001 --latency 0.8 --error-rate 0.05
+#   .env 에 gpt_base_url=http://127.0.0.1:8001/v1 설정
+
+
+def _extract_field(user_content, name):
+    lines = [line.strip() for line in user_content.splitlines()]
+    marker = f"[{name}]"
+    if marker not in lines:
+        return ""
+    idx = lines.index(marker) + 1
+    body = []
+    for line in lines[idx:]:
+        if line.startswith("[") and line.endswith("]") and body:
+            break
+        if line:
+            body.append(line)
+    return "\n".join(body)
+
+
+def _verdict(user_content):
+    company = _extract_field(user_content, "회사")
+    text = _extract_field(user_content, "본문")
+    if company and company in text[:500]:
+        return f"[RELATED] {company} 관련 기사 요약입니다."
+    return "[NOT_RELATED]"
+
+
+def build_completion(messages, model):
+    user_content = messages[-1]["content"] if messages else ""
+    blocks = re.split(r"^\s*\[기사 \d+\]", user_content, flags=re.M)
+    if len(blocks) > 1:
+        content = "\n".join(f"{n}. {_verdict(block)}" for n, block in enumerate(blocks[1:], 1))
+    else:
+        content = _verdict(user_content)
+
+    prompt_tokens = sum(len(m.get("content", "").encode("utf-8")) // 3 for m in messages)
+    completion_tokens = len(content.encode("utf-8")) // 3
+    return {
+        "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+    stats = {"requests": 0, "errors": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with self.stats_lock:
+            self.stats["requests"] += 1
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        time.sleep(self.latency)
+
+        if random.random() < self.error_rate:
+            with self.stats_lock:
+                self.stats["errors"] += 1
+            status = random.choice([429, 500])
+            self._send_json(
+                status,
+                {"error": {"message": "mock error", "type": "mock", "code": status}},
+                headers={"retry-after": "0.1"} if status == 429 else None,
+            )
+            return
+
+        self._send_json(200, build_completion(request.get("messages", []), request.get("model", "mock")))
+
+
+def start_server(port=0, latency=0.0, error_rate=0.0):
+    """
+    백그라운드 스레드로 mock 서버 실행
+    반환: (server, base_url)  - 끝나면 server.shutdown()
+    """
+    handler = type("Handler", (MockOpenAIHandler,), {
+        "latency": latency,
+        "error_rate": error_rate,
+        "stats": {"requests": 0, "errors": 0},
+        "stats_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 OpenAI 호환 mock 서버")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429/500 응답 비율")
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.port, args.latency, args.error_rate)
+    print(f"mock openai: {base_url} (latency={args.latency}s, error_rate={args.error_rate})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
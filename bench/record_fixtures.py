@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fixture_server import FIXTURE_DIR, url_key
+
+# 실제 Naver 검색 결과와 기사 HTML 을 bench_pipeline 용 fixture 로 저장 (Naver API 키 필요)
+# 한 번 녹화해 두면 이후 벤치마크는 네트워크 없이 같은 입력으로 반복 실행 가능
+#
+# 사용법
+#   python -m bench.record_fixtures --out bench/fixtures/default --pages 1
+
+
+def record(out_dir, pages):
+    from config_companies import COMPANIES
+    from step1_naver_articles import DISPLAY, build_headers, build_session, fetch_news, get_env_variables
+    from step2_articles_with_content import FETCH_HEADERS, FETCH_TIMEOUT
+    from step2_articles_with_content import build_session as build_fetch_session
+
+    client_id, client_secret = get_env_variables()
+    if not client_id or not client_secret:
+        raise EnvironmentError("record: NAVER API KEY 또는 SECRET 설정 오류")
+    headers = build_headers(client_id, client_secret)
+
+    os.makedirs(os.path.join(out_dir, "naver"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "html"), exist_ok=True)
+
+    # Naver 응답은 페이지 단위로 원본 그대로 저장
+    session = build_session()
+    urls = []
+    for company in COMPANIES:
+        saved_pages = []
+        for page in range(pages):
+            items, total = fetch_news(company["query"], headers, display=DISPLAY, start=page * DISPLAY + 1, session=session)
+            saved_pages.append({"total": total, "start": page * DISPLAY + 1, "display": DISPLAY, "items": items})
+            urls.extend(item["originallink"] for item in items if item.get("originallink"))
+            # 네이버 뉴스 사본 (step2 가 우선 사용)
+            urls.extend(item["link"] for item in items if item.get("link") and item["link"] != item.get("originallink"))
+            if len(items) < DISPLAY:
+                break
+        with open(os.path.join(out_dir, "naver", f"{company['company_id']}.json"), "w", encoding="utf-8") as f:
+            json.dump({"query": company["query"], "pages": saved_pages}, f, ensure_ascii=False)
+    session.close()
+
+    # 기사 HTML 은 응답 바이트와 Content-Type 그대로 저장 (인코딩 처리까지 재현)
+    fetch_session = build_fetch_session()
+
+    def download(url):
+        try:
+            response = fetch_session.get(url, headers=FETCH_HEADERS, timeout=FETCH_TIMEOUT)
+        except Exception as e:
+            print(f"record: 다운로드 실패 - {url}: {e}")
+            return url, None
+        return url, response
+
+    manifest = {}
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for url, response in pool.map(download, list(dict.fromkeys(urls))):
+            if response is None:
+                continue
+            name = f"{url_key(url)}.html"
+            with open(os.path.join(out_dir, "html", name), "wb") as f:
+                f.write(response.content)
+            manifest[url] = {
+                "file": name,
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type", "text/html"),
+            }
+    fetch_session.close()
+
+    with open(os.path.join(out_dir, "html", "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    print(f"record: 회사 {len(COMPANIES)}개, 기사 HTML {len(manifest)}건 저장 - {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bench_pipeline 용 fixture 녹화")
+    parser.add_argument("--out", default=FIXTURE_DIR)
+    parser.add_argument("--pages", type=int, default=1, help="회사별 Naver 검색 페이지 수")
+    args = parser.parse_args()
+    record(args.out, args.pages)
+
+
+if __name__ == "__main__":
+    main()
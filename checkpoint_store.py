@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 파이프라인 실행 중 기사별로 어느 단계까지 끝났는지 기록하는 체크포인트 (sqlite 파일)
+# step3/step4 에서 죽거나 GPT 한도 초과로 멈춰도 --resume 으로 남은 기사만 이어서 처리
+#
+# 기사 단계
+#   step1   : 수집 + DB 필터 통과, 본문 추출 전
+#   step2   : 본문 추출 완료 (kind = full | db_only)
+#   step3   : 요약 완료 (관련 있는 기사)
+#   step4   : 감정분석 완료
+#   saved   : DB 저장 완료
+#   failed  : 본문 다운로드 실패 (다음 실행에서 다시 수집하도록 워터마크를 붙잡음)
+#   dropped : 본문 비어 있음 / 관련 없음 / 감정분석 불가로 제외
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "pipeline_checkpoint.sqlite3")
+CHECKPOINT_KEEP_DAYS = float(os.getenv("CHECKPOINT_KEEP_DAYS", "7"))
+
+
+def article_url(art):
+    # step1 결과는 originallink, step2 이후는 url
+    return art.get("url") or art.get("originallink")
+
+
+class CheckpointStore:
+    def __init__(self, path=CHECKPOINT_PATH):
+        # 샤드 프로세스들이 같은 파일을 쓰므로 잠금 대기 시간을 넉넉히
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                seen_by_step1 TEXT NOT NULL,
+                shard TEXT
+            );
+            CREATE TABLE IF NOT EXISTS articles (
+                run_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                kind TEXT,
+                payload TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_stage ON articles (run_id, stage);
+            """
+        )
+        # 샤드 컬럼이 없던 이전 버전 파일
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        if "shard" not in columns:
+            self._conn.execute("ALTER TABLE runs ADD COLUMN shard TEXT")
+        self._conn.commit()
+
+    def start_run(self, seen_by_step1, shard=None):
+        # 워터마크 갱신에 필요한 필드만 보관
+        seen = [
+            {"company_id": a.get("company_id"), "pubDate": a.get("pubDate"), "originallink": a.get("originallink")}
+            for a in seen_by_step1
+        ]
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._purge_old()
+        self._conn.execute(
+            "INSERT INTO runs (run_id, started_at, seen_by_step1, shard) VALUES (?, ?, ?, ?)",
+            (run_id, time.time(), json.dumps(seen, ensure_ascii=False), shard),
+        )
+        self._conn.commit()
+        return run_id
+
+    def latest_unfinished_run(self, shard=None):
+        # shard 가 None 이면 단일 프로세스 실행(샤드 없음)의 실행만
+        row = self._conn.execute(
+            "SELECT run_id FROM runs WHERE finished_at IS NULL AND shard IS ? ORDER BY started_at DESC LIMIT 1",
+            (shard,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def seen_by_step1(self, run_id):
+        row = self._conn.execute("SELECT seen_by_step1 FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def record(self, run_id, stage, articles, kind=None):
+        # 기사 전체를 payload 로 저장 (다음 단계 입력으로 그대로 다시 읽음)
+        now = time.time()
+        self._conn.executemany(
+            """
+            INSERT OR REPLACE INTO articles (run_id, url, stage, kind, payload, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (run_id, article_url(art), stage, kind, json.dumps(art, ensure_ascii=False), now)
+                for art in articles
+                if article_url(art)
+            ],
+        )
+        self._conn.commit()
+
+    def mark(self, run_id, urls, stage):
+        # saved / dropped 처럼 더 처리할 일이 없는 단계는 payload 를 비워서 용량 절약
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE articles SET stage = ?, payload = NULL, updated_at = ? WHERE run_id = ? AND url = ?",
+            [(stage, now, run_id, url) for url in urls if url],
+        )
+        self._conn.commit()
+
+    def load(self, run_id, stage, kind=None):
+        sql = "SELECT payload FROM articles WHERE run_id = ? AND stage = ?"
+        params = [run_id, stage]
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        return [json.loads(row[0]) for row in self._conn.execute(sql, params) if row[0]]
+
+    def stage_counts(self, run_id):
+        rows = self._conn.execute(
+            "SELECT stage, COUNT(*) FROM articles WHERE run_id = ? GROUP BY stage", (run_id,)
+        ).fetchall()
+        return dict(rows)
+
+    def finish_run(self, run_id):
+        self._conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+        self._conn.execute("DELETE FROM articles WHERE run_id = ?", (run_id,))
+        self._conn.commit()
+
+    def _purge_old(self):
+        # 오래된 실행은 끝났든 안 끝났든 정리
+        cutoff = time.time() - CHECKPOINT_KEEP_DAYS * 86400
+        self._conn.execute(
+            "DELETE FROM articles WHERE run_id IN (SELECT run_id FROM runs WHERE started_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM runs WHERE started_at < ?", (cutoff,))
+
+    def close(self):
+        self._conn.close()
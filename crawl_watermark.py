@@ -0,0 +1,115 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 없이 진행 (샤드 동시 실행은 리눅스 cron 기준)
+    fcntl = None
+
+load_dotenv()
+
+# 회사별로 이미 수집한 가장 최근 기사(pubDate + 그 시각의 URL 목록)를 저장하는 파일
+WATERMARK_PATH = os.getenv("CRAWL_WATERMARK_PATH", "crawl_watermark.json")
+# 처리에 실패한 기사는 워터마크가 넘어가지 않게 붙잡아서 다음 실행에서 다시 수집
+# 단, pubDate 가 이 시간보다 오래된 실패 기사는 포기 (삭제된 기사가 워터마크를 계속 붙잡지 않도록)
+WATERMARK_RETRY_HOURS = float(os.getenv("WATERMARK_RETRY_HOURS", "24"))
+KST = timezone(timedelta(hours=9))
+
+
+def load_watermarks(path=WATERMARK_PATH):
+    """
+    반환: {company_id: {"pubDate": "YYYY-mm-dd HH:MM:SS", "urls": [...]}}
+    파일이 없거나 깨져 있으면 빈 dict (= 전체 수집)
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"watermark: 파일 읽기 실패, 전체 수집으로 진행 - {e}")
+        return {}
+
+
+def is_known(watermark, pub_date, url):
+    # pubDate 는 "YYYY-mm-dd HH:MM:SS" 문자열이라 문자열 비교 = 시간 비교
+    if not watermark or not pub_date:
+        return False
+    if pub_date < watermark["pubDate"]:
+        return True
+    return pub_date == watermark["pubDate"] and url in watermark["urls"]
+
+
+def oldest_failures(failed, retry_hours=WATERMARK_RETRY_HOURS):
+    """
+    failed: 처리에 실패한 기사 (step1 결과는 pubDate, step2 이후는 date)
+    반환: {company_id: 가장 오래된 실패 기사의 pubDate}  - retry_hours 보다 오래된 기사는 제외
+    """
+    cutoff = (datetime.now(KST) - timedelta(hours=retry_hours)).strftime("%Y-%m-%d %H:%M:%S")
+    oldest = {}
+    for art in failed:
+        company_id = art.get("company_id")
+        pub_date = art.get("pubDate") or art.get("date")
+        if not company_id or not pub_date or pub_date < cutoff:
+            continue
+        if company_id not in oldest or pub_date < oldest[company_id]:
+            oldest[company_id] = pub_date
+    return oldest
+
+
+def advance_watermarks(watermarks, articles, failed=()):
+    """
+    step1 결과로 회사별 워터마크를 앞으로 이동 (기존 값보다 과거로는 돌아가지 않음)
+    같은 초에 여러 기사가 있을 수 있어서 최신 시각의 URL 을 모두 보관
+    failed 가 있는 회사는 가장 오래된 실패 기사보다 과거인 기사까지만 이동
+    """
+    updated = {cid: {"pubDate": wm["pubDate"], "urls": list(wm["urls"])} for cid, wm in watermarks.items()}
+    hold = oldest_failures(failed)
+
+    for art in articles:
+        company_id = art.get("company_id")
+        pub_date = art.get("pubDate")
+        url = art.get("originallink")
+        if not company_id or not pub_date:
+            continue
+        if company_id in hold and pub_date >= hold[company_id]:
+            continue
+
+        wm = updated.get(company_id)
+        if wm is None or pub_date > wm["pubDate"]:
+            updated[company_id] = {"pubDate": pub_date, "urls": [url] if url else []}
+        elif pub_date == wm["pubDate"] and url and url not in wm["urls"]:
+            wm["urls"].append(url)
+
+    return updated
+
+
+def save_watermarks(watermarks, path=WATERMARK_PATH):
+    # 중간에 죽어도 파일이 깨지지 않도록 임시 파일에 쓰고 교체
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def commit_watermarks(articles, failed=(), path=WATERMARK_PATH):
+    # 샤드 프로세스들이 같은 파일을 갱신하므로 잠금 후 파일의 최신 값 기준으로 이동해서 저장
+    # (각 샤드는 자기 회사의 워터마크만 앞으로 움직이고 다른 샤드 값은 그대로 둠)
+    with _file_lock(path):
+        save_watermarks(advance_watermarks(load_watermarks(path), articles, failed), path)
@@ -1,10 +1,26 @@
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 import pymysql
 from dotenv import load_dotenv
 
+load_dotenv()
+
+# DB 커넥션 풀
+# 파이프라인은 수 분간 네트워크/GPT 작업을 하는 동안 커넥션을 쥐고 있지 않고, 저장할 때만 풀에서 빌려 씀
+# 빌려줄 때 DB_PING_INTERVAL 초 이상 쉬었던 커넥션은 ping(reconnect=True) 로 확인
+# (wait_timeout 으로 끊긴 커넥션은 여기서 다시 연결되므로 "MySQL server has gone away" 가 나지 않음)
+#
+#   with db_connection() as conn:
+#       save_step4_results_to_db(conn, articles)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_PING_INTERVAL = float(os.getenv("DB_PING_INTERVAL", "30"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
 
 def get_connection():
-    load_dotenv()    
     return pymysql.connect(
         host=os.getenv("DB_HOST"),
         port=int(os.getenv("DB_PORT")),
@@ -14,4 +30,112 @@ def get_connection():
         charset="utf8mb4",
         cursorclass=pymysql.cursors.DictCursor,
         autocommit=False,
+        connect_timeout=DB_CONNECT_TIMEOUT,
     )
+
+
+class ConnectionPool:
+    def __init__(self, size=DB_POOL_SIZE, connect=get_connection, ping_interval=DB_PING_INTERVAL):
+        self._connect = connect
+        self._ping_interval = ping_interval
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._idle = queue.LifoQueue()   # (conn, 반납 시각) - 최근에 쓴 커넥션부터 재사용
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"connects": 0, "reuses": 0, "reconnects": 0, "discards": 0}
+
+    def acquire(self):
+        # 풀 크기만큼만 동시에 빌려줌 (다 쓰고 있으면 반납될 때까지 대기)
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, released_at = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if time.monotonic() - released_at >= self._ping_interval:
+                        thread_id = conn.thread_id()
+                        conn.ping(reconnect=True)
+                        if conn.thread_id() != thread_id:
+                            self._count("reconnects")
+                    self._count("reuses")
+                    return conn
+                except pymysql.MySQLError as e:
+                    print(f"db pool: 커넥션 확인 실패, 폐기 - {e}")
+                    self._discard(conn)
+
+            conn = self._connect()
+            self._count("connects")
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        try:
+            if broken or self._closed or not conn.open:
+                self._discard(conn)
+                return
+            # 커밋하지 않은 트랜잭션(SELECT 만 한 경우 포함)은 끝내고 반납
+            # (autocommit=False 라서 안 끝내면 다음 사용자가 예전 REPEATABLE READ 스냅샷을 읽음)
+            try:
+                conn.rollback()
+            except pymysql.MySQLError as e:
+                print(f"db pool: 반납 시 rollback 실패, 폐기 - {e}")
+                self._discard(conn)
+                return
+            self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            # 연결 자체 오류면 풀에 돌려놓지 않음
+            broken = True
+            raise
+        finally:
+            # 커밋 안 된 작업은 release 에서 rollback
+            self.release(conn, broken=broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def _discard(self, conn):
+        self._count("discards")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def db_connection():
+    # 공용 풀에서 커넥션을 빌려주는 컨텍스트 매니저
+    return get_pool().connection()
@@ -1,27 +1,55 @@
+import hashlib
 import json
+from score_buckets import BUCKET_UPSERT_SQL, bucket_deltas
+from url_bloom import URL_BLOOM_ENABLED, get_url_bloom
+import metrics
+
+def url_hash(url):
+    # News.url_hash 와 같은 값 (MySQL MD5(url), utf8mb4)
+    return hashlib.md5(url.encode("utf-8")).hexdigest()
+
+
+def _lookup_known_hashes(cur, hashes):
+    # url_hash 고정 길이 unique 인덱스로 DB_BATCH_SIZE 개씩 조회
+    known = set()
+    for chunk in _chunks(sorted(set(hashes))):
+        placeholders = ",".join(["%s"] * len(chunk))
+        cur.execute(f"SELECT url_hash FROM News WHERE url_hash IN ({placeholders})", chunk)
+        known.update(row["url_hash"] for row in cur.fetchall())
+    return known
+
 
 def filter_step1_by_db_urls(conn, articles):
-    urls = []
+    hash_of = {}
     for art in articles:
         url = art.get("originallink")
         if url:
-            urls.append(url)
+            hash_of[url] = url_hash(url)
 
-    urls = list(set(urls))
-    if not urls:
+    if not hash_of:
         return articles
 
-    placeholders = ",".join(["%s"] * len(urls))
-    sql = f"SELECT url FROM News WHERE url IN ({placeholders})"
-
     with conn.cursor() as cur:
-        cur.execute(sql, urls)
-        existing = {row["url"] for row in cur.fetchall()}
+        to_check = list(hash_of.values())
+        if URL_BLOOM_ENABLED:
+            # 블룸 필터에 없는 URL 은 확실히 새 기사 -> DB 조회 생략
+            # (필터 기간보다 오래됐거나 pubDate 가 없는 기사는 항상 DB 확인)
+            bloom, covered_since = get_url_bloom(cur)
+            covered = covered_since.strftime("%Y-%m-%d %H:%M:%S")
+            always_check = {
+                hash_of[art["originallink"]]
+                for art in articles
+                if art.get("originallink") and (not art.get("pubDate") or art["pubDate"] < covered)
+            }
+            maybe = bloom.might_contain(to_check)
+            to_check = [h for h, hit in zip(to_check, maybe) if hit or h in always_check]
+            print(f"step1 필터링: 블룸 필터로 DB 조회 생략 {len(hash_of) - len(to_check)}건")
+        existing = _lookup_known_hashes(cur, to_check)
 
     filtered = []
     for art in articles:
         url = art.get("originallink")
-        if url and url in existing:
+        if url and hash_of[url] in existing:
             continue
         filtered.append(art)
         
@@ -34,157 +62,232 @@ def filter_step1_by_db_urls(conn, articles):
 
 
 
-def save_step2_results_to_db(conn, articles):
-    sql = """
-        INSERT INTO News (title, date, full_text, url, company_id)
-        VALUES (%s, %s, %s, %s, %s)
+# 한 번에 처리(조회/INSERT/commit)하는 행 수
+DB_BATCH_SIZE = 500
+
+
+def _chunks(items, size=DB_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _unique_by_url(articles):
+    # 같은 배치 안의 중복 URL 은 첫 번째 기사만 사용
+    seen = set()
+    unique = []
+    for art in articles:
+        url = art.get("url")
+        if url in seen:
+            continue
+        seen.add(url)
+        unique.append(art)
+    return unique
+
+
+def _lookup_news_rows(cur, urls):
+    # URL -> News 행(id, company_id) 을 url_hash 로 한 번에 조회
+    hashes = list({url_hash(url) for url in urls})
+    if not hashes:
+        return {}
+    placeholders = ",".join(["%s"] * len(hashes))
+    cur.execute(f"SELECT id, url, company_id FROM News WHERE url_hash IN ({placeholders})", hashes)
+    return {row["url"]: row for row in cur.fetchall()}
+
+
+def _lookup_news_ids(cur, urls):
+    return {url: row["id"] for url, row in _lookup_news_rows(cur, urls).items()}
+
+
+def _lookup_sentiments(cur, news_ids):
+    # UPSERT 로 덮어쓸 기존 감정점수 (버킷에서 빼기 위해 필요)
+    news_ids = list(set(news_ids))
+    if not news_ids:
+        return []
+    placeholders = ",".join(["%s"] * len(news_ids))
+    cur.execute(
+        f"""
+        SELECT s.news_id, n.company_id, s.date, s.score
+        FROM Sentiments s
+        JOIN News n ON s.news_id = n.id
+        WHERE s.news_id IN ({placeholders})
+        """,
+        news_ids,
+    )
+    return [(row["news_id"], row["company_id"], row["date"], row["score"]) for row in cur.fetchall()]
+
+
+def _executemany_or_each(cur, sql, rows, label, key_index):
+    """
+    executemany(다중 행 INSERT) 로 한 번에 실행하고, 실패하면 행 단위로 다시 실행해서
+    문제 있는 행만 건너뜀 (로그에는 row[key_index] 출력). 반환: 성공한 행 리스트
     """
-    check_sql = "SELECT id FROM News WHERE url = %s LIMIT 1"
+    if not rows:
+        return []
+    try:
+        with metrics.timer("db_batch_seconds", op=label):
+            cur.executemany(sql, rows)
+        metrics.inc("db_rows_total", len(rows), op=label)
+        return rows
+    except Exception as e:
+        metrics.error("db", e)
+        print(f"DB: {label} 배치 실행 실패, 행 단위로 재시도 - {e}")
 
-    with conn.cursor() as cur:
-        for art in articles:
-            cur.execute(check_sql, (art["url"]))
-            exists = cur.fetchone()
+    done = []
+    for row in rows:
+        try:
+            cur.execute(sql, row)
+            done.append(row)
+        except Exception as e:
+            metrics.error("db", e)
+            print(f"DB: {label} 실패 - {row[key_index]}: {e}")
+    metrics.inc("db_rows_total", len(done), op=label)
+    return done
 
-            if exists:
-                print(f"이미 존재하는 뉴스 URL {art['id']}")
-                continue
 
-            cur.execute(
-                sql,
-                (art["title"], art["date"], art["full_text"], art["url"], art["company_id"])
-            )
-    conn.commit()
-    print(f" News(DBONLY) {len(articles)}건 저장 완료")
+# url_hash unique 인덱스가 있어서 동시에 같은 URL 을 넣어도 한 행만 남음 (중복이면 아무것도 안 바꿈)
+NEWS_INSERT_SQL = """
+    INSERT INTO News (title, date, full_text, url, summary_text, company_id, url_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = id
+"""
+NEWS_URL_INDEX = 3
 
-def save_step3_results_to_db(conn,articles):
-    sql = """
-        INSERT INTO News (title, date, full_text, url, summary_text, company_id)
-        VALUES (%s, %s, %s, %s, %s, %s)
+
+def _news_row(art):
+    return (
+        art.get("title"),
+        art.get("date"),
+        art.get("full_text"),
+        art["url"],
+        art.get("summary_text"),
+        art.get("company_id"),
+        url_hash(art["url"]),
+    )
+
+
+def _insert_missing_news(conn, articles, label):
     """
-    check_sql = "SELECT id FROM News WHERE url = %s LIMIT 1"
-    
+    기사 목록 중 DB 에 없는 URL 만 배치 단위로 INSERT (배치마다 commit)
+    반환: (저장 건수, 이미 존재 건수)
+    """
+    inserted = 0
+    existing = 0
     with conn.cursor() as cur:
-        for art in articles:
-            summary = art["summary_text"]
-            if summary and len(summary) > 150:
-                print("요약 너무 길면 스킵:", len(summary))
-                continue
-            cur.execute(check_sql, (art["url"],))
-            exists = cur.fetchone()
-
-            if exists:
-                print(f"이미 존재하는 뉴스 URL {art['url']}")
-                continue
-
-            try:
-                cur.execute(
-                    sql,
-                    (
-                        art["title"],
-                        art["date"],
-                        art["full_text"],
-                        art["url"],
-                        art["summary_text"],
-                        art["company_id"],
-                    ),
-                )
-            except Exception as e:
-                print(f"STEP3: DB 저장 중 오류 발생 - {art['url']}: {e}")
-                continue
-
-    conn.commit()
-    print(f" News(SUMMARY) {len(articles)}건 저장 완료")
+        for chunk in _chunks(_unique_by_url(articles)):
+            known = _lookup_news_ids(cur, [art["url"] for art in chunk])
+            rows = [_news_row(art) for art in chunk if art["url"] not in known]
+            existing += len(chunk) - len(rows)
+            inserted += len(_executemany_or_each(cur, NEWS_INSERT_SQL, rows, label, NEWS_URL_INDEX))
+            conn.commit()
+    return inserted, existing
 
-def save_step4_results_to_db(conn, articles):
 
-    # News 관련 SQL
-    news_check_sql = "SELECT id FROM News WHERE url = %s LIMIT 1"
-    news_insert_sql = """
-        INSERT INTO News (title, date, full_text, url, summary_text, company_id)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """
+def save_step2_results_to_db(conn, articles):
+    inserted, existing = _insert_missing_news(conn, articles, "News(DBONLY) INSERT")
+    print(f" News(DBONLY) {inserted}건 저장 완료 (이미 존재 {existing}건)")
+
+def save_step3_results_to_db(conn,articles):
+    valid = []
+    for art in articles:
+        summary = art["summary_text"]
+        if summary and len(summary) > 150:
+            print("요약 너무 길면 스킵:", len(summary))
+            continue
+        valid.append(art)
+
+    inserted, existing = _insert_missing_news(conn, valid, "STEP3: News INSERT")
+    print(f" News(SUMMARY) {inserted}건 저장 완료 (이미 존재 {existing}건)")
+
+def save_step4_results_to_db(conn, articles):
 
     # Sentiments 관련 SQL
+    # pymysql executemany 가 다중 행 INSERT 로 바꾸려면 VALUES 안이 전부 %s 여야 해서
+    # NOW() 대신 배치마다 DB 시간을 한 번 조회해서 넘김
     sent_upsert_sql = """
         INSERT INTO Sentiments (label, prob_pos, prob_neg, prob_neu, score, date, news_id)
-        VALUES (%s, %s, %s, %s, %s, NOW(), %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
         ON DUPLICATE KEY UPDATE
             label = VALUES(label),
             prob_pos = VALUES(prob_pos),
             prob_neg = VALUES(prob_neg),
             prob_neu = VALUES(prob_neu),
             score = VALUES(score),
-            date = NOW()
+            date = VALUES(date)
     """
 
     inserted_news = 0
     upserted_sent = 0
     skipped = 0
 
+    valid = []
+    for art in articles:
+        url = art.get("url")
+        if not url:
+            skipped += 1
+            continue
+
+        summary = art.get("summary_text")
+        if summary and len(summary) > 300:
+            print("요약 너무 길면 스킵:", len(summary), url)
+            skipped += 1
+            continue
+        valid.append(art)
+
     with conn.cursor() as cur:
-        for art in articles:
-            url = art.get("url")
-            if not url:
-                skipped += 1
-                continue
-
-            summary = art.get("summary_text")
-            if summary and len(summary) > 300:
-                print("요약 너무 길면 스킵:", len(summary), url)
-                skipped += 1
-                continue
-            
-            # News: INSERT if not exists 
-            cur.execute(news_check_sql, (url,))
-            row = cur.fetchone()
-
-            if row:
-                news_id = row["id"] if isinstance(row, dict) else row[0]
-            else:
-                try:
-                    cur.execute(
-                        news_insert_sql,
-                        (
-                            art.get("title"),
-                            art.get("date"),
-                            art.get("full_text"),
-                            url,
-                            summary,
-                            art.get("company_id"),
-                        ),
-                    )
-                    news_id = cur.lastrowid
-                    inserted_news += 1
-                except Exception as e:
-                    print(f"DB: News INSERT 실패 - {url}: {e}")
+        for chunk in _chunks(_unique_by_url(valid)):
+            # News: 없는 URL 만 다중 행 INSERT
+            known = _lookup_news_rows(cur, [art["url"] for art in chunk])
+            news_rows = [_news_row(art) for art in chunk if art["url"] not in known]
+            inserted_news += len(_executemany_or_each(cur, NEWS_INSERT_SQL, news_rows, "News INSERT", NEWS_URL_INDEX))
+
+            # 새로 들어간 News.id 를 한 번에 조회
+            if news_rows:
+                known.update(_lookup_news_rows(cur, [row[NEWS_URL_INDEX] for row in news_rows]))
+
+            # Sentiments: 다중 행 UPSERT
+            cur.execute("SELECT NOW() AS now")
+            now = cur.fetchone()["now"]
+            sent_rows = []
+            company_of = {}
+            for art in chunk:
+                url = art["url"]
+                news = known.get(url)
+                if news is None:
                     skipped += 1
                     continue
+                news_id = news["id"]
+                company_of[news_id] = news["company_id"]
+
+                label = art.get("sentiment_label")
+                p_pos = art.get("p_positive")
+                p_neg = art.get("p_negative")
+                p_neu = art.get("p_neutral")
+                score = art.get("k_index")
+
+                if label is None or p_pos is None or p_neg is None or p_neu is None or score is None:
+                    print(f"DB: Sentiments 값 부족 스킵 - news_id={news_id}, url={url}")
+                    skipped += 1
+                    continue
+
+                sent_rows.append((label, p_pos, p_neg, p_neu, score, now, news_id))
+
+            old_scores = _lookup_sentiments(cur, [row[6] for row in sent_rows])
+            done = _executemany_or_each(cur, sent_upsert_sql, sent_rows, "Sentiments UPSERT", 6)
+            upserted_sent += len(done)
+            skipped += len(sent_rows) - len(done)
+
+            # Sentiment_buckets: 같은 트랜잭션에서 회사별 15분 버킷 합계/건수 갱신
+            done_ids = {row[6] for row in done}
+            new_scores = [(company_of[row[6]], row[5], row[4]) for row in done]
+            old_scores = [
+                (company_id, date, score)
+                for news_id, company_id, date, score in old_scores
+                if news_id in done_ids
+            ]
+            cur.executemany(BUCKET_UPSERT_SQL, bucket_deltas(new_scores, old_scores))
+
+            conn.commit()
 
-            # Sentiments: UPSERT
-            label = art.get("sentiment_label")
-            p_pos = art.get("p_positive")
-            p_neg = art.get("p_negative")
-            p_neu = art.get("p_neutral")
-            score = art.get("k_index")
-
-            if label is None or p_pos is None or p_neg is None or p_neu is None or score is None:
-                print(f"DB: Sentiments 값 부족 스킵 - news_id={news_id}, url={url}")
-                skipped += 1
-                continue
-
-            try:
-                cur.execute(
-                    sent_upsert_sql,
-                    (label, p_pos, p_neg, p_neu, score, news_id),
-                )
-                upserted_sent += 1
-            except Exception as e:
-                print(f"DB: Sentiments UPSERT 실패 - news_id={news_id}, url={url}: {e}")
-                skipped += 1
-                continue
-
-    conn.commit()
     print("STEP4 DB 저장 결과")
     print(f" - News(summary) 저장: {inserted_news}")
     print(f" - Sentiments(감정분석) 저장: {upserted_sent}")
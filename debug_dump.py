@@ -0,0 +1,123 @@
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 단계별 중간 결과 디버깅 덤프 (기본 꺼짐, 운영에서는 켜지 않음)
+#   DEBUG_DUMP=gzip  -> debug_dumps/<name>.jsonl.gz  (표준 라이브러리)
+#   DEBUG_DUMP=zstd  -> debug_dumps/<name>.jsonl.zst (zstandard 패키지 필요)
+# 실행마다 파일 끝에 이어서 씀 (append-only, 압축 프레임을 이어 붙이는 방식)
+# 첫 줄은 {"_dump": name, "_at": 시각, "_count": 건수} 헤더, 이후 한 줄에 기사 하나
+#
+# 읽기
+#   python debug_dump.py step3_related --limit 5
+#   python debug_dump.py step4_with_sentiment --all-runs --fields id,title,k_index
+DEBUG_DUMP = os.getenv("DEBUG_DUMP", "off").lower()
+DEBUG_DUMP_DIR = os.getenv("DEBUG_DUMP_DIR", "debug_dumps")
+DEBUG_DUMP_FULL_TEXT = os.getenv("DEBUG_DUMP_FULL_TEXT", "0") == "1"  # 본문까지 저장할지
+
+_EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+
+def _path(name, fmt):
+    return os.path.join(DEBUG_DUMP_DIR, f"{name}{_EXTENSIONS[fmt]}")
+
+
+def _open_append(path, fmt):
+    if fmt == "zstd":
+        import zstandard
+
+        return zstandard.open(path, "ab")
+    return gzip.open(path, "ab", compresslevel=5)
+
+
+def _open_read(path):
+    # 실행마다 프레임(gzip member)이 따로 붙어 있으므로 모든 프레임을 이어서 읽음
+    if path.endswith(".zst"):
+        import zstandard
+
+        dctx = zstandard.ZstdDecompressor(max_window_size=2 ** 31)
+        reader = dctx.stream_reader(open(path, "rb"), read_across_frames=True)
+        return io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8")
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def dump_records(name, records):
+    """
+    DEBUG_DUMP 가 꺼져 있으면 아무것도 하지 않음
+    full_text 는 DEBUG_DUMP_FULL_TEXT=1 일 때만 저장
+    """
+    if DEBUG_DUMP not in _EXTENSIONS:
+        return
+
+    os.makedirs(DEBUG_DUMP_DIR, exist_ok=True)
+    header = {"_dump": name, "_at": time.strftime("%Y-%m-%d %H:%M:%S"), "_count": len(records)}
+    lines = [json.dumps(header, ensure_ascii=False)]
+    for rec in records:
+        if not DEBUG_DUMP_FULL_TEXT and "full_text" in rec:
+            rec = {k: v for k, v in rec.items() if k != "full_text"}
+        lines.append(json.dumps(rec, ensure_ascii=False))
+
+    with _open_append(_path(name, DEBUG_DUMP), DEBUG_DUMP) as f:
+        f.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+def read_runs(name):
+    """
+    반환: [(헤더, [기사...]), ...]  오래된 실행부터
+    """
+    paths = [_path(name, fmt) for fmt in _EXTENSIONS if os.path.exists(_path(name, fmt))]
+    runs = []
+    for path in paths:
+        with _open_read(path) as f:
+            for raw in f:
+                rec = json.loads(raw)
+                if "_dump" in rec:
+                    runs.append((rec, []))
+                elif runs:
+                    runs[-1][1].append(rec)
+    runs.sort(key=lambda run: run[0]["_at"])
+    return runs
+
+
+def read_records(name, all_runs=False):
+    # 기본은 가장 최근 실행의 기사만
+    runs = read_runs(name)
+    if not runs:
+        return []
+    if all_runs:
+        return [rec for _, records in runs for rec in records]
+    return runs[-1][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="디버깅 덤프 읽기")
+    parser.add_argument("name", help="예: step1_naver_articles, step2_full_pipeline, step3_related")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--all-runs", action="store_true", help="모든 실행의 기사 출력 (기본: 최근 실행)")
+    parser.add_argument("--fields", help="출력할 필드 (쉼표 구분)")
+    args = parser.parse_args()
+
+    runs = read_runs(args.name)
+    if not runs:
+        print(f"debug_dump: {args.name} 덤프 없음 ({DEBUG_DUMP_DIR})")
+        return 1
+    for header, records in runs[-3:]:
+        print(f"# {header['_at']} {header['_count']}건")
+
+    fields = args.fields.split(",") if args.fields else None
+    for rec in read_records(args.name, all_runs=args.all_runs)[:args.limit]:
+        if fields:
+            rec = {k: rec.get(k) for k in fields}
+        print(json.dumps(rec, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
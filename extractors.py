@@ -0,0 +1,146 @@
+import os
+import re
+from urllib.parse import urlparse
+from lxml import etree
+from lxml import html as lxml_html
+from newspaper import Article
+from newspaper.article import ArticleException
+from newspaper.parsers import Parser
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 언론사별 본문 추출기
+# newspaper 의 parse() 는 매번 전체 DOM 에 대해 본문 후보 점수를 계산해서 step2 CPU 시간 대부분을 차지함
+# 자주 나오는 언론사는 본문 위치(XPath)가 고정되어 있으므로 미리 컴파일한 XPath 로 바로 꺼내고
+# 등록되지 않은 도메인이거나 결과가 이상하면(본문 못 찾음 / 너무 짧음) newspaper 로 처리
+#
+# 반환하는 경로(path)
+#   fast      : 등록된 추출기로 성공
+#   fallback  : 등록된 도메인이지만 추출 실패 -> newspaper (많아지면 언론사 마크업이 바뀐 것)
+#   newspaper : 등록되지 않은 도메인
+EXTRACT_FAST_PATH = os.getenv("EXTRACT_FAST_PATH", "1") == "1"
+EXTRACT_MIN_CHARS = int(os.getenv("EXTRACT_MIN_CHARS", "200"))     # 이보다 짧으면 잘못 잡은 것으로 보고 newspaper 사용
+
+# 도메인(www. 제외, 하위 도메인은 상위 도메인으로도 찾음) -> 본문 요소 XPath
+DOMAIN_XPATHS = {
+    "hankyung.com": '//div[@id="articletxt"]',
+    "mk.co.kr": '//div[@itemprop="articleBody"]',
+    "yna.co.kr": '//div[contains(concat(" ", normalize-space(@class), " "), " story-news ")]',
+    "edaily.co.kr": '//div[@class="news_body"]',
+    "mt.co.kr": '//div[@id="textBody"]',
+    "sedaily.com": '//div[@itemprop="articleBody"]',
+    "etnews.com": '//div[@id="articleBody"]',
+    "heraldcorp.com": '//div[@id="articleText"]',
+    "fnnews.com": '//div[@id="article_content"]',
+    "news1.kr": '//div[@id="articles_detail"]',
+    "newsis.com": '//div[@class="viewer"]//article',
+    "asiae.co.kr": '//div[@itemprop="articleBody"]',
+    "ajunews.com": '//div[@itemprop="articleBody"]',
+    "zdnet.co.kr": '//div[@id="articleBody"]',
+    "inews24.com": '//article[@id="articleBody"]',
+    "dt.co.kr": '//div[@id="news_body_area"]',
+    "donga.com": '//section[@class="news_view"]',
+    "hani.co.kr": '//div[@class="article-text"]',
+}
+
+# URL 패턴으로 고르는 추출기
+#   naver  : 네이버 뉴스 사본 (n.news.naver.com/mnews/article/<언론사>/<기사>), 모든 언론사가 같은 마크업
+#            (<p> 없이 <br> 로만 문단을 나눠서 newspaper 는 본문을 거의 못 잡음)
+#   ndsoft : 같은 기사 CMS 를 쓰는 중소 언론사
+URL_PATTERN_XPATHS = [
+    ("naver", re.compile(r"/mnews/article/\d+/\d+"), '//article[@id="dic_area"] | //div[@id="dic_area"]'),
+    ("ndsoft", re.compile(r"/news/articleView\.html"), '//article[@id="article-view-content-div"]'),
+]
+
+# 본문 요소 안에서 빼는 요소 (사진 설명, 광고 스크립트, 관련 기사 버튼 등)
+DROP_XPATH = etree.XPath(
+    ".//script | .//style | .//noscript | .//iframe | .//figure | .//figcaption"
+    " | .//button | .//form | .//table"
+)
+# 추출기별로 더 빼는 요소 (네이버: 사진 + 사진 설명, 동영상 플레이어)
+EXTRA_DROP_XPATHS = {
+    "naver": './/span[@class="end_photo_org"] | .//em[@class="img_desc"] | .//div[contains(@class, "vod_player")]',
+}
+BLOCK_TAGS = ("p", "div", "br", "li", "h1", "h2", "h3", "h4", "section", "article", "blockquote")
+
+_domain_extractors = {domain: etree.XPath(xpath) for domain, xpath in DOMAIN_XPATHS.items()}
+_pattern_extractors = [(name, pattern, etree.XPath(xpath)) for name, pattern, xpath in URL_PATTERN_XPATHS]
+_extra_drops = {name: etree.XPath(xpath) for name, xpath in EXTRA_DROP_XPATHS.items()}
+
+
+def find_extractor(url):
+    """
+    반환: (추출기 이름, 컴파일된 XPath, 추가로 뺄 요소 XPath 또는 None) 또는 None
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[len("www."):]
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        domain = ".".join(labels[i:])
+        if domain in _domain_extractors:
+            return domain, _domain_extractors[domain], _extra_drops.get(domain)
+    for name, pattern, xpath in _pattern_extractors:
+        if pattern.search(parsed.path):
+            return name, xpath, _extra_drops.get(name)
+    return None
+
+
+def _node_text(node, drop=None):
+    for bad in DROP_XPATH(node) + (drop(node) if drop is not None else []):
+        bad.drop_tree()
+    # 블록 요소 앞뒤와 <br> 뒤에 줄바꿈을 넣어서 문단 구분 유지 (newspaper 처럼 문단 사이 빈 줄)
+    for el in node.iter(*BLOCK_TAGS):
+        if el.tag != "br":
+            el.text = "\n" + (el.text or "")
+        el.tail = "\n" + (el.tail or "")
+    lines = (" ".join(line.split()) for line in node.text_content().split("\n"))
+    return "\n\n".join(line for line in lines if line)
+
+
+def fast_extract(xpath, html, drop=None):
+    # 실패하면 None (호출한 쪽에서 newspaper 로 넘김)
+    if isinstance(html, bytes):
+        # newspaper 와 같은 방식으로 디코딩 (meta charset / 추정)
+        try:
+            html = Parser.get_unicode_html(html)
+        except Exception:
+            return None
+    try:
+        doc = lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+    nodes = xpath(doc)
+    if not nodes:
+        return None
+    text = "\n\n".join(t for t in (_node_text(node, drop) for node in nodes) if t)
+    if len(text) < EXTRACT_MIN_CHARS:
+        return None
+    return text
+
+
+def newspaper_extract(url, html):
+    article = Article(url, language="ko")
+    try:
+        article.download(input_html=html)
+        article.parse()
+    except ArticleException:
+        return None
+    return article.text
+
+
+def extract_article(url, html):
+    """
+    반환: (본문 또는 None, 경로)  - 경로는 fast / fallback / newspaper
+    """
+    extractor = find_extractor(url) if EXTRACT_FAST_PATH else None
+    if extractor is None:
+        return newspaper_extract(url, html), "newspaper"
+    _, xpath, drop = extractor
+    text = fast_extract(xpath, html, drop)
+    if text is not None:
+        return text, "fast"
+    return newspaper_extract(url, html), "fallback"
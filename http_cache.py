@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# step2 기사 HTML 다운로드 캐시 (sqlite 파일, 본문은 zlib 압축)
+# 여러 회사 검색 결과에 같은 기사가 나오거나, 실패 후 재실행하거나, 샤드 워커들이 같은 기사를 받는 경우
+# 크롤 주기(HTTP_CACHE_WINDOW_MINUTES) 안에서는 같은 URL 을 한 번만 받음
+#  - 주기 안     : 요청 없이 캐시 사용 (fresh)
+#  - 주기 지남   : ETag / Last-Modified 가 있으면 조건부 요청, 304 면 캐시 사용 (revalidated)
+#  - 그 외       : 새로 다운로드 (miss)
+# 언론사 Cache-Control 은 따르지 않음 (대부분 no-cache 라서 그대로 따르면 캐시 효과가 없음)
+# 전체 크기가 HTTP_CACHE_MAX_MB 를 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "http_cache.sqlite3")
+HTTP_CACHE_WINDOW_MINUTES = float(os.getenv("HTTP_CACHE_WINDOW_MINUTES", "60"))
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "512"))
+
+EVICT_TARGET = 0.9    # 넘치면 최대 크기의 90% 까지 줄임 (매번 조금씩 지우지 않도록)
+
+CachedPage = namedtuple("CachedPage", ["body", "encoding", "etag", "last_modified", "fresh"])
+
+
+class HttpCache:
+    def __init__(self, path=HTTP_CACHE_PATH, window_minutes=HTTP_CACHE_WINDOW_MINUTES, max_mb=HTTP_CACHE_MAX_MB):
+        self.window_seconds = window_minutes * 60
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight = {}     # URL -> [lock, 대기 수]
+        self._inflight_lock = threading.Lock()
+        # 샤드 프로세스들이 같은 파일을 쓰므로 잠금 대기 시간을 넉넉히
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache (last_access)")
+        self._conn.commit()
+
+    @contextmanager
+    def url_lock(self, url):
+        # 같은 URL 을 여러 스레드가 동시에 받지 않도록 (뒤에 온 스레드는 앞 스레드가 채운 캐시를 사용)
+        with self._inflight_lock:
+            entry = self._inflight.setdefault(url, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._inflight_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._inflight[url]
+
+    def get(self, url):
+        """
+        반환: CachedPage 또는 None
+        fresh 가 True 면 크롤 주기 안에 받은 것 (요청 없이 사용), False 면 조건부 요청 필요
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, encoding, etag, last_modified, fetched_at FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            fresh = now - row[4] < self.window_seconds
+            if fresh:
+                self._conn.execute("UPDATE http_cache SET last_access = ? WHERE url = ?", (now, url))
+                self._conn.commit()
+                self.hits += 1
+        return CachedPage(zlib.decompress(row[0]), row[1], row[2], row[3], fresh)
+
+    def validators(self, page):
+        # 조건부 요청 헤더 (검증 정보가 없으면 빈 dict -> 일반 요청)
+        headers = {}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def touch(self, url):
+        # 304 응답: 본문은 그대로 두고 크롤 주기만 새로 시작
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url)
+            )
+            self._conn.commit()
+            self.revalidated += 1
+
+    def put(self, url, content, encoding, etag=None, last_modified=None):
+        now = time.time()
+        body = zlib.compress(content, 6)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache
+                    (url, body, encoding, etag, last_modified, size, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, body, encoding, etag, last_modified, len(body), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+            self.misses += 1
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TARGET)
+        victims = []
+        for url, size in self._conn.execute("SELECT url, size FROM http_cache ORDER BY last_access"):
+            victims.append((url,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM http_cache WHERE url = ?", victims)
+
+    def stats(self):
+        # hit: 요청 없이 사용 / revalidated: 304 로 재사용 / miss: 새로 다운로드
+        total = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.revalidated) / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    # HTTP_CACHE_ENABLED=0 이면 None
+    global _cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
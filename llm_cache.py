@@ -0,0 +1,108 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# GPT 관련성 판단/요약 결과 캐시 (sqlite 파일)
+# 키: sha256(company_name, 정규화한 본문, SYSTEM_PROMPT, MODEL_NAME)
+# 같은 기사(통신사 기사 재배포, 크래시 후 재실행)는 API 를 다시 호출하지 않음
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    return _whitespace.sub(" ", text or "").strip()
+
+
+def make_key(company_name, full_text, system_prompt, model_name):
+    parts = [company_name or "", normalize_text(full_text), system_prompt, model_name]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=LLM_CACHE_PATH, ttl_days=LLM_CACHE_TTL_DAYS, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                is_related INTEGER NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        반환: (summary, is_related) 또는 None(캐시 없음/만료)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT is_related, summary, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[1], bool(row[0])
+
+    def put(self, key, summary, is_related):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (key, is_related, summary, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, int(is_related), summary, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        # 만료된 항목 삭제 후, 최대 개수를 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,245 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 파이프라인 메트릭 (프로세스 안에서만 집계, 실행 끝에 파일로 내보냄)
+#  - stage(name)        : 단계별 wall time (run_pipeline 소요 시간 출력에 사용)
+#  - timer / observe    : 기사/요청 단위 지연 시간 히스토그램
+#  - inc / error        : 건수, 오류 유형별 건수, API 토큰 사용량
+#
+# METRICS_EXPORT=json | prom | both  -> METRICS_DIR/<이름>.json, <이름>.prom
+#   (.prom 은 node_exporter textfile collector 로 바로 수집 가능)
+# PROFILE=cprofile -> PROFILE_DIR/<이름>-<시각>.prof 저장 + 상위 함수 출력
+# PROFILE=pyspy    -> py-spy record 로 flamegraph(svg) 저장 (py-spy 설치 + ptrace 권한 필요)
+METRICS_EXPORT = os.getenv("METRICS_EXPORT", "off").lower()
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+PROFILE = os.getenv("PROFILE", "off").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+PREFIX = "news_pipeline_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_counters = {}      # (이름, 라벨) -> 값
+_histograms = {}    # (이름, 라벨) -> [버킷별 건수(마지막은 +Inf), 합계, 건수]
+_stages = {}        # 단계 이름 -> 초 (실행 순서 유지)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def error(stage, err):
+    # err: 예외 또는 유형 문자열 (예: "http_404")
+    kind = err if isinstance(err, str) else type(err).__name__
+    inc("errors_total", stage=stage, type=kind)
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            _histograms[key] = hist
+        hist[0][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        hist[1] += seconds
+        hist[2] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _stages[name] = _stages.get(name, 0.0) + elapsed
+
+
+def stage_seconds():
+    with _lock:
+        return dict(_stages)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _stages.clear()
+
+
+def _quantile(buckets, count, q):
+    # 버킷 상한값 기준 근사치
+    if not count:
+        return None
+    target = q * count
+    seen = 0
+    for bound, n in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+        seen += n
+        if seen >= target:
+            return bound
+    return float("inf")
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (list(h[0]), h[1], h[2]) for key, h in _histograms.items()}
+        stages = dict(_stages)
+
+    return {
+        "stages": stages,
+        "counters": [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(counters.items())
+        ],
+        "histograms": [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "sum": total,
+                "p50": _quantile(buckets, count, 0.5),
+                "p95": _quantile(buckets, count, 0.95),
+                "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], buckets)),
+            }
+            for (name, labels), (buckets, total, count) in sorted(histograms.items())
+        ],
+    }
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def to_prometheus():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (list(h[0]), h[1], h[2]) for key, h in _histograms.items()}
+        stages = dict(_stages)
+
+    lines = []
+    if stages:
+        lines.append(f"# TYPE {PREFIX}stage_seconds gauge")
+        for name, seconds in stages.items():
+            lines.append(f"{PREFIX}stage_seconds{_labels_text([('stage', name)])} {seconds:.6f}")
+
+    typed = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in typed:
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            typed.add(name)
+        lines.append(f"{PREFIX}{name}{_labels_text(labels)} {value}")
+
+    for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+        if name not in typed:
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, n in zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], buckets):
+            cumulative += n
+            lines.append(f"{PREFIX}{name}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_labels_text(labels)} {total:.6f}")
+        lines.append(f"{PREFIX}{name}_count{_labels_text(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _write(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _safe_name(name):
+    return re.sub(r"[^0-9A-Za-z_.-]+", "_", name)
+
+
+def export(name="pipeline"):
+    # METRICS_EXPORT 가 꺼져 있으면 아무것도 하지 않음
+    if METRICS_EXPORT not in ("json", "prom", "both"):
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    base = os.path.join(METRICS_DIR, _safe_name(name))
+    if METRICS_EXPORT in ("json", "both"):
+        data = {"name": name, "at": time.strftime("%Y-%m-%d %H:%M:%S"), **snapshot()}
+        _write(f"{base}.json", json.dumps(data, ensure_ascii=False, indent=2))
+    if METRICS_EXPORT in ("prom", "both"):
+        _write(f"{base}.prom", to_prometheus())
+
+
+@contextmanager
+def profiled(name="pipeline"):
+    """
+    PROFILE 설정에 따라 블록 전체를 프로파일링 (기본 꺼짐)
+    """
+    if PROFILE not in ("cprofile", "pyspy"):
+        yield
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{_safe_name(name)}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+    if PROFILE == "pyspy":
+        if shutil.which("py-spy") is None:
+            print("profile: py-spy 가 설치되어 있지 않음, 프로파일링 없이 진행")
+            yield
+            return
+        proc = subprocess.Popen(
+            ["py-spy", "record", "--pid", str(os.getpid()), "--output", f"{base}.svg", "--subprocesses"],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            yield
+        finally:
+            # SIGINT 를 받으면 py-spy 가 지금까지 샘플로 파일을 씀
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            print(f"profile: py-spy 결과 저장 - {base}.svg")
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{base}.prof")
+        print(f"profile: cProfile 결과 저장 - {base}.prof (상위 15개, cumulative)")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
@@ -0,0 +1,109 @@
+import os
+import random
+import re
+import zlib
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 같은 기사를 여러 언론사가 다른 URL 로 재배포하는 경우를 묶기 위한 MinHash + LSH 인덱스
+# 회사별 + 시간 창(window) 안에서만 비교하고, 묶인 기사들은 대표 기사 하나만 GPT/감정분석을 거침
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "1") == "1"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))      # 추정 Jaccard 유사도 기준
+NEAR_DUP_WINDOW_HOURS = float(os.getenv("NEAR_DUP_WINDOW_HOURS", "48"))
+
+SHINGLE_SIZE = 5      # 글자 단위 shingle (공백 제거 후)
+NUM_PERM = 64
+BANDS = 16            # LSH band 수 (band 당 NUM_PERM / BANDS 행)
+
+_PRIME = (1 << 31) - 1
+_rng = random.Random(20240601)
+_PERM_A = np.array([_rng.randrange(1, _PRIME) for _ in range(NUM_PERM)], dtype=np.uint64)
+_PERM_B = np.array([_rng.randrange(0, _PRIME) for _ in range(NUM_PERM)], dtype=np.uint64)
+
+_whitespace = re.compile(r"\s+")
+
+
+def shingle_hashes(text):
+    compact = _whitespace.sub("", text or "")
+    if len(compact) < SHINGLE_SIZE:
+        compact = compact.ljust(SHINGLE_SIZE)
+    hashes = {
+        zlib.crc32(compact[i:i + SHINGLE_SIZE].encode("utf-8")) & _PRIME
+        for i in range(len(compact) - SHINGLE_SIZE + 1)
+    }
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+def minhash_signature(text):
+    # (a * x + b) mod p 순열 NUM_PERM 개를 한 번에 계산 (값이 2^62 미만이라 uint64 overflow 없음)
+    x = shingle_hashes(text)
+    return ((_PERM_A[:, None] * x[None, :] + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+class NearDupIndex:
+    """
+    증분 인덱스: add() 할 때마다 기존 기사들과 비교해서 대표 기사 key 를 돌려줌
+    """
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD, window_hours=NEAR_DUP_WINDOW_HOURS):
+        self.threshold = threshold
+        self.window_seconds = window_hours * 3600
+        self._rows = NUM_PERM // BANDS
+        self._buckets = {}
+        self._entries = {}
+
+    def _within_window(self, a, b):
+        if a is None or b is None:
+            return True
+        return abs((a - b).total_seconds()) <= self.window_seconds
+
+    def add(self, key, company_id, date, text):
+        """
+        반환: 대표 기사 key (처음 보는 내용이면 자기 자신의 key)
+        """
+        signature = minhash_signature(text)
+        dt = _parse_date(date)
+
+        representative = key
+        best = 0.0
+        band_keys = []
+        for band in range(BANDS):
+            band_slice = signature[band * self._rows:(band + 1) * self._rows]
+            band_key = (company_id, band, band_slice.tobytes())
+            band_keys.append(band_key)
+            for other in self._buckets.get(band_key, ()):
+                other_sig, other_dt, other_rep = self._entries[other]
+                if not self._within_window(dt, other_dt):
+                    continue
+                similarity = float(np.mean(signature == other_sig))
+                if similarity >= self.threshold and similarity > best:
+                    best = similarity
+                    representative = other_rep
+
+        self._entries[key] = (signature, dt, representative)
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return representative
+
+
+def cluster_articles(articles, text_key="full_text"):
+    """
+    반환: articles 와 같은 길이의 리스트, 각 위치의 대표 기사 index
+    """
+    index = NearDupIndex()
+    return [
+        index.add(i, art.get("company_id"), art.get("date"), art.get(text_key) or "")
+        for i, art in enumerate(articles)
+    ]
@@ -0,0 +1,107 @@
+import os
+import re
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+except ImportError:  # 없으면 바이트 수 기반 추정치 사용
+    tiktoken = None
+
+load_dotenv()
+
+# step3 GPT 입력 본문을 토큰 예산 안으로 줄이는 전처리
+# 요약은 150자 이내라서 기사 전체가 필요하지 않음 -> 앞 문단(리드) + 회사명이 나오는 문장만 남김
+#  - STEP3_INPUT_TOKENS=0 이면 줄이지 않음
+#  - tiktoken 이 설치되어 있으면 실제 토큰 수, 없으면 보수적인 추정치로 계산
+STEP3_INPUT_TOKENS = int(os.getenv("STEP3_INPUT_TOKENS", "600"))
+STEP3_LEAD_PARAGRAPHS = int(os.getenv("STEP3_LEAD_PARAGRAPHS", "2"))
+TIKTOKEN_ENCODING = "o200k_base"     # gpt-4o 계열
+
+GAP_MARK = "(...)"      # 빠진 문장이 있는 자리
+
+_sentence_end = re.compile(r"(?<=[.!?。])\s+")
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    # 처음 쓸 때 한 번만 로딩 (인코딩 파일을 받지 못하면 추정치로 계속 진행)
+    global _encoding, _encoding_failed
+    if tiktoken is None or _encoding_failed:
+        return None
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception as e:
+            print(f"prompt_budget: tiktoken 인코딩 로딩 실패, 추정치 사용 - {e}")
+            _encoding_failed = True
+            return None
+    return _encoding
+
+
+def estimate_tokens(text):
+    # 토크나이저 없이 보수적으로 추정: 한글 1글자(3바이트) ~ 1토큰, 영문 ~3글자 1토큰
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text))
+
+
+def _truncate(text, budget):
+    encoding = _get_encoding()
+    if encoding is None:
+        # 추정치 기준 한글 1글자 ~ 1토큰
+        return text[:budget]
+    return encoding.decode(encoding.encode(text)[:budget])
+
+
+def split_sentences(paragraph):
+    return [s for s in _sentence_end.split(paragraph) if s.strip()]
+
+
+def trim_to_budget(company_name, full_text, budget=STEP3_INPUT_TOKENS, query=None):
+    """
+    본문을 budget 토큰 안으로 줄임 (원래 순서 유지)
+    우선순위: 앞 STEP3_LEAD_PARAGRAPHS 문단 -> 나머지 문단에서 회사명 또는 검색어(query)가 나오는 문장
+    """
+    if budget <= 0 or not full_text or count_tokens(full_text) <= budget:
+        return full_text
+
+    paragraphs = [p.strip() for p in full_text.split("\n") if p.strip()]
+    units = [(pi, s.strip()) for pi, p in enumerate(paragraphs) for s in split_sentences(p)]
+    # 회사명과 검색어 표기가 다른 경우가 있음 (예: "SK 하이닉스" / "SK하이닉스")
+    names = [n for n in dict.fromkeys([company_name, query]) if n]
+    lead = [k for k, (pi, _) in enumerate(units) if pi < STEP3_LEAD_PARAGRAPHS]
+    mentions = [
+        k for k, (pi, s) in enumerate(units)
+        if pi >= STEP3_LEAD_PARAGRAPHS and any(n in s for n in names)
+    ]
+
+    chosen = []
+    used = 0
+    for k in lead + mentions:
+        cost = count_tokens(units[k][1])
+        if used + cost > budget:
+            continue
+        chosen.append(k)
+        used += cost
+    if not chosen:
+        # 첫 문장부터 예산보다 길면 잘라서 사용
+        return _truncate(units[0][1] if units else full_text, budget)
+
+    pieces = []
+    prev = None
+    for k in sorted(chosen):
+        pi, sentence = units[k]
+        if prev is not None and k == prev + 1 and units[prev][0] == pi:
+            pieces[-1] += " " + sentence
+        else:
+            if prev is not None and k != prev + 1:
+                pieces.append(GAP_MARK)
+            pieces.append(sentence)
+        prev = k
+    return "\n".join(pieces)
@@ -0,0 +1,40 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    스레드 안전 토큰 버킷
+    rate: 초당 채워지는 토큰 수, capacity: 버킷 최대 크기(순간 허용량)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1.0):
+        # capacity 보다 큰 요청은 버킷이 가득 찼을 때 통과시키고 잔고를 음수(빚)로 남김
+        # -> 다음 요청이 빚을 갚을 때까지 기다리므로 평균 속도는 rate 를 넘지 않음
+        tokens = float(tokens)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= min(tokens, self.capacity):
+                    self._tokens -= tokens
+                    return
+                wait = (min(tokens, self.capacity) - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    # 지수 백오프 + full jitter
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
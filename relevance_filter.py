@@ -0,0 +1,96 @@
+import json
+import math
+import os
+import numpy as np
+from dotenv import load_dotenv
+from config_companies import COMPANIES
+import metrics
+
+load_dotenv()
+
+# step3 GPT 호출 전에 로컬에서 회사 관련도(salience)를 계산해서 확실히 관련 없는 기사는 바로 제외
+# 특징: 제목에 회사명/검색어, 첫 문단에 등장, 등장 횟수, 첫 등장 위치, 글자 수 대비 등장 빈도
+#  - 기본 점수: 특징별 고정 가중치 (0~1)
+#  - RELEVANCE_MODEL_PATH 에 학습한 로지스틱 회귀 가중치(JSON)가 있으면 그 확률을 점수로 사용
+#    (python -m bench.bench_relevance --train <경로> 로 라벨 샘플에서 학습)
+# 점수가 RELEVANCE_REJECT_BELOW 미만이면 [NOT_RELATED] 로 처리, 나머지는 지금처럼 GPT 판단
+# 임계값은 bench_relevance 의 precision/recall 표를 보고 조정 (0 이면 필터 끔)
+RELEVANCE_REJECT_BELOW = float(os.getenv("RELEVANCE_REJECT_BELOW", "0.1"))
+RELEVANCE_MODEL_PATH = os.getenv("RELEVANCE_MODEL_PATH", "relevance_model.json")
+LEAD_CHARS = 300     # 첫 문단으로 보는 앞부분 글자 수
+
+FEATURES = ("in_title", "in_lead", "mentions", "first_pos", "density")
+# 기본 점수 가중치 (합 1, 회사명이 한 번도 안 나오면 0)
+DEFAULT_WEIGHTS = {"in_title": 0.35, "in_lead": 0.25, "mentions": 0.2, "first_pos": 0.1, "density": 0.1}
+
+_query_of = {c["company_id"]: c.get("query") for c in COMPANIES}
+_model = None
+_model_loaded = False
+
+
+def _names(company_name, query):
+    # 회사명과 검색어 (같으면 하나)
+    return [n for n in dict.fromkeys([company_name, query]) if n]
+
+
+def relevance_features(company_name, query, title, full_text):
+    """
+    반환: FEATURES 순서의 값 dict (모두 0~1 범위)
+    """
+    names = _names(company_name, query)
+    text = full_text or ""
+    title = title or ""
+    mentions = sum(text.count(n) for n in names)
+    positions = [p for p in (text.find(n) for n in names) if p >= 0]
+    first_pos = min(positions) / max(1, len(text)) if positions else 1.0
+    return {
+        "in_title": float(any(n in title for n in names)),
+        "in_lead": float(any(n in text[:LEAD_CHARS] for n in names)),
+        "mentions": min(1.0, math.log1p(mentions) / math.log1p(10)),
+        "first_pos": 1.0 - first_pos,
+        "density": min(1.0, mentions * 1000 / max(1, len(text)) / 5),
+    }
+
+
+def load_model(path=RELEVANCE_MODEL_PATH):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        model = json.load(f)
+    weights = dict(zip(model["features"], model["weights"]))
+    return np.array([weights.get(name, 0.0) for name in FEATURES]), float(model["bias"])
+
+
+def _get_model():
+    global _model, _model_loaded
+    if not _model_loaded:
+        _model = load_model()
+        _model_loaded = True
+    return _model
+
+
+def score_features(features, model=None):
+    x = np.array([features[name] for name in FEATURES])
+    if model is None:
+        return float(sum(DEFAULT_WEIGHTS[name] * features[name] for name in FEATURES))
+    weights, bias = model
+    return float(1.0 / (1.0 + np.exp(-(x @ weights + bias))))
+
+
+def relevance_score(art):
+    features = relevance_features(
+        art.get("company_name"), _query_of.get(art.get("company_id")), art.get("title"), art.get("full_text"),
+    )
+    return score_features(features, _get_model())
+
+
+def prefilter(art, threshold=RELEVANCE_REJECT_BELOW):
+    """
+    반환: (GPT 로 보낼지, 점수)  - 점수가 threshold 미만이면 False
+    """
+    if threshold <= 0:
+        return True, None
+    score = relevance_score(art)
+    keep = score >= threshold
+    metrics.inc("relevance_prefilter_total", result="sent" if keep else "rejected")
+    return keep, score
@@ -1,27 +1,203 @@
+import argparse
+import sys
+import time
+
+_started = time.perf_counter()
+
 from config_companies import FULL_PIPELINE_COMPANY_NAMES
+from crawl_watermark import load_watermarks, commit_watermarks
+from checkpoint_store import CheckpointStore, article_url
 from step1_naver_articles import step1_naver_articles
 from step2_articles_with_content import step2_articles_with_content
 from step3_articles_with_summary_and_groups import step3_articles_with_summary_and_groups
 from step4_articles_with_sentiment import step4_articles_with_sentiment
-from db_config import get_connection
+from db_config import db_connection
+import metrics
 from db_insert import filter_step1_by_db_urls,save_step2_results_to_db,save_step3_results_to_db,save_step4_results_to_db
 
-def main():
+IMPORT_SECONDS = time.perf_counter() - _started
+
+
+def _timed(name, fn, *args):
+    with metrics.stage(name):
+        return fn(*args)
+
+
+def print_timings():
+    # 모델/클라이언트 로딩 시간은 step3/step4 시간 안에 포함 (각 step 로그에 별도 출력)
+    print("pipeline 소요 시간")
+    print(f" - import: {IMPORT_SECONDS:.2f}s")
+    for name, seconds in metrics.stage_seconds().items():
+        print(f" - {name}: {seconds:.2f}s")
+    print(f" - 전체: {time.perf_counter() - _started:.2f}s")
+
+
+def _with_db(fn, *args):
+    # DB 작업할 때만 풀에서 커넥션을 빌림 (step2~4 동안 커넥션을 쥐고 있지 않음)
+    with db_connection() as conn:
+        return fn(conn, *args)
+
+
+def _urls(articles):
+    return [article_url(art) for art in articles]
+
+
+def _dropped(before, after):
+    kept = set(_urls(after))
+    return [url for url in _urls(before) if url not in kept]
+
+
+def main(stream=False, resume=False, companies=None, shard=None, lease=None):
+    """
+    companies / shard: 샤드 실행 시 해당 샤드의 회사 목록과 이름 (shard_runner)
+    lease: 샤드 리스 (DB 저장 / 워터마크 갱신 전에 lease.check() 로 아직 내 리스인지 확인)
+    반환: 처리 건수 {"step1", "new", "saved", "errors"}  - errors 가 0 이 아니면 종료 코드 1
+    """
+    # 메트릭은 실행(샤드) 단위로 집계해서 내보냄
+    name = f"pipeline-shard-{shard}" if shard else "pipeline"
+    metrics.reset()
+    try:
+        with metrics.profiled(name):
+            counts = _run(stream, resume, companies, shard, lease)
+        for key, value in counts.items():
+            metrics.inc("pipeline_articles_total", value, kind=key)
+    finally:
+        metrics.export(name)
+    return counts
+
+
+def _run(stream, resume, companies, shard, lease=None):
+    counts = {"step1": 0, "new": 0, "saved": 0, "errors": 0}
+    # 리스를 잃으면 예외(LeaseLost)로 샤드를 중단 -> 다른 워커가 저장한 결과를 덮거나 워터마크를 옮기지 않음
+    check_lease = lease.check if lease is not None else (lambda: None)
 
-    conn = get_connection()
-    
-    result_by_step1 = step1_naver_articles()
-    
-    result_by_step1 = filter_step1_by_db_urls(conn, result_by_step1)
-    
-    result_by_step2, result_by_step2_db = step2_articles_with_content(result_by_step1)
-    
-    result_by_step3 = step3_articles_with_summary_and_groups(result_by_step2)
-    
-    result_by_step4 = step4_articles_with_sentiment(result_by_step3)
+    watermarks = load_watermarks()
+    store = CheckpointStore()
 
-    save_step4_results_to_db(conn, result_by_step4)
-    save_step2_results_to_db(conn, result_by_step2_db)
+    # 단계별로 처리할 기사 (새 실행이면 step1 결과부터, 재개면 체크포인트에서 읽음)
+    todo_step2, todo_step3, todo_step4, todo_save, todo_save_db = [], [], [], [], []
+    # 처리에 실패한 기사 (워터마크가 이 기사들을 넘어가지 않음)
+    failed = []
+
+    if resume:
+        run_id = store.latest_unfinished_run(shard)
+        if run_id is None:
+            print("pipeline: 이어서 처리할 실행 없음, 종료")
+            return counts
+        print(f"pipeline: 실행 {run_id} 이어서 처리 {store.stage_counts(run_id)}")
+        seen_by_step1 = store.seen_by_step1(run_id)
+        todo_step2 = store.load(run_id, "step1")
+        todo_step3 = store.load(run_id, "step2", kind="full")
+        todo_save_db = store.load(run_id, "step2", kind="db_only")
+        todo_step4 = store.load(run_id, "step3")
+        todo_save = store.load(run_id, "step4")
+        failed = store.load(run_id, "failed")
+    else:
+        result_by_step1 = _timed("step1", step1_naver_articles, watermarks, companies)
+        seen_by_step1 = result_by_step1
+
+        result_by_step1 = _timed("step1 필터링", _with_db, filter_step1_by_db_urls, result_by_step1)
+        counts["step1"] = len(seen_by_step1)
+        counts["new"] = len(result_by_step1)
+
+        # 새 기사가 없으면 본문 추출/모델 로딩 없이 종료
+        if not result_by_step1:
+            print("pipeline: 새 기사 없음, 종료")
+            check_lease()
+            commit_watermarks(seen_by_step1)
+            print_timings()
+            return counts
+
+        if stream:
+            # 스트리밍 모드: step2~DB 저장을 기사 단위로 겹쳐서 실행
+            from stream_pipeline import run_streaming
+
+            stats = _timed("stream(step2~db)", run_streaming, result_by_step1, failed, check_lease)
+            counts["saved"] = stats["db_saved"]
+            counts["errors"] = sum(n for key, n in stats.items() if key.endswith("_error"))
+            # 실패한 기사가 있는 회사는 그 기사 직전까지만 워터마크 이동
+            check_lease()
+            commit_watermarks(seen_by_step1, failed)
+            print_timings()
+            return counts
+
+        run_id = store.start_run(seen_by_step1, shard)
+        store.record(run_id, "step1", result_by_step1)
+        todo_step2 = result_by_step1
+
+    if todo_step2:
+        check_lease()
+        failed_by_step2 = []
+        result_by_step2, result_by_step2_db = _timed("step2", step2_articles_with_content, todo_step2, failed_by_step2)
+        store.record(run_id, "step2", result_by_step2, kind="full")
+        store.record(run_id, "step2", result_by_step2_db, kind="db_only")
+        store.record(run_id, "failed", failed_by_step2)
+        store.mark(run_id, _dropped(todo_step2, result_by_step2 + result_by_step2_db + failed_by_step2), "dropped")
+        failed += failed_by_step2
+        todo_step3 += result_by_step2
+        todo_save_db += result_by_step2_db
+
+    # 핵심 종목 기사가 없으면 GPT/감정분석 모델을 건드리지 않음
+    # GPT 오류로 판정하지 못한 기사는 step2 단계로 남겨서 --resume 때 다시 요약
+    failed_by_step3 = []
+    if todo_step3:
+        check_lease()
+        result_by_step3 = _timed("step3", step3_articles_with_summary_and_groups, todo_step3, failed_by_step3)
+        store.record(run_id, "step3", result_by_step3)
+        store.mark(run_id, _dropped(todo_step3, result_by_step3 + failed_by_step3), "dropped")
+        todo_step4 += result_by_step3
+        counts["errors"] += len(failed_by_step3)
+    elif not resume:
+        print("pipeline: 핵심 종목 새 기사 없음, step3/step4 스킵")
+
+    if todo_step4:
+        check_lease()
+        result_by_step4 = _timed("step4", step4_articles_with_sentiment, todo_step4)
+        store.record(run_id, "step4", result_by_step4)
+        store.mark(run_id, _dropped(todo_step4, result_by_step4), "dropped")
+        todo_save += result_by_step4
+
+    # DB 저장은 URL 기준으로 이미 있는 News 는 건너뛰고 Sentiments 는 UPSERT 라서 재실행해도 안전
+    if todo_save:
+        check_lease()
+        _timed("db 저장(step4)", _with_db, save_step4_results_to_db, todo_save)
+        store.mark(run_id, _urls(todo_save), "saved")
+        counts["saved"] += len(todo_save)
+
+    if todo_save_db:
+        check_lease()
+        _timed("db 저장(step2)", _with_db, save_step2_results_to_db, todo_save_db)
+        store.mark(run_id, _urls(todo_save_db), "saved")
+        counts["saved"] += len(todo_save_db)
+
+    if failed_by_step3:
+        # 실행을 끝내지 않고 워터마크도 그대로 (다음 실행에서 다시 수집하거나 --resume 으로 이어서 처리)
+        print(f"pipeline: GPT 오류 {len(failed_by_step3)}건 남음, 실행 {run_id} 미완료로 두고 워터마크 유지")
+        print_timings()
+        return counts
+
+    check_lease()
+    store.finish_run(run_id)
+
+    # DB 저장까지 끝난 뒤에만 워터마크 이동 (중간에 죽으면 다음 실행에서 다시 수집)
+    # 다운로드 실패 기사가 있는 회사는 그 기사 직전까지만 이동 (다음 실행에서 다시 시도)
+    commit_watermarks(seen_by_step1, failed)
+
+    print_timings()
+    return counts
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="뉴스 수집 파이프라인")
+    parser.add_argument("--stream", action="store_true", help="단계 사이를 큐로 연결한 스트리밍 모드로 실행")
+    parser.add_argument("--resume", action="store_true", help="마지막으로 중단된 실행을 체크포인트부터 이어서 처리")
+    parser.add_argument("--shards", type=int, default=0, help="회사를 N개 샤드로 나눠서 DB 리스로 분배 (여러 노드에서 같은 값으로 실행)")
+    parser.add_argument("--workers", type=int, default=1, help="--shards 사용 시 이 노드에서 띄울 프로세스 수")
+    args = parser.parse_args()
+    if args.shards > 0:
+        from shard_runner import run_sharded
+
+        results = run_sharded(args.shards, args.workers, stream=args.stream, resume=args.resume)
+        ok = all(r["counts"] is not None and not r["counts"]["errors"] for r in results)
+    else:
+        ok = not main(stream=args.stream, resume=args.resume)["errors"]
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,68 @@
+from collections import defaultdict
+from datetime import timedelta
+
+# 회사별 감정점수 누적 버킷 (Sentiment_buckets 테이블)
+# Sentiments 를 저장할 때 같은 트랜잭션에서 (company_id, 버킷 시작 시각) 별 score 합계/건수를 갱신하고,
+# aggregate_stock_score 는 Sentiments 를 다시 스캔하지 않고 버킷만 더해서 구간 평균을 계산
+#
+# 15분/1시간/1일 구간을 모두 만들 수 있도록 버킷 크기는 15분
+
+BUCKET_MINUTES = 15
+
+# 집계 구간 이름 -> 분
+WINDOWS = {
+    "15m": 15,
+    "1h": 60,
+    "1d": 60 * 24,
+}
+
+BUCKET_UPSERT_SQL = """
+    INSERT INTO Sentiment_buckets (company_id, bucket_start, score_sum, score_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        score_sum = score_sum + VALUES(score_sum),
+        score_count = score_count + VALUES(score_count)
+"""
+
+# 기존 Sentiments 전체로 버킷을 다시 만드는 SQL (최초 적용 또는 불일치 복구용)
+BUCKET_REBUILD_SQL = f"""
+    INSERT INTO Sentiment_buckets (company_id, bucket_start, score_sum, score_count)
+    SELECT
+        n.company_id,
+        FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(s.date) / {BUCKET_MINUTES * 60}) * {BUCKET_MINUTES * 60}),
+        SUM(s.score),
+        COUNT(*)
+    FROM Sentiments s
+    JOIN News n ON s.news_id = n.id
+    GROUP BY 1, 2
+"""
+
+
+def bucket_start(dt):
+    return dt - timedelta(
+        minutes=dt.minute % BUCKET_MINUTES,
+        seconds=dt.second,
+        microseconds=dt.microsecond,
+    )
+
+
+def bucket_deltas(new_rows, old_rows):
+    """
+    new_rows: [(company_id, date, score)]  이번에 저장한 감정점수
+    old_rows: [(company_id, date, score)]  UPSERT 로 덮어쓴 기존 감정점수 (있다면)
+    반환: BUCKET_UPSERT_SQL 에 넘길 [(company_id, bucket_start, score_sum 증감, score_count 증감)]
+    """
+    deltas = defaultdict(lambda: [0.0, 0])
+    for company_id, date, score in new_rows:
+        delta = deltas[(company_id, bucket_start(date))]
+        delta[0] += float(score)
+        delta[1] += 1
+    for company_id, date, score in old_rows:
+        delta = deltas[(company_id, bucket_start(date))]
+        delta[0] -= float(score)
+        delta[1] -= 1
+    return [
+        (company_id, start, score_sum, score_count)
+        for (company_id, start), (score_sum, score_count) in deltas.items()
+        if score_count != 0 or abs(score_sum) > 1e-9
+    ]
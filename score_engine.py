@@ -0,0 +1,96 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+from score_buckets import WINDOWS
+
+load_dotenv()
+
+# 최신성 + 확신도 가중 종목 점수 엔진
+# 기사별 가중치 = 0.5 ** (경과 시간 / 반감기) * max(1 - p_neutral, 최소 확신도)
+# 종목 점수 = 구간 안 기사들의 k_index 가중 평균 (구간별로 따로 계산)
+#
+# Sentiments 행을 numpy 배열로 한 번 읽고 np.bincount 로 모든 종목/구간을 한 번에 계산
+SCORE_HALF_LIFE_HOURS = float(os.getenv("SCORE_HALF_LIFE_HOURS", "6"))
+SCORE_MIN_CONFIDENCE = float(os.getenv("SCORE_MIN_CONFIDENCE", "0.05"))  # 중립 확률이 1 이어도 완전히 버리지는 않음
+
+# score_buckets 구간 + 장기 구간 (반감기 감쇠가 있어서 긴 구간도 최근 기사 위주)
+ENGINE_WINDOWS = {
+    **WINDOWS,
+    "7d": 60 * 24 * 7,
+    "30d": 60 * 24 * 30,
+}
+
+
+def load_sentiment_arrays(cur, max_minutes):
+    """
+    DB 기준 현재 시각에서 max_minutes 이내의 감정분석 결과를 배열로 읽음
+    반환: (companies, codes, age_hours, scores, prob_neu)  codes 는 companies 의 인덱스
+    """
+    cur.execute(
+        """
+        SELECT n.company_id,
+               TIMESTAMPDIFF(SECOND, s.date, NOW()) AS age_seconds,
+               s.score,
+               s.prob_neu
+        FROM Sentiments s
+        JOIN News n ON s.news_id = n.id
+        JOIN companies c ON n.company_id = c.id
+        WHERE s.date > NOW() - INTERVAL %s MINUTE
+        """,
+        (max_minutes,),
+    )
+    rows = cur.fetchall()
+    # 종목코드 문자열 정렬(np.unique) 대신 읽으면서 바로 정수 코드로 변환
+    index = {}
+    codes = np.fromiter(
+        (index.setdefault(row["company_id"], len(index)) for row in rows), dtype=np.intp, count=len(rows)
+    )
+    age_hours = np.array([row["age_seconds"] for row in rows], dtype=np.float64) / 3600.0
+    scores = np.array([row["score"] for row in rows], dtype=np.float64)
+    prob_neu = np.array([row["prob_neu"] for row in rows], dtype=np.float64)
+    return list(index), codes, age_hours, scores, prob_neu
+
+
+def score_companies(companies, codes, age_hours, scores, prob_neu,
+                    windows=ENGINE_WINDOWS,
+                    half_life_hours=SCORE_HALF_LIFE_HOURS,
+                    min_confidence=SCORE_MIN_CONFIDENCE):
+    """
+    companies: 종목코드 목록, codes: 행별 companies 인덱스
+    age_hours: 기사 경과 시간(시간), scores: k_index, prob_neu: 중립 확률
+    반환: ({구간 이름: 종목별 점수 배열}, {구간 이름: 종목별 기사 수 배열})
+          배열 순서는 companies 와 같고, 기사가 없는 구간의 점수는 NaN
+    """
+    n = len(companies)
+
+    # 미래 시각(서버 시계 차이)은 0 으로 취급
+    age_hours = np.maximum(age_hours, 0.0)
+    weights = np.exp2(-age_hours / half_life_hours) * np.maximum(1.0 - prob_neu, min_confidence)
+    weighted_scores = weights * scores
+
+    window_scores = {}
+    window_counts = {}
+    for name, minutes in windows.items():
+        inside = age_hours < minutes / 60.0
+        weight_sum = np.bincount(codes[inside], weights=weights[inside], minlength=n)
+        score_sum = np.bincount(codes[inside], weights=weighted_scores[inside], minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            window_scores[name] = np.where(weight_sum > 0, score_sum / weight_sum, np.nan)
+        window_counts[name] = np.bincount(codes[inside], minlength=n)
+    return window_scores, window_counts
+
+
+def compute_weighted_scores(cur, windows=ENGINE_WINDOWS):
+    """
+    aggregate_stock_score 의 compute_window_scores 와 같은 형태로 반환
+    반환: {company_id: {"15m": 점수 또는 None, ...}}
+    """
+    companies, *arrays = load_sentiment_arrays(cur, max(windows.values()))
+    window_scores, _ = score_companies(companies, *arrays, windows=windows)
+    return {
+        company_id: {
+            name: None if np.isnan(values[i]) else float(values[i])
+            for name, values in window_scores.items()
+        }
+        for i, company_id in enumerate(companies)
+    }
@@ -0,0 +1,188 @@
+import argparse
+import inspect
+import os
+import sys
+import numpy as np
+from dotenv import load_dotenv
+from debug_dump import read_records
+
+# finbert 감정분석 모델의 ONNX Runtime 백엔드
+#  - export: PyTorch 모델 -> ONNX(fp32) -> int8 dynamic quantization
+#  - OnnxSentimentModel: step4 의 predict_label_scores 와 같은 입출력
+#  - parity: PyTorch 확률/k_index 와 비교해서 허용 오차 안인지 확인
+#
+# 사용법
+#   python sentiment_onnx.py export
+#   python sentiment_onnx.py parity --tolerance 1.0
+#   .env 에 SENTIMENT_BACKEND=onnx 설정하면 step4 가 이 백엔드를 사용
+
+load_dotenv()
+HF_TOKEN = os.getenv("huggingface_api_token")
+MODEL_NAME = "DataWizardd/finbert-sentiment-ko"
+ONNX_MODEL_DIR = os.getenv("SENTIMENT_ONNX_DIR", "models/finbert-sentiment-ko-onnx")
+ONNX_QUANTIZED = os.getenv("SENTIMENT_ONNX_QUANTIZED", "1") == "1"
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+MAX_LENGTH = 512
+
+SAMPLE_TEXTS = [
+    "삼성전자가 3분기 영업이익 10조원을 기록하며 시장 예상치를 크게 웃돌았다.",
+    "현대차는 미국 관세 부담으로 2분기 영업이익이 전년 대비 20% 감소했다.",
+    "LG에너지솔루션은 오는 15일 정기 주주총회를 개최한다고 밝혔다.",
+    "한화솔루션 태양광 부문이 적자 전환하며 주가가 하락했다.",
+    "두산에너빌리티가 체코 원전 주기기 공급 계약을 체결했다.",
+]
+
+
+def export_onnx(out_dir=ONNX_MODEL_DIR, quantize=True):
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, token=HF_TOKEN)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, token=HF_TOKEN)
+    model.eval()
+
+    dummy = tokenizer(SAMPLE_TEXTS[:2], padding=True, return_tensors="pt")
+    # torch.onnx.export 는 위치 인자로 넘기므로 forward 시그니처 순서에 맞춤
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    fp32_path = os.path.join(out_dir, FP32_FILE)
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    print(f"onnx: fp32 모델 저장 - {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        int8_path = os.path.join(out_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"onnx: int8 양자화 모델 저장 - {int8_path}")
+
+
+def _softmax(logits):
+    maxes = np.max(logits, axis=-1, keepdims=True)
+    shifted_exp = np.exp(logits - maxes)
+    return shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
+
+
+class OnnxSentimentModel:
+    def __init__(self, model_dir=ONNX_MODEL_DIR, quantized=ONNX_QUANTIZED, num_threads=0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer, AutoConfig
+
+        path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"onnx: 모델 파일 없음 - {path} (python sentiment_onnx.py export 먼저 실행)")
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.id2label = AutoConfig.from_pretrained(model_dir).id2label
+
+    def predict_label_scores(self, texts, batch_size=32):
+        # step4.predict_label_scores 와 같은 방식: 전체 토크나이즈 -> 길이순 정렬 -> 배치별 dynamic padding
+        if not texts:
+            return []
+
+        encodings = self.tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)
+        order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+
+        results = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            idxs = order[start:start + batch_size]
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in idxs]
+            batch = self.tokenizer.pad(features, padding=True, return_tensors="np")
+            feed = {name: batch[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(["logits"], feed)[0].astype(np.float32)
+            for i, row in zip(idxs, _softmax(logits)):
+                results[i] = {str(self.id2label[j]).upper(): float(p) for j, p in enumerate(row)}
+        return results
+
+
+def _load_parity_texts(path):
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    # 최근 step4 디버깅 덤프가 있으면 실제 요약문으로 비교
+    texts = [art.get("summary_text") for art in read_records("step4_with_sentiment")]
+    texts = [t.strip() for t in texts if t and t.strip()]
+    return texts or SAMPLE_TEXTS
+
+
+def check_parity(texts, tolerance=1.0, model_dir=ONNX_MODEL_DIR, quantized=ONNX_QUANTIZED):
+    """
+    PyTorch(step4 기본 경로)와 ONNX 의 확률 / k_index 차이 비교
+    k_index 최대 차이가 tolerance(점수, 0~100 스케일) 이하면 True
+    """
+    # 기준값은 운영 경로 그대로 쓰기 위해 step4 를 PyTorch 백엔드로 import
+    os.environ["SENTIMENT_BACKEND"] = "pytorch"
+    import step4_articles_with_sentiment as step4
+
+    reference = step4.predict_label_scores(texts)
+    candidate = OnnxSentimentModel(model_dir, quantized=quantized).predict_label_scores(texts)
+
+    max_prob_diff = 0.0
+    max_k_diff = 0.0
+    label_mismatch = 0
+    for ref, cand in zip(reference, candidate):
+        ref_label, *ref_probs, ref_k = step4._scores_to_result(ref)
+        cand_label, *cand_probs, cand_k = step4._scores_to_result(cand)
+        max_prob_diff = max(max_prob_diff, max(abs(a - b) for a, b in zip(ref_probs, cand_probs)))
+        max_k_diff = max(max_k_diff, abs(ref_k - cand_k))
+        if ref_label != cand_label:
+            label_mismatch += 1
+
+    print(f"onnx parity ({'int8' if quantized else 'fp32'}, {len(texts)}건)")
+    print(f" - 확률 최대 차이: {max_prob_diff:.6f}")
+    print(f" - k_index 최대 차이: {max_k_diff:.4f} (허용 {tolerance})")
+    print(f" - 라벨 불일치: {label_mismatch}")
+    return max_k_diff <= tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="finbert 감정분석 ONNX 백엔드")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="ONNX 변환 + int8 양자화")
+    export_parser.add_argument("--out-dir", default=ONNX_MODEL_DIR)
+    export_parser.add_argument("--no-quantize", action="store_true")
+
+    parity_parser = sub.add_parser("parity", help="PyTorch 대비 k_index 오차 확인")
+    parity_parser.add_argument("--texts", help="한 줄에 한 문장씩 있는 텍스트 파일")
+    parity_parser.add_argument("--tolerance", type=float, default=1.0)
+    parity_parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    parity_parser.add_argument("--fp32", action="store_true", help="양자화 전 모델로 비교")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.out_dir, quantize=not args.no_quantize)
+        return 0
+
+    ok = check_parity(
+        _load_parity_texts(args.texts),
+        tolerance=args.tolerance,
+        model_dir=args.model_dir,
+        quantized=not args.fp32,
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from dotenv import load_dotenv
+from config_companies import COMPANIES
+from db_config import db_connection
+
+load_dotenv()
+
+# 회사를 N개 샤드로 나눠서 여러 프로세스/노드가 나눠 처리하는 실행 모드
+#   python run_pipeline.py --shards 8 --workers 4
+# 각 워커는 샤드를 돌면서 Pipeline_leases 테이블로 리스를 잡고, 잡은 샤드만 step1~step4 전체를 실행
+# 리스 키에 실행 주기(SHARD_SLOT_MINUTES) 를 넣어서 같은 주기 안에 끝난 샤드는 다른 노드가 다시 실행하지 않음
+# 모든 노드는 같은 --shards 값으로 실행해야 함 (회사 -> 샤드 배정이 샤드 수에 따라 바뀜)
+#
+# 같은 노드의 워커들은 Naver/OpenAI 요청 한도와 감정분석 스레드를 워커 수로 나눠 씀
+SHARD_LEASE_SECONDS = int(os.getenv("SHARD_LEASE_SECONDS", "300"))
+SHARD_HEARTBEAT_SECONDS = float(os.getenv("SHARD_HEARTBEAT_SECONDS", "60"))
+SHARD_SLOT_MINUTES = int(os.getenv("SHARD_SLOT_MINUTES", "60"))
+
+LEASE_ACQUIRE_SQL = """
+    INSERT INTO Pipeline_leases (lease_key, owner, expires_at)
+    VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+    ON DUPLICATE KEY UPDATE
+        owner = IF(finished_at IS NULL AND (expires_at < NOW() OR owner = VALUES(owner)), VALUES(owner), owner),
+        expires_at = IF(owner = VALUES(owner), VALUES(expires_at), expires_at)
+"""
+# MySQL 은 SET 을 왼쪽부터 적용하므로 expires_at 의 owner 는 위에서 바뀐 값
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def shard_of(company_id, shards):
+    # 회사 목록 순서와 상관없이 항상 같은 샤드 (회사 추가/삭제 시 다른 회사는 그대로)
+    return zlib.crc32(company_id.encode("utf-8")) % shards
+
+
+def shard_companies(shard, shards):
+    return [c for c in COMPANIES if shard_of(c["company_id"], shards) == shard]
+
+
+class ShardLease:
+    def __init__(self, key, owner, seconds=SHARD_LEASE_SECONDS):
+        self.key = key
+        self.owner = owner
+        self.seconds = seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def acquire(self):
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(LEASE_ACQUIRE_SQL, (self.key, self.owner, self.seconds))
+                cur.execute("SELECT owner, finished_at FROM Pipeline_leases WHERE lease_key = %s", (self.key,))
+                row = cur.fetchone()
+            conn.commit()
+        if row["owner"] != self.owner or row["finished_at"] is not None:
+            return False
+        # 실행 중에는 주기적으로 만료 시각 연장
+        self._thread = threading.Thread(target=self._heartbeat, name=f"lease-{self.key}", daemon=True)
+        self._thread.start()
+        return True
+
+    def _heartbeat(self):
+        while not self._stop.wait(SHARD_HEARTBEAT_SECONDS):
+            try:
+                with db_connection() as conn:
+                    with conn.cursor() as cur:
+                        renewed = cur.execute(
+                            """
+                            UPDATE Pipeline_leases SET expires_at = NOW() + INTERVAL %s SECOND
+                            WHERE lease_key = %s AND owner = %s
+                            """,
+                            (self.seconds, self.key, self.owner),
+                        )
+                    conn.commit()
+                if not renewed:
+                    self.lost = True
+                    print(f"shard: 리스 {self.key} 를 잃음 (다른 워커가 가져감)")
+                    return
+            except Exception as e:
+                # 일시적인 DB 오류는 다음 주기에 다시 시도 (만료 전까지는 리스 유지)
+                print(f"shard: 리스 {self.key} 연장 실패 - {e}")
+
+    def check(self):
+        # DB 저장 / 워터마크 갱신 직전에 호출: 리스가 만료됐거나 다른 워커가 가져갔으면 LeaseLost
+        if not self.lost:
+            with db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT owner, expires_at > NOW() AS valid FROM Pipeline_leases WHERE lease_key = %s",
+                        (self.key,),
+                    )
+                    row = cur.fetchone()
+                conn.commit()
+            if row is None or row["owner"] != self.owner or not row["valid"]:
+                self.lost = True
+        if self.lost:
+            raise LeaseLost(f"리스 {self.key} 를 잃음, 샤드 중단")
+
+    def release(self, finished):
+        # 성공: finished_at 기록 (같은 주기에 다시 실행 안 함) / 실패: 바로 만료시켜서 다른 워커가 재시도
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if finished:
+            sql = "UPDATE Pipeline_leases SET finished_at = NOW() WHERE lease_key = %s AND owner = %s"
+        else:
+            sql = "UPDATE Pipeline_leases SET expires_at = NOW() WHERE lease_key = %s AND owner = %s"
+        with db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (self.key, self.owner))
+            conn.commit()
+
+
+def _current_slot():
+    with db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT NOW() AS now")
+            now = cur.fetchone()["now"]
+            # 며칠 지난 리스 정리
+            cur.execute("DELETE FROM Pipeline_leases WHERE expires_at < NOW() - INTERVAL 1 DAY")
+        conn.commit()
+    slot_minutes = (now.hour * 60 + now.minute) // SHARD_SLOT_MINUTES * SHARD_SLOT_MINUTES
+    return f"{now:%Y%m%d}-{slot_minutes:04d}"
+
+
+def _worker(worker_index, shards, stream, resume):
+    from run_pipeline import main
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    slot = _current_slot()
+    results = []
+    # 워커마다 다른 샤드부터 시작해서 리스 경쟁을 줄임
+    for offset in range(shards):
+        shard = (worker_index + offset) % shards
+        companies = shard_companies(shard, shards)
+        if not companies:
+            continue
+
+        name = f"{shard}/{shards}"
+        lease = ShardLease(f"{slot}:shard-{shard}-of-{shards}", owner)
+        if not lease.acquire():
+            continue
+
+        print(f"shard {name}: 시작 ({len(companies)}개 회사, {owner})")
+        started = time.perf_counter()
+        finished = False
+        try:
+            counts = main(stream=stream, resume=resume, companies=companies, shard=name, lease=lease)
+            finished = True
+        except Exception as e:
+            print(f"shard {name}: 실패 - {e}")
+            counts = None
+        finally:
+            lease.release(finished)
+
+        results.append({
+            "shard": name,
+            "owner": owner,
+            "companies": len(companies),
+            "seconds": time.perf_counter() - started,
+            "counts": counts,
+            "lease_lost": lease.lost,
+        })
+    return results
+
+
+def _split_limits(workers):
+    # spawn 한 워커는 모듈을 새로 import 하므로 환경변수로 워커당 한도를 넘김 (load_dotenv 는 기존 값을 덮지 않음)
+    defaults = {"STEP1_NAVER_QPS": "10", "OPENAI_RPM": "500", "OPENAI_TPM": "200000"}
+    for key, default in defaults.items():
+        os.environ[key] = str(float(os.getenv(key, default)) / workers)
+    if int(os.getenv("SENTIMENT_NUM_THREADS", "0")) <= 0:
+        os.environ["SENTIMENT_NUM_THREADS"] = str(max(1, (os.cpu_count() or 1) // workers))
+
+
+def print_shard_stats(results):
+    print("shard 실행 결과")
+    total_saved = 0
+    total_seconds = 0.0
+    for r in sorted(results, key=lambda r: int(r["shard"].split("/")[0])):
+        if r["counts"] is None:
+            print(f" - shard {r['shard']}: 실패 ({r['seconds']:.1f}s, {r['owner']})")
+            continue
+        counts = r["counts"]
+        rate = counts["saved"] / r["seconds"] if r["seconds"] > 0 else 0.0
+        lost = ", 리스 잃음" if r["lease_lost"] else ""
+        errors = f", 오류 {counts['errors']}" if counts["errors"] else ""
+        print(
+            f" - shard {r['shard']}: 회사 {r['companies']}, 수집 {counts['step1']}, 새 기사 {counts['new']}, "
+            f"저장 {counts['saved']}{errors}, {r['seconds']:.1f}s ({rate:.1f} 기사/s){lost}"
+        )
+        total_saved += counts["saved"]
+        total_seconds += r["seconds"]
+    print(f" - 이 노드 합계: 샤드 {len(results)}개, 저장 {total_saved}건, 샤드 처리 시간 합 {total_seconds:.1f}s")
+
+
+def run_sharded(shards, workers=1, stream=False, resume=False):
+    workers = max(1, workers)
+    if workers == 1:
+        results = _worker(0, shards, stream, resume)
+    else:
+        _split_limits(workers)
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(workers) as pool:
+            per_worker = pool.starmap(_worker, [(i, shards, stream, resume) for i in range(workers)])
+        results = [r for worker_results in per_worker for r in worker_results]
+    print_shard_stats(results)
+    return results
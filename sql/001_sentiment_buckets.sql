@@ -0,0 +1,11 @@
+-- 증분 Stocks_score 집계용 버킷 테이블 추가
+-- 적용 후 한 번: python aggregate_stock_score.py --rebuild-buckets
+
+CREATE TABLE IF NOT EXISTS Sentiment_buckets (
+    company_id      VARCHAR(10) NOT NULL,
+    bucket_start    DATETIME    NOT NULL,
+    score_sum       DOUBLE      NOT NULL DEFAULT 0,
+    score_count     INT         NOT NULL DEFAULT 0,
+    PRIMARY KEY (company_id, bucket_start),
+    INDEX idx_buckets_start (bucket_start)
+) DEFAULT CHARSET = utf8mb4;
@@ -0,0 +1,14 @@
+-- News.url_hash = MD5(url) 추가 (URL 존재 확인/조회를 고정 길이 unique 인덱스로)
+-- 새 코드(db_insert) 배포 전에 적용해야 함
+
+ALTER TABLE News ADD COLUMN url_hash CHAR(32) NULL;
+
+-- 기존 행 채우기 (행이 많으면 id 범위로 나눠서 실행)
+UPDATE News SET url_hash = MD5(url) WHERE url_hash IS NULL;
+
+-- 같은 URL 이 여러 행이면 unique 인덱스 생성이 실패하므로 먼저 확인하고 정리
+-- SELECT url_hash, COUNT(*) FROM News GROUP BY url_hash HAVING COUNT(*) > 1;
+
+ALTER TABLE News
+    MODIFY url_hash CHAR(32) NOT NULL,
+    ADD UNIQUE KEY uq_news_url_hash (url_hash);
@@ -0,0 +1,8 @@
+-- 샤드 실행(run_pipeline.py --shards N) 용 리스 테이블
+
+CREATE TABLE IF NOT EXISTS Pipeline_leases (
+    lease_key       VARCHAR(64)  NOT NULL PRIMARY KEY,
+    owner           VARCHAR(128) NOT NULL,
+    expires_at      DATETIME     NOT NULL,
+    finished_at     DATETIME     NULL
+) DEFAULT CHARSET = utf8mb4;
@@ -0,0 +1,66 @@
+-- 로컬 MySQL/MariaDB 컨테이너 검증용 스키마 (운영 DB 와 같은 컬럼 구성)
+--
+--   docker run -d --name crawling-news-db -p 3306:3306 \
+--       -e MYSQL_ROOT_PASSWORD=local -e MYSQL_DATABASE=news \
+--       mysql:8 --lower-case-table-names=1
+--   mysql -h 127.0.0.1 -uroot -plocal news < sql/local_schema.sql
+--
+-- .env: DB_HOST=127.0.0.1 DB_PORT=3306 DB_USER=root DB_PASSWORD=local DB_NAME=news
+
+CREATE TABLE IF NOT EXISTS companies (
+    id          VARCHAR(10)  NOT NULL PRIMARY KEY,
+    name        VARCHAR(100) NOT NULL,
+    sector      VARCHAR(50)  NULL
+) DEFAULT CHARSET = utf8mb4;
+
+CREATE TABLE IF NOT EXISTS News (
+    id              BIGINT        NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    title           VARCHAR(500)  NULL,
+    date            DATETIME      NULL,
+    full_text       MEDIUMTEXT    NULL,
+    url             VARCHAR(1000) NOT NULL,
+    summary_text    VARCHAR(300)  NULL,
+    company_id      VARCHAR(10)   NULL,
+    url_hash        CHAR(32)      NOT NULL,
+    UNIQUE KEY uq_news_url_hash (url_hash),
+    INDEX idx_news_url (url(255)),
+    INDEX idx_news_company_date (company_id, date)
+) DEFAULT CHARSET = utf8mb4;
+
+CREATE TABLE IF NOT EXISTS Sentiments (
+    id          BIGINT      NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    label       VARCHAR(16) NOT NULL,
+    prob_pos    DOUBLE      NOT NULL,
+    prob_neg    DOUBLE      NOT NULL,
+    prob_neu    DOUBLE      NOT NULL,
+    score       DOUBLE      NOT NULL,
+    date        DATETIME    NOT NULL,
+    news_id     BIGINT      NOT NULL,
+    UNIQUE KEY uq_sentiments_news (news_id),
+    INDEX idx_sentiments_date (date)
+) DEFAULT CHARSET = utf8mb4;
+
+CREATE TABLE IF NOT EXISTS Stocks_score (
+    company_id  VARCHAR(10) NOT NULL,
+    score       DOUBLE      NOT NULL,
+    date        DATETIME    NOT NULL,
+    PRIMARY KEY (company_id, date)
+) DEFAULT CHARSET = utf8mb4;
+
+-- 회사별 15분 단위 감정점수 합계/건수 (db_insert 가 Sentiments 저장 시 같이 갱신)
+CREATE TABLE IF NOT EXISTS Sentiment_buckets (
+    company_id      VARCHAR(10) NOT NULL,
+    bucket_start    DATETIME    NOT NULL,
+    score_sum       DOUBLE      NOT NULL DEFAULT 0,
+    score_count     INT         NOT NULL DEFAULT 0,
+    PRIMARY KEY (company_id, bucket_start),
+    INDEX idx_buckets_start (bucket_start)
+) DEFAULT CHARSET = utf8mb4;
+
+-- 샤드 실행 리스 (shard_runner, 키 = 실행 주기 + 샤드)
+CREATE TABLE IF NOT EXISTS Pipeline_leases (
+    lease_key       VARCHAR(64)  NOT NULL PRIMARY KEY,
+    owner           VARCHAR(128) NOT NULL,
+    expires_at      DATETIME     NOT NULL,
+    finished_at     DATETIME     NULL
+) DEFAULT CHARSET = utf8mb4;
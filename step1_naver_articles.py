@@ -1,10 +1,16 @@
 import os
 from dotenv import load_dotenv
 from config_companies import COMPANIES
+from rate_limit import TokenBucket, backoff_delay
+import metrics
+from crawl_watermark import is_known
+from debug_dump import dump_records
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 import requests
 from datetime import datetime
-import json
+import time
 
 ### Naver News Search API Response Fields ###
 #rss/channel/lastBuildDate	    dateTime	검색 결과를 생성한 시간
@@ -29,6 +35,24 @@ import json
 #SE99	500	System Error (시스템 에러)	서버 내부에 오류가 발생했습니다."   개발자 포럼"에 오류를 신고해 주십시오.
 
 
+load_dotenv()
+
+# Naver 검색 API 호출 설정 (.env 로 조정 가능)
+NAVER_NEWS_API_URL = os.getenv("NAVER_NEWS_API_URL", "https://openapi.naver.com/v1/search/news.json")
+DISPLAY = int(os.getenv("STEP1_DISPLAY", "20"))              # 페이지당 기사 수 (1~100)
+MAX_PAGES = int(os.getenv("STEP1_MAX_PAGES", "1"))           # 회사별 최대 페이지 수 (start 1~1000)
+NAVER_QPS = float(os.getenv("STEP1_NAVER_QPS", "10"))        # 초당 호출 한도
+FETCH_WORKERS = int(os.getenv("STEP1_FETCH_WORKERS", "8"))   # 동시에 검색할 회사 수
+FETCH_RETRIES = int(os.getenv("STEP1_FETCH_RETRIES", "3"))   # SE99/429 재시도 횟수
+FETCH_TIMEOUT = float(os.getenv("STEP1_FETCH_TIMEOUT", "10"))
+
+MAX_START = 1000
+RETRY_STATUS_CODES = {429, 500}
+RETRY_ERROR_CODES = {"SE99"}
+
+naver_rate_limiter = TokenBucket(NAVER_QPS)
+
+
 def get_env_variables():
     load_dotenv()
     return os.getenv("client_id"), os.getenv("client_secret")
@@ -39,23 +63,98 @@ def build_headers(client_id, client_secret):
         "X-Naver-Client-Secret": client_secret,
     }
 
-def fetch_news(query, headers, display=20):
-    url = "https://openapi.naver.com/v1/search/news.json"
-    params = {"query": query, "display": display, "sort": "date"}
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
+def build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _error_of(response):
+    try:
         err = response.json()
-        print(f"step1: ({err.get('errorCode')}) {err.get('errorMessage')} ")
-        return []
-    return response.json().get("items", [])
+    except ValueError:
+        return None, response.text[:200]
+    return err.get("errorCode"), err.get("errorMessage")
+
+def fetch_news(query, headers, display=20, start=1, session=None):
+    """
+    검색 결과 한 페이지 조회
+    반환: (items, total)  실패하면 ([], 0)
+    """
+    http = session or requests
+    params = {"query": query, "display": display, "start": start, "sort": "date"}
+
+    for attempt in range(FETCH_RETRIES + 1):
+        naver_rate_limiter.acquire()
+        try:
+            with metrics.timer("naver_request_seconds"):
+                response = http.get(NAVER_NEWS_API_URL, headers=headers, params=params, timeout=FETCH_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.error("step1", e)
+            if attempt < FETCH_RETRIES:
+                time.sleep(backoff_delay(attempt))
+                continue
+            print(f"step1: ({query}) 네트워크 오류 {e}")
+            return [], 0
+
+        if response.status_code == 200:
+            body = response.json()
+            return body.get("items", []), body.get("total", 0)
+
+        code, message = _error_of(response)
+        metrics.error("step1", f"http_{response.status_code}")
+        retryable = response.status_code in RETRY_STATUS_CODES or code in RETRY_ERROR_CODES
+        if retryable and attempt < FETCH_RETRIES:
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        print(f"step1: ({code}) {message} ")
+        return [], 0
+
+    return [], 0
+
+def to_db_time(raw_time):
+    dt = datetime.strptime(raw_time, "%a, %d %b %Y %H:%M:%S %z") if raw_time else None
+    return dt.strftime("%Y-%m-%d %H:%M:%S") if dt else None
+
+def fetch_news_pages(query, headers, session=None, display=DISPLAY, max_pages=MAX_PAGES, watermark=None):
+    """
+    start 를 display 만큼 늘려가며 max_pages 까지 페이징
+    결과는 최신순이므로 워터마크(이미 수집한 기사)에 닿으면 그 뒤는 버리고 페이징 중단
+    반환: (새 기사 items, 워터마크로 건너뛴 기사 수)
+    """
+    items = []
+    cnt_known = 0
+    start = 1
+    for _ in range(max_pages):
+        if start > MAX_START:
+            break
+        page, total = fetch_news(query, headers, display=display, start=start, session=session)
+        for idx, item in enumerate(page):
+            pub_date = to_db_time(item.get("pubDate"))
+            if is_known(watermark, pub_date, item.get("originallink")):
+                # 워터마크보다 과거면 이후 기사도 모두 수집된 것
+                if pub_date < watermark["pubDate"]:
+                    cnt_known += len(page) - idx
+                    return items, cnt_known
+                cnt_known += 1
+                continue
+            items.append(item)
+        if len(page) < display or start + display > total:
+            break
+        start += display
+    return items, cnt_known
 
 def clean_html_tags(text):
     if not text:
         return ""
     return BeautifulSoup(text, "html.parser").get_text()
 
-def step1_naver_articles():
-    
+def step1_naver_articles(watermarks=None, companies=None):
+    # companies: 수집할 회사 목록 (기본: 전체 COMPANIES, 샤드 실행 시 해당 샤드의 회사만)
+    companies = COMPANIES if companies is None else companies
+
     internal_id = 1
     client_id, client_secret = get_env_variables()
     
@@ -65,12 +164,27 @@ def step1_naver_articles():
     headers = build_headers(client_id, client_secret)
     
     results = []
-    
-    for company in COMPANIES:
-        for item in fetch_news(company["query"], headers):
-            raw_time = item.get("pubDate") or ""
-            dt = datetime.strptime(raw_time, "%a, %d %b %Y %H:%M:%S %z") if raw_time else None
-            db_time = dt.strftime("%Y-%m-%d %H:%M:%S") if dt else None
+
+    watermarks = watermarks or {}
+
+    # 회사별 검색을 keep-alive 세션 하나로 동시에 실행 (결과 순서는 COMPANIES 순서 유지)
+    session = build_session()
+    workers = max(1, min(FETCH_WORKERS, len(companies)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pages_by_company = list(pool.map(
+            lambda company: fetch_news_pages(
+                company["query"], headers, session=session,
+                watermark=watermarks.get(company["company_id"]),
+            ),
+            companies,
+        ))
+    session.close()
+
+    cnt_known = sum(known for _, known in pages_by_company)
+
+    for company, (items, _) in zip(companies, pages_by_company):
+        for item in items:
+            db_time = to_db_time(item.get("pubDate"))
             results.append({
                 "id": internal_id,
                 "company_id": company["company_id"],
@@ -78,14 +192,17 @@ def step1_naver_articles():
                 "company_name": company["company_name"],
                 "title": clean_html_tags(item["title"]),
                 "originallink": item["originallink"],
+                # 네이버에 제공된 기사면 n.news.naver.com 주소 (step2 가 우선 사용), 아니면 originallink 와 같음
+                "link": item.get("link"),
                 "pubDate": db_time,
             })
             internal_id += 1
     
-    print(f"step1 완료: 총 수집 기사 수 = {len(results)}건")
+    print(f"step1 완료: 총 수집 기사 수 = {len(results)}건 (워터마크로 건너뛴 기사 {cnt_known}건)")
+    metrics.inc("articles_total", len(results), stage="step1", status="collected")
+    metrics.inc("articles_total", cnt_known, stage="step1", status="watermark_known")
     
-    #json 확인용
-    with open("step1_naver_articles.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    #디버깅 덤프 (DEBUG_DUMP 설정 시)
+    dump_records("step1_naver_articles", results)
         
-    return results
+    return results
\ No newline at end of file
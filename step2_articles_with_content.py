@@ -1,74 +1,314 @@
-from newspaper import Article
-from newspaper.article import ArticleException
+from newspaper import Config
 from config_companies import FULL_PIPELINE_COMPANY_NAMES
+from debug_dump import dump_records
+from extractors import extract_article
+from http_cache import get_http_cache
+import metrics
 from collections import Counter
-import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+import os
+import time
+import random
+import threading
+import requests
 
 ######################################################
-# 본문 추출 후에 15개는 db저장, 5개는 요약하러 보내기? # 
+# 본문 추출 후에 15개는 db저장, 5개는 요약하러 보내기? #
 ######################################################
 
+load_dotenv()
 
-def step2_articles_with_content(result_by_step1):
-    
-    url_seen_count = {}
-    result_with_content = []
+# 다운로드/파싱 동시성 설정 (.env 로 조정 가능)
+FETCH_WORKERS = int(os.getenv("STEP2_FETCH_WORKERS", "32"))       # 전체 동시 다운로드 수
+PER_HOST_LIMIT = int(os.getenv("STEP2_PER_HOST_LIMIT", "4"))      # 언론사(호스트)별 동시 연결 수
+FETCH_TIMEOUT = float(os.getenv("STEP2_FETCH_TIMEOUT", "10"))     # 요청당 타임아웃(초)
+FETCH_RETRIES = int(os.getenv("STEP2_FETCH_RETRIES", "2"))        # 실패 시 재시도 횟수
+FETCH_BACKOFF = float(os.getenv("STEP2_FETCH_BACKOFF", "0.5"))    # 재시도 대기 기본값(초), 지수 증가
+PARSE_WORKERS = int(os.getenv("STEP2_PARSE_WORKERS", str(os.cpu_count() or 1)))
+# 네이버에 제공된 기사는 언론사 원문 대신 n.news.naver.com 사본을 먼저 받음 (마크업이 같고 응답이 빠르고 안정적)
+# DB 저장/중복 판단 기준은 계속 originallink, 사본 다운로드가 실패하면 원문으로 다시 시도
+PREFER_NAVER_LINK = os.getenv("STEP2_PREFER_NAVER_LINK", "1") == "1"
+NAVER_HOST_LIMIT = int(os.getenv("STEP2_NAVER_HOST_LIMIT", "16"))  # 네이버 뉴스 호스트 동시 연결 수
 
-    # 디버깅용 카운터
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+FAIL_ENCODING = "ISO-8859-1"
+
+# newspaper 가 직접 다운로드할 때와 같은 User-Agent 사용
+_newspaper_config = Config()
+FETCH_HEADERS = {"User-Agent": _newspaper_config.browser_user_agent}
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def _host_slot(url, limit=PER_HOST_LIMIT):
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(limit)
+            _host_slots[host] = slot
+    return slot
+
+
+def build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=FETCH_WORKERS, pool_maxsize=max(PER_HOST_LIMIT, NAVER_HOST_LIMIT))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _decode_html(response):
+    # newspaper network.get_html_2XX_only 와 같은 방식으로 인코딩 처리
+    # charset 이 없으면 bytes 로 넘겨서 newspaper 가 meta charset 으로 디코딩하게 함
+    if response.encoding != FAIL_ENCODING:
+        return response.text
+    return response.content
+
+
+def _decode_cached(page):
+    # _decode_html 과 같은 결과 (저장할 때 response.text 가 쓴 인코딩을 같이 저장)
+    if page.encoding != FAIL_ENCODING:
+        return page.body.decode(page.encoding, errors="replace")
+    return page.body
+
+
+def _cache_response(cache, url, response):
+    encoding = response.encoding or response.apparent_encoding or "utf-8"
+    cache.put(
+        url, response.content, encoding,
+        etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+def fetch_html(session, url, source="original"):
+    """
+    언론사 HTML 다운로드 (호스트별 동시 연결 제한 + 타임아웃 + 지수 백오프 재시도)
+    source: original(언론사 원문) / naver(네이버 뉴스 사본) - 동시 연결 수와 메트릭 라벨에 사용
+    HTTP 캐시(http_cache.py)가 켜져 있으면 크롤 주기 안에서는 같은 URL 을 다시 받지 않음
+    실패하면 None 반환
+    """
+    cache = get_http_cache()
+    if cache is None:
+        return _fetch_html(session, url, source, None, None)
+    with cache.url_lock(url):
+        cached = cache.get(url)
+        if cached is not None and cached.fresh:
+            metrics.inc("http_cache_total", result="hit")
+            return _decode_cached(cached)
+        return _fetch_html(session, url, source, cache, cached)
+
+
+def _fetch_html(session, url, source, cache, cached):
+    limit = NAVER_HOST_LIMIT if source == "naver" else PER_HOST_LIMIT
+    headers = FETCH_HEADERS if cached is None else {**FETCH_HEADERS, **cache.validators(cached)}
+    for attempt in range(FETCH_RETRIES + 1):
+        retryable = False
+        try:
+            with _host_slot(url, limit), metrics.timer("article_fetch_seconds", source=source):
+                response = session.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+            if response.status_code == 304 and cached is not None:
+                cache.touch(url)
+                metrics.inc("http_cache_total", result="revalidated")
+                return _decode_cached(cached)
+            if response.status_code in RETRY_STATUS_CODES:
+                metrics.error("step2", f"http_{response.status_code}")
+                retryable = True
+            elif 200 <= response.status_code < 300:
+                if cache is not None:
+                    _cache_response(cache, url, response)
+                    metrics.inc("http_cache_total", result="miss")
+                return _decode_html(response)
+            else:
+                metrics.error("step2", f"http_{response.status_code}")
+                print(f"step2: HTTP {response.status_code} - {url}")
+                return None
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.error("step2", e)
+            retryable = True
+        except requests.RequestException as e:
+            metrics.error("step2", e)
+            print(f"step2: 다운로드 오류 - {url}: {e}")
+            return None
+
+        if retryable and attempt < FETCH_RETRIES:
+            time.sleep(FETCH_BACKOFF * (2 ** attempt) + random.uniform(0, FETCH_BACKOFF))
+
+    return None
+
+
+def naver_link(item):
+    # Naver API 의 link 는 네이버에 제공되지 않은 기사면 originallink 와 같음
+    link = item.get("link")
+    if PREFER_NAVER_LINK and link and link != item.get("originallink"):
+        return link
+    return None
+
+
+def fetch_article_html(session, item):
+    """
+    네이버 사본이 있으면 먼저 받고, 없거나 실패하면 언론사 원문
+    반환: (html 또는 None, html 을 받은 URL, 출처)  - 출처는 naver / original / original_fallback
+    """
+    link = naver_link(item)
+    if link:
+        html = fetch_html(session, link, source="naver")
+        if html is not None:
+            return html, link, "naver"
+    url = item["originallink"]
+    return fetch_html(session, url), url, "original_fallback" if link else "original"
+
+
+def _extract_timed(url, html):
+    # 프로세스 풀에서 실행되므로 모듈 최상위 함수로 유지
+    # 등록된 언론사는 XPath 로 바로 추출, 나머지는 newspaper (extractors.py)
+    # 파싱은 다른 프로세스에서 실행되므로 걸린 시간과 추출 경로를 같이 돌려받아서 메트릭에 기록
+    started = time.perf_counter()
+    text, path = extract_article(url, html)
+    return text, path, time.perf_counter() - started
+
+
+def _record_parse(path, seconds):
+    metrics.observe("article_parse_seconds", seconds, path=path)
+    metrics.inc("extract_path_total", path=path)
+
+
+def _dedup_step1_items(result_by_step1):
+    url_seen_count = {}
+    candidates = []
     cnt_no_url = 0
     cnt_dup_url = 0
-    cnt_download_fail = 0
-    cnt_empty_text = 0
-
 
     for item in result_by_step1:
         url = item.get("originallink")
-        title = item.get("title")
-        pub_date = item.get("pubDate")
-        company_id = item.get("company_id")
-        company_name = item.get("company_name")
-    
+
         if not url:
             cnt_no_url += 1
             continue
 
         url_seen_count[url] = url_seen_count.get(url, 0) + 1
-        
+
         if url_seen_count[url] > 1:
             cnt_dup_url += 1
             continue
-        
-        # 본문 추출
-        article = Article(url, language="ko")
-        try:
-            article.download()
-            article.parse()
-        except ArticleException:
+
+        candidates.append(item)
+
+    return candidates, cnt_no_url, cnt_dup_url
+
+
+def _build_article(item, full_text):
+    return {
+        "id": item.get("id"),
+        "company_id": item.get("company_id"),
+        "company_name": item.get("company_name"),
+        "sector": item.get("sector"),
+        "title": item.get("title"),
+        "url": item.get("originallink"),
+        "date": item.get("pubDate"),
+        "full_text": full_text,
+    }
+
+
+def _download_and_parse(candidates):
+    """
+    다운로드는 스레드 풀, 파싱은 프로세스 풀에서 처리
+    다운로드가 끝나는 순서대로 바로 파싱에 넘겨서 네트워크 대기와 CPU 작업을 겹침
+    반환: candidates 와 같은 순서의 (상태, 본문) 리스트
+    """
+    outcomes = [("download_fail", None)] * len(candidates)
+    if not candidates:
+        return outcomes
+
+    session = build_session()
+    fetch_workers = max(1, min(FETCH_WORKERS, len(candidates)))
+    parse_workers = max(1, min(PARSE_WORKERS, len(candidates)))
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        fetch_futures = {
+            fetch_pool.submit(fetch_article_html, session, item): idx
+            for idx, item in enumerate(candidates)
+        }
+
+        parse_futures = {}
+        paths = Counter()
+        sources = Counter()
+        for fut in as_completed(fetch_futures):
+            idx = fetch_futures[fut]
+            html, url, source = fut.result()
+            if html is None:
+                continue
+            sources[source] += 1
+            metrics.inc("article_source_total", source=source)
+            # 추출기는 실제로 받은 페이지 URL 기준으로 고름 (네이버 사본은 전용 추출기)
+            parse_futures[parse_pool.submit(_extract_timed, url, html)] = idx
+
+        for fut in as_completed(parse_futures):
+            idx = parse_futures[fut]
+            try:
+                raw_text, path, parse_seconds = fut.result()
+                _record_parse(path, parse_seconds)
+                paths[path] += 1
+            except Exception as e:
+                metrics.error("step2", e)
+                print(f"step2: 파싱 작업 오류 - {candidates[idx]['originallink']}: {e}")
+                raw_text = None
+
+            if raw_text is None:
+                outcomes[idx] = ("download_fail", None)
+            elif not raw_text.strip():
+                outcomes[idx] = ("empty_text", None)
+            else:
+                outcomes[idx] = ("ok", raw_text.strip())
+
+    session.close()
+    if sources:
+        print("step2: 본문 출처 - " + ", ".join(f"{k} {v}" for k, v in sorted(sources.items())))
+    if paths:
+        print("step2: 본문 추출 경로 - " + ", ".join(f"{k} {v}" for k, v in sorted(paths.items())))
+    return outcomes
+
+
+def step2_articles_with_content(result_by_step1, failed=None):
+    """
+    failed: 리스트를 넘기면 다운로드/추출에 실패한 step1 항목을 추가 (워터마크가 넘어가지 않도록)
+    """
+
+    result_with_content = []
+
+    # 디버깅용 카운터
+    cnt_download_fail = 0
+    cnt_empty_text = 0
+
+    candidates, cnt_no_url, cnt_dup_url = _dedup_step1_items(result_by_step1)
+
+    # 본문 추출
+    started = time.perf_counter()
+    outcomes = _download_and_parse(candidates)
+    elapsed = time.perf_counter() - started
+
+    for item, (status, full_text) in zip(candidates, outcomes):
+        url = item.get("originallink")
+
+        if status == "download_fail":
             print(f"step2: id({item.get('id')}) newspaper 본문 추출 실패 - {url}")
             cnt_download_fail += 1
+            if failed is not None:
+                failed.append(item)
             continue
-        
-        raw_text = article.text 
-        if not raw_text or not raw_text.strip():
+
+        if status == "empty_text":
             print(f"step2: id({item.get('id')}) 본문 공백만 존재 - {url}")
             cnt_empty_text += 1
             continue
 
-        full_text = raw_text.strip()
-
-        result_with_content.append(
-            {
-                "id": item.get("id"),              
-                "company_id": company_id,
-                "company_name": company_name,
-                "sector": item.get("sector"),
-                "title": title,
-                "url": url,
-                "date": pub_date,
-                "full_text": full_text,
-            }
-        )
-    
+        result_with_content.append(_build_article(item, full_text))
+
     #디버깅용
     print("step2 필터링 결과")
     print(f" - URL 없음 제거: {cnt_no_url}")
@@ -77,30 +317,40 @@ def step2_articles_with_content(result_by_step1):
     print(f" - 본문 비어 있음 제거: {cnt_empty_text}")
     print(f" - 총 제거된 기사 수: {cnt_no_url + cnt_dup_url + cnt_download_fail + cnt_empty_text}")
     print(f" - 제거 후 본문 추출 성공 기사 수: {len(result_with_content)}")
-    
-    full_pipeline_articles = [] 
-    db_only_articles = []       
+    print(f" - 다운로드+파싱 소요 시간: {elapsed:.2f}s ({len(candidates)}건)")
+    cache = get_http_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f" - HTTP 캐시: hit {stats['hits']} / 304 {stats['revalidated']} / miss {stats['misses']}"
+            f" (hit rate {stats['hit_rate']:.0%})"
+        )
+    metrics.inc("articles_total", cnt_no_url + cnt_dup_url, stage="step2", status="no_or_dup_url")
+    metrics.inc("articles_total", cnt_download_fail, stage="step2", status="download_fail")
+    metrics.inc("articles_total", cnt_empty_text, stage="step2", status="empty_text")
+    metrics.inc("articles_total", len(result_with_content), stage="step2", status="ok")
+
+    full_pipeline_articles = []
+    db_only_articles = []
 
     for art in result_with_content:
         if art["company_name"] in FULL_PIPELINE_COMPANY_NAMES:
             full_pipeline_articles.append(art)
         else:
             db_only_articles.append(art)
-            
-            
+
+
     print("step2 완료: 본문 추출 완료")
     print(f" - 핵심 종목 (FULL_PIPELINE): {len(full_pipeline_articles)}")
     print(f" - 나머지 종목 (DB_ONLY): {len(db_only_articles)}")
-    
-    ### json 확인용 ###
 
-    # 핵심 종목 json 확인
-    with open("step2_full_pipeline.json", "w", encoding="utf-8") as f:
-        json.dump(full_pipeline_articles, f, ensure_ascii=False, indent=4)
+    ### 디버깅 덤프 (DEBUG_DUMP 설정 시) ###
+
+    # 핵심 종목
+    dump_records("step2_full_pipeline", full_pipeline_articles)
 
-    # 나머지 종목 json 확인
-    with open("step2_db_only.json", "w", encoding="utf-8") as f:
-        json.dump(db_only_articles, f, ensure_ascii=False, indent=4)
+    # 나머지 종목
+    dump_records("step2_db_only", db_only_articles)
 
     return full_pipeline_articles, db_only_articles
 
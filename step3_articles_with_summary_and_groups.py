@@ -1,14 +1,70 @@
 import os
-import json
-from openai import OpenAI
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
 from dotenv import load_dotenv
+from rate_limit import TokenBucket, backoff_delay
+from llm_cache import LLMCache, LLM_CACHE_ENABLED, make_key
+from near_dup import NEAR_DUP_ENABLED, cluster_articles
+from relevance_filter import RELEVANCE_REJECT_BELOW, prefilter
+from prompt_budget import STEP3_INPUT_TOKENS, estimate_tokens, trim_to_budget
+from debug_dump import dump_records
+from config_companies import COMPANIES
+import metrics
 
 load_dotenv()
 MODEL_NAME = "gpt-4o-mini"  
+MAX_TOKENS = 256
 
-client = OpenAI(
-    api_key=os.environ.get("gpt_key")  
-)
+# 동시 요약 / 호출 한도 설정 (.env 로 조정 가능)
+SUMMARY_WORKERS = int(os.getenv("STEP3_WORKERS", "8"))
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "500"))          # 분당 요청 수
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "200000"))       # 분당 토큰 수
+SUMMARY_RETRIES = int(os.getenv("STEP3_RETRIES", "4"))      # 429/5xx 재시도 횟수
+# 1 보다 크면 기사 N건을 한 요청으로 묶어서 기사별 [RELATED]/[NOT_RELATED] 를 받음 (스트리밍 모드는 항상 1건씩)
+SUMMARY_BATCH_SIZE = int(os.getenv("STEP3_BATCH_SIZE", "1"))
+
+_query_of = {c["company_name"]: c.get("query") for c in COMPANIES}
+
+request_limiter = TokenBucket(OPENAI_RPM / 60.0)
+token_limiter = TokenBucket(OPENAI_TPM / 60.0, capacity=OPENAI_TPM)   # TPM 은 1분 단위 한도
+
+
+_init_lock = threading.Lock()
+
+
+def _init_once(fn):
+    # 여러 스레드가 동시에 처음 호출해도 한 번만 생성되도록 lock 을 잡고 lru_cache 조회
+    cached = lru_cache(maxsize=1)(fn)
+
+    @wraps(fn)
+    def wrapper():
+        with _init_lock:
+            return cached()
+    return wrapper
+
+
+@_init_once
+def get_client():
+    # 처음 요약할 때 한 번만 생성 (새 기사가 없는 실행에서는 openai import 비용도 없음)
+    started = time.perf_counter()
+    from openai import OpenAI
+
+    # 재시도는 _create_completion 에서 직접 처리 (rate limiter 와 함께 동작하도록)
+    # gpt_base_url 을 지정하면 로컬 mock 서버 등 OpenAI 호환 서버로 요청
+    client = OpenAI(
+        api_key=os.environ.get("gpt_key"),
+        base_url=os.environ.get("gpt_base_url") or None,
+        max_retries=0,
+    )
+    print(f"step3: OpenAI 클라이언트 생성 {time.perf_counter() - started:.2f}s")
+    return client
+
+@_init_once
+def get_llm_cache():
+    return LLMCache() if LLM_CACHE_ENABLED else None
 
 SYSTEM_PROMPT = """
 너의 역할은 한국어 뉴스 기사를 분석해서,
@@ -36,51 +92,242 @@ SYSTEM_PROMPT = """
 - 바로 내용 문장으로 시작한다.
                 """
 
-def summarize_article(company_name, full_text):
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+[여러 기사 입력]
+- 사용자 메시지에 [기사 1], [기사 2] ... 처럼 여러 기사가 올 수 있다.
+- 기사마다 [회사]가 다를 수 있으며, 각 기사는 서로 독립적으로 위 규칙대로 판단한다.
+- 기사 번호 순서대로 기사마다 정확히 한 줄씩, 아래 형식으로만 출력한다:
+  1. [RELATED] 실제 요약 내용...
+  2. [NOT_RELATED]
+                """
+
+_batch_line = re.compile(r"^\s*(?:\[기사\s*)?(\d+)\s*[.):\]]\s*(\[(?:NOT_)?RELATED\].*)$")
+
+def _is_retryable(e):
+    import openai
+
+    if isinstance(e, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code >= 500
+
+def _retry_after(e):
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def _create_completion(messages, max_tokens=MAX_TOKENS):
+    """
+    RPM/TPM 한도 안에서 chat completion 호출, 429/5xx/연결 오류는 jitter 백오프로 재시도
+    """
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
 
-    user_content = f"""
+    for attempt in range(SUMMARY_RETRIES + 1):
+        request_limiter.acquire()
+        token_limiter.acquire(prompt_tokens + max_tokens)
+        try:
+            with metrics.timer("openai_request_seconds"):
+                resp = get_client().chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=max_tokens,
+                )
+            usage = getattr(resp, "usage", None)
+            if usage is not None:
+                metrics.inc("openai_tokens_total", usage.prompt_tokens or 0, kind="prompt")
+                metrics.inc("openai_tokens_total", usage.completion_tokens or 0, kind="completion")
+            return resp
+        except Exception as e:
+            metrics.error("step3", e)
+            if attempt >= SUMMARY_RETRIES or not _is_retryable(e):
+                raise
+            delay = _retry_after(e) or backoff_delay(attempt, base=1.0)
+            print(f"step3: GPT 호출 재시도 {attempt + 1}/{SUMMARY_RETRIES} ({delay:.1f}s 후) - {e}")
+            time.sleep(delay)
+
+def parse_verdict(content):
+    content = content.strip()
+    if content.startswith("[NOT_RELATED]"):
+        return "", False
+    if content.startswith("[RELATED]"):
+        summary = content[len("[RELATED]"):].strip()
+        return summary, True
+
+    return content, True
+
+def parse_batch_verdicts(content, count):
+    """
+    반환: {기사 번호(1부터): (summary, is_related)}  - 형식이 맞지 않는 줄은 빠짐
+    """
+    verdicts = {}
+    for line in content.splitlines():
+        match = _batch_line.match(line)
+        if match and 1 <= int(match.group(1)) <= count:
+            verdicts.setdefault(int(match.group(1)), parse_verdict(match.group(2)))
+    return verdicts
+
+def _user_content(company_name, text):
+    return f"""
                         [회사]
                         {company_name}
 
                         [본문]
-                        {full_text}
+                        {text}
                     """
 
+def _prepare(company_name, full_text, budget):
+    # 캐시 키는 실제로 보내는 (줄인) 본문 기준
+    text = trim_to_budget(company_name, full_text or "", budget, query=_query_of.get(company_name))
+    return text, make_key(company_name, text, SYSTEM_PROMPT, MODEL_NAME)
+
+def _cached_verdict(cache, cache_key):
+    if cache is None:
+        return None
+    cached = cache.get(cache_key)
+    metrics.inc("llm_cache_total", result="miss" if cached is None else "hit")
+    return cached
+
+def _summarize_one(company_name, text, cache, cache_key):
+    # 재시도 후에도 GPT 호출이 실패하면 None ([NOT_RELATED] 와 구분해서 다음 실행에서 다시 처리)
     try:
-        resp = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_content},
-            ],
-            temperature=0.2,
-            max_tokens=256,
-        )
-        content = resp.choices[0].message.content.strip()
-        if content.startswith("[NOT_RELATED]"):
-            return "", False
-        if content.startswith("[RELATED]"):
-            summary = content[len("[RELATED]"):].strip()
-            return summary, True
-        
-        return content, True
+        resp = _create_completion([
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _user_content(company_name, text)},
+        ])
+        summary, is_related = parse_verdict(resp.choices[0].message.content)
+        # 오류 응답은 캐시하지 않음 (다음 실행에서 다시 시도)
+        if cache is not None:
+            cache.put(cache_key, summary, is_related)
+        return summary, is_related
     
     except Exception as e:
         print(f"step3: GPT 요약 중 오류 발생: {e}")
-        return "", False
+        return None
 
-def step3_articles_with_summary_and_groups(result_by_step2):
+def summarize_article(company_name, full_text, budget=STEP3_INPUT_TOKENS):
+    """
+    반환: (summary, is_related), GPT 오류면 None
+    """
+    cache = get_llm_cache()
+    text, cache_key = _prepare(company_name, full_text, budget)
+    cached = _cached_verdict(cache, cache_key)
+    if cached is not None:
+        return cached
+
+    return _summarize_one(company_name, text, cache, cache_key)
+
+def summarize_batch(articles, budget=STEP3_INPUT_TOKENS):
+    """
+    articles: [(company_name, full_text), ...]  -> 같은 순서의 [(summary, is_related), ...]  (GPT 오류는 None)
+    캐시에 없는 기사만 한 요청으로 묶고, 응답에서 빠졌거나 형식이 틀린 기사는 한 건씩 다시 요청
+    묶음 응답은 BATCH_SYSTEM_PROMPT 기준 키로 캐시 (1건씩 요청한 판정과 섞이지 않도록)
+    """
+    cache = get_llm_cache()
+    prepared = [_prepare(company_name, full_text, budget) for company_name, full_text in articles]
+    batch_keys = [
+        make_key(company_name, text, BATCH_SYSTEM_PROMPT, MODEL_NAME)
+        for (company_name, _), (text, _) in zip(articles, prepared)
+    ]
+    results = [_cached_verdict(cache, batch_key) for batch_key in batch_keys]
+    pending = [i for i, verdict in enumerate(results) if verdict is None]
+
+    verdicts = {}
+    if len(pending) > 1:
+        blocks = [
+            f"[기사 {n}]" + _user_content(articles[i][0], prepared[i][0])
+            for n, i in enumerate(pending, 1)
+        ]
+        try:
+            resp = _create_completion(
+                [
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": "\n".join(blocks)},
+                ],
+                max_tokens=MAX_TOKENS * len(pending),
+            )
+            verdicts = parse_batch_verdicts(resp.choices[0].message.content, len(pending))
+        except Exception as e:
+            print(f"step3: GPT 묶음 요청 오류, 한 건씩 다시 요청 - {e}")
+        metrics.inc("llm_batch_articles_total", len(verdicts), result="parsed")
+        metrics.inc("llm_batch_articles_total", len(pending) - len(verdicts), result="fallback")
+
+    for n, i in enumerate(pending, 1):
+        company_name = articles[i][0]
+        text, cache_key = prepared[i]
+        if n in verdicts:
+            results[i] = verdicts[n]
+            if cache is not None:
+                cache.put(batch_keys[i], *verdicts[n])
+        else:
+            results[i] = _summarize_one(company_name, text, cache, cache_key)
+    return results
+
+def step3_articles_with_summary_and_groups(result_by_step2, failed=None):
+    """
+    failed: 리스트를 넘기면 GPT 오류로 판정하지 못한 기사를 추가 (관련 없음으로 처리하지 않음)
+    """
     
     result_with_summary = []
     not_related_articles = []
+    error_articles = []
 
-    for art in result_by_step2:
-        full_text = art.get("full_text")
-        company_name  = art.get("company_name")
-        summary, is_related = summarize_article(company_name, full_text)
+    # 재배포 기사(거의 같은 본문)는 묶어서 대표 기사만 GPT 에 보내고 결과를 그룹 전체에 복사
+    if NEAR_DUP_ENABLED:
+        rep_of = cluster_articles(result_by_step2)
+    else:
+        rep_of = list(range(len(result_by_step2)))
+    rep_indexes = sorted(set(rep_of))
+
+    # 로컬 관련도 점수가 낮은 대표 기사는 GPT 없이 관련 없음 처리 (relevance_filter.py)
+    rep_verdicts = {}
+    rejected_scores = {}
+    llm_indexes = []
+    for i in rep_indexes:
+        keep, score = prefilter(result_by_step2[i])
+        if keep:
+            llm_indexes.append(i)
+        else:
+            rep_verdicts[i] = ("", False)
+            rejected_scores[i] = score
+
+    # 요약 요청은 동시에 보내고, 결과는 입력 순서대로 처리
+    # SUMMARY_BATCH_SIZE > 1 이면 대표 기사를 N건씩 묶어서 한 요청으로
+    started = time.perf_counter()
+    batch_size = max(1, SUMMARY_BATCH_SIZE)
+    batches = [llm_indexes[i:i + batch_size] for i in range(0, len(llm_indexes), batch_size)]
+    workers = max(1, min(SUMMARY_WORKERS, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if batch_size == 1:
+            rep_verdicts.update(zip(llm_indexes, pool.map(
+                lambda i: summarize_article(result_by_step2[i].get("company_name"), result_by_step2[i].get("full_text")),
+                llm_indexes,
+            )))
+        else:
+            batch_results = pool.map(
+                lambda batch: summarize_batch([
+                    (result_by_step2[i].get("company_name"), result_by_step2[i].get("full_text")) for i in batch
+                ]),
+                batches,
+            )
+            for batch, verdicts in zip(batches, batch_results):
+                rep_verdicts.update(zip(batch, verdicts))
+    elapsed = time.perf_counter() - started
+
+    for idx, art in enumerate(result_by_step2):
+        verdict = rep_verdicts[rep_of[idx]]
+        if verdict is None:
+            error_articles.append(art)
+            continue
+        summary, is_related = verdict
         
         if not is_related:
             print(f"step3: id({art.get('id')}) 회사와 관련 없는 기사 스킵  {art.get('url')}")
+            if rep_of[idx] in rejected_scores:
+                # 임계값 조정용으로 덤프에 점수를 남김
+                art = {**art, "relevance_score": rejected_scores[rep_of[idx]]}
             not_related_articles.append(art)
             continue
 
@@ -88,6 +335,8 @@ def step3_articles_with_summary_and_groups(result_by_step2):
             **art,
             "summary_text": summary,
         }
+        if rep_of[idx] != idx:
+            new_art["dup_of"] = result_by_step2[rep_of[idx]].get("id")
         
         result_with_summary.append(new_art)
 
@@ -95,13 +344,26 @@ def step3_articles_with_summary_and_groups(result_by_step2):
     print("step3 완료: 요약 및 관련성 판단 완료")
     print(f" - 회사와 관련 있는 기사: {len(result_with_summary)}")
     print(f" - 회사와 관련 없는 기사: {len(not_related_articles)}")
+    if error_articles:
+        print(f" - GPT 오류로 판정 못 한 기사: {len(error_articles)} (다음 실행에서 다시 처리)")
+    print(f" - 유사 기사 그룹: {len(rep_indexes)}개 (GPT 호출 {len(result_by_step2) - len(rep_indexes)}건 절약)")
+    print(f" - 로컬 관련도 필터로 제외: {len(rejected_scores)}개 (점수 < {RELEVANCE_REJECT_BELOW})")
+    print(f" - 요약 소요 시간: {elapsed:.2f}s ({len(llm_indexes)}건, 요청 묶음 {batch_size}건씩, 동시 {workers})")
+    metrics.inc("articles_total", len(result_with_summary), stage="step3", status="related")
+    metrics.inc("articles_total", len(not_related_articles), stage="step3", status="not_related")
+    metrics.inc("articles_total", len(error_articles), stage="step3", status="error")
+    metrics.inc("articles_total", len(result_by_step2) - len(rep_indexes), stage="step3", status="near_dup")
+    cache = get_llm_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f" - 요약 캐시: hit {stats['hits']} / miss {stats['misses']} (hit rate {stats['hit_rate']:.0%})")
 
-    # 관련 있는 기사 + 요약본
-    with open("step3_related.json", "w", encoding="utf-8") as f:
-        json.dump(result_with_summary, f, ensure_ascii=False, indent=4)
+    # 관련 있는 기사 + 요약본 (DEBUG_DUMP 설정 시)
+    dump_records("step3_related", result_with_summary)
 
     # 관련 없는 기사 리스트
-    with open("step3_not_related.json", "w", encoding="utf-8") as f:
-        json.dump(not_related_articles, f, ensure_ascii=False, indent=4)
+    dump_records("step3_not_related", not_related_articles)
 
+    if failed is not None:
+        failed.extend(error_articles)
     return result_with_summary
\ No newline at end of file
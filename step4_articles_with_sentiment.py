@@ -1,19 +1,53 @@
-import json
 import os
+import time
+import numpy as np
+from functools import lru_cache
+from debug_dump import dump_records
+import metrics
 from dotenv import load_dotenv
-from transformers import pipeline
 
 load_dotenv()
 HF_TOKEN = os.getenv("huggingface_api_token") 
 MODEL_NAME = "DataWizardd/finbert-sentiment-ko"
-sentiment_pipe = pipeline(
-    "text-classification",
-    model=MODEL_NAME,
-    token=HF_TOKEN,      
-    top_k=None,
-    truncation=True,    
-    max_length=512,
-)
+
+# CPU 추론 설정 (.env 로 조정 가능)
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+SENTIMENT_NUM_THREADS = int(os.getenv("SENTIMENT_NUM_THREADS", "0"))  # 0 이면 torch 기본값
+MAX_LENGTH = 512
+
+# pytorch(기본) | onnx  - onnx 는 sentiment_onnx.py export 로 만든 모델 사용
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "pytorch").lower()
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_model():
+    """
+    감정분석 모델을 처음 사용할 때 한 번만 로딩
+    반환: (sentiment_pipe, onnx_model)  - 사용하지 않는 백엔드는 None
+    """
+    started = time.perf_counter()
+    if SENTIMENT_BACKEND == "onnx":
+        from sentiment_onnx import OnnxSentimentModel
+
+        model = (None, OnnxSentimentModel(num_threads=SENTIMENT_NUM_THREADS))
+    else:
+        import torch
+        from transformers import pipeline
+
+        if SENTIMENT_NUM_THREADS > 0:
+            torch.set_num_threads(SENTIMENT_NUM_THREADS)
+
+        sentiment_pipe = pipeline(
+            "text-classification",
+            model=MODEL_NAME,
+            token=HF_TOKEN,      
+            top_k=None,
+            truncation=True,    
+            max_length=MAX_LENGTH,
+        )
+        model = (sentiment_pipe, None)
+    print(f"step4: 감정분석 모델 로딩({SENTIMENT_BACKEND}) {time.perf_counter() - started:.2f}s")
+    return model
 
 def compute_k_index(p_pos: float, p_neu: float, p_neg: float):
     """
@@ -31,9 +65,25 @@ def compute_k_index(p_pos: float, p_neu: float, p_neg: float):
     score = max(0.0, min(100.0, raw_score))  
     return score
 
+def _scores_to_result(scores):
+    p_pos = scores.get("POSITIVE", scores.get("LABEL_2", 0.0))
+    p_neu = scores.get("NEUTRAL", scores.get("LABEL_1", 0.0))
+    p_neg = scores.get("NEGATIVE", scores.get("LABEL_0", 0.0))
+
+    best_label = max(
+        [("POSITIVE", p_pos), ("NEUTRAL", p_neu), ("NEGATIVE", p_neg)],
+        key=lambda x: x[1]
+    )[0]
+
+    k_index = compute_k_index(p_pos, p_neu, p_neg)
+    return best_label, p_pos, p_neu, p_neg, k_index
+
 def analyze_sentiment(text):
     if not text or not text.strip():
         return None, 0.0, 1.0, 0.0, 50.0
+    sentiment_pipe, onnx_model = get_sentiment_model()
+    if onnx_model is not None:
+        return _scores_to_result(onnx_model.predict_label_scores([text.strip()])[0])
     out = sentiment_pipe(text.strip())
 
     if isinstance(out, list) and len(out) > 0 and isinstance(out[0], list):
@@ -44,44 +94,100 @@ def analyze_sentiment(text):
         lab = str(r["label"]).upper()
         scores[lab] = float(r["score"])
 
-    p_pos = scores.get("POSITIVE", scores.get("LABEL_2", 0.0))
-    p_neu = scores.get("NEUTRAL", scores.get("LABEL_1", 0.0))
-    p_neg = scores.get("NEGATIVE", scores.get("LABEL_0", 0.0))
+    return _scores_to_result(scores)
 
-    best_label = max(
-        [("POSITIVE", p_pos), ("NEUTRAL", p_neu), ("NEGATIVE", p_neg)],
-        key=lambda x: x[1]
-    )[0]
+def _postprocess_logits(logits):
+    # text-classification pipeline 의 후처리와 같은 방식 (numpy float32 softmax/sigmoid)
+    config = get_sentiment_model()[0].model.config
+    if config.problem_type == "multi_label_classification" or config.num_labels == 1:
+        return 1.0 / (1.0 + np.exp(-logits))
+    maxes = np.max(logits, axis=-1, keepdims=True)
+    shifted_exp = np.exp(logits - maxes)
+    return shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
 
-    k_index = compute_k_index(p_pos, p_neu, p_neg)
-    return best_label, p_pos, p_neu, p_neg, k_index
+def predict_label_scores(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    여러 문장을 한 번에 토크나이즈한 뒤, 길이순으로 정렬해서 batch_size 단위로 추론
+    배치마다 가장 긴 문장 길이까지만 padding (dynamic padding)
+    반환: texts 와 같은 순서의 {LABEL: 확률} 리스트
+    """
+    if not texts:
+        return []
+    sentiment_pipe, onnx_model = get_sentiment_model()
+    if onnx_model is not None:
+        with metrics.timer("sentiment_predict_seconds", backend="onnx"):
+            return onnx_model.predict_label_scores(texts, batch_size=batch_size)
+
+    import torch
+
+    tokenizer = sentiment_pipe.tokenizer
+    model = sentiment_pipe.model
+    id2label = model.config.id2label
+
+    encodings = tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)
+    order = sorted(range(len(texts)), key=lambda i: len(encodings["input_ids"][i]))
+
+    results = [None] * len(texts)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            idxs = order[start:start + batch_size]
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in idxs]
+            batch = tokenizer.pad(features, padding=True, return_tensors="pt")
+            with metrics.timer("sentiment_batch_seconds", backend="pytorch"):
+                logits = model(**batch).logits.float().numpy()
+            probs = _postprocess_logits(logits)
+            for i, row in zip(idxs, probs):
+                results[i] = {str(id2label[j]).upper(): float(p) for j, p in enumerate(row)}
+    return results
+
+def analyze_sentiment_batch(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    analyze_sentiment 의 배치 버전. 반환값 형식은 analyze_sentiment 와 동일한 튜플 리스트
+    """
+    # 같은 요약문(step3 에서 유사 기사 그룹으로 묶인 기사)은 한 번만 추론
+    unique_texts = list(dict.fromkeys(t.strip() for t in texts if t and t.strip()))
+    scores_list = predict_label_scores(unique_texts, batch_size=batch_size)
+    result_by_text = {t: _scores_to_result(scores) for t, scores in zip(unique_texts, scores_list)}
+    return [
+        result_by_text[t.strip()] if t and t.strip() else (None, 0.0, 1.0, 0.0, 50.0)
+        for t in texts
+    ]
+
+def with_sentiment(art, sentiment):
+    # 감정분석 결과를 기사에 붙임 (요약이 없어서 분석 못 했으면 None)
+    label, p_pos, p_neu, p_neg, k_index = sentiment
+    if label is None:
+        return None
+    return {
+        **art,
+        "sentiment_label": label,
+        "p_positive": round(p_pos, 6),
+        "p_neutral": round(p_neu, 6),
+        "p_negative": round(p_neg, 6),
+        "k_index": round(k_index, 2),
+    }
 
     
 
 def step4_articles_with_sentiment(result_by_step3):
     result_with_sentiment = []
-    for art in result_by_step3:
-        summary = art.get("summary_text")
-        label, p_pos, p_neu, p_neg, k_index = analyze_sentiment(summary)
-        if label is None:
-                skipped += 1
-                continue
-        
-        new_art = {
-                **art,
-                "sentiment_label": label,
-                "p_positive": round(p_pos, 6),
-                "p_neutral": round(p_neu, 6),
-                "p_negative": round(p_neg, 6),
-                "k_index": round(k_index, 2),
-            }
+    skipped = 0
+    summaries = [art.get("summary_text") for art in result_by_step3]
+    sentiments = analyze_sentiment_batch(summaries)
+    for art, sentiment in zip(result_by_step3, sentiments):
+        new_art = with_sentiment(art, sentiment)
+        if new_art is None:
+            skipped += 1
+            continue
         result_with_sentiment.append(new_art)
     
     print("step4 결과")
     print(f" - 감정분석 성공: {len(result_with_sentiment)}")
+    print(f" - 요약 없음 스킵: {skipped}")
+    metrics.inc("articles_total", len(result_with_sentiment), stage="step4", status="scored")
+    metrics.inc("articles_total", skipped, stage="step4", status="skipped")
 
-    # 디버깅 JSON 저장
-    with open("step4_with_sentiment.json", "w", encoding="utf-8") as f:
-        json.dump(result_with_sentiment, f, ensure_ascii=False, indent=4)
+    # 디버깅 덤프 (DEBUG_DUMP 설정 시)
+    dump_records("step4_with_sentiment", result_with_sentiment)
 
     return result_with_sentiment
\ No newline at end of file
@@ -0,0 +1,301 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from dotenv import load_dotenv
+
+from config_companies import FULL_PIPELINE_COMPANY_NAMES
+from near_dup import NEAR_DUP_ENABLED, NearDupIndex
+from step2_articles_with_content import (
+    FETCH_WORKERS, PARSE_WORKERS, _build_article, _dedup_step1_items, _extract_timed, _record_parse, build_session,
+    fetch_article_html,
+)
+from step3_articles_with_summary_and_groups import SUMMARY_WORKERS, summarize_article
+from relevance_filter import prefilter
+from step4_articles_with_sentiment import SENTIMENT_BATCH_SIZE, analyze_sentiment_batch, with_sentiment
+from db_config import db_connection
+from db_insert import save_step2_results_to_db, save_step4_results_to_db
+import metrics
+
+# 스트리밍 모드: 기사 하나하나가 준비되는 대로 다운로드 -> 요약 -> 감정분석 -> DB 로 흘러감
+# 단계 사이는 크기가 제한된 큐로 연결해서, 뒤 단계가 밀리면 앞 단계가 기다림 (backpressure)
+# full_text 를 들고 있는 기사 수가 큐 크기로 제한되므로 배치 크기와 상관없이 메모리 상한이 고정됨
+
+load_dotenv()
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))        # 단계 사이 큐 크기
+STREAM_DB_BATCH = int(os.getenv("STREAM_DB_BATCH", "50"))            # DB 저장 단위
+STREAM_FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", "2")) # 배치가 덜 찼어도 저장하는 대기 시간
+
+_DONE = object()
+
+
+class _StageWorkers:
+    """
+    inbox 에서 꺼낸 항목을 handle(item) 으로 처리하는 스레드 n 개
+    _DONE 을 받으면 다른 워커도 볼 수 있게 다시 넣고 종료, 마지막 워커가 on_done() 호출
+    handle 에서 예외가 나면 on_error(item) 호출
+    """
+
+    def __init__(self, name, inbox, handle, workers, on_done, count, on_error):
+        self.name = name
+        self.inbox = inbox
+        self.handle = handle
+        self.on_done = on_done
+        self.count = count
+        self.on_error = on_error
+        self._remaining = workers
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                self.inbox.put(_DONE)
+                break
+            try:
+                self.handle(item)
+            except Exception as e:
+                # 한 기사 오류로 파이프라인이 멈추지 않도록 기록만 하고 계속
+                print(f"stream: {self.name} 처리 오류 - {e}")
+                self.count(f"{self.name}_error")
+                self.on_error(item)
+
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            self.on_done()
+
+
+def _drain_batch(inbox, first, max_items, wait_seconds):
+    # 첫 항목 이후 max_items 까지 또는 wait_seconds 동안 모아서 반환 (_DONE 이 나오면 done=True)
+    items = [first]
+    deadline = time.monotonic() + wait_seconds
+    while len(items) < max_items:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            item = inbox.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if item is _DONE:
+            return items, True
+        items.append(item)
+    return items, False
+
+
+def run_streaming(result_by_step1, failed=None, before_save=None):
+    """
+    step1(+DB 필터) 결과를 받아서 step2~step4 와 DB 저장을 스트리밍으로 실행
+    failed: 리스트를 넘기면 다운로드 실패 / 단계 오류 / DB 저장 오류로 저장하지 못한 기사를 추가
+    before_save: DB 배치 저장 직전에 호출 (샤드 리스 확인), 예외가 나면 저장하지 않고 남은 기사 다운로드도 중단
+    반환: 단계별 카운터 (Counter)  - 오류는 *_error 키
+    """
+    stats = Counter()
+    stats_lock = threading.Lock()
+    started = time.perf_counter()
+
+    def count(key, n=1):
+        with stats_lock:
+            stats[key] += n
+
+    def fail(*articles):
+        # 워터마크가 이 기사들을 넘어가지 않도록 (다음 실행에서 다시 수집)
+        if failed is not None:
+            with stats_lock:
+                failed.extend(articles)
+
+    download_q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    summary_q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    sentiment_q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    db_q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    candidates, cnt_no_url, cnt_dup_url = _dedup_step1_items(result_by_step1)
+    stats["step2_no_url"] = cnt_no_url
+    stats["step2_dup_url"] = cnt_dup_url
+
+    session = build_session()
+    parse_pool = ProcessPoolExecutor(max_workers=max(1, PARSE_WORKERS))
+    stopped = threading.Event()
+
+    # step2: 다운로드(스레드) + 파싱(프로세스 풀)
+    def download(item):
+        if stopped.is_set():
+            count("step2_stopped")
+            fail(item)
+            return
+        html, url, source = fetch_article_html(session, item)
+        raw_text = None
+        if html is not None:
+            metrics.inc("article_source_total", source=source)
+            raw_text, path, parse_seconds = parse_pool.submit(_extract_timed, url, html).result()
+            _record_parse(path, parse_seconds)
+        if raw_text is None:
+            print(f"step2: id({item.get('id')}) newspaper 본문 추출 실패 - {url}")
+            count("step2_download_fail")
+            fail(item)
+            return
+        if not raw_text.strip():
+            print(f"step2: id({item.get('id')}) 본문 공백만 존재 - {url}")
+            count("step2_empty_text")
+            return
+
+        art = _build_article(item, raw_text.strip())
+        if art["company_name"] in FULL_PIPELINE_COMPANY_NAMES:
+            count("step2_full_pipeline")
+            summary_q.put(art)
+        else:
+            count("step2_db_only")
+            db_q.put(("db_only", art))
+
+    # step3: 요약 (유사 기사는 대표 기사 결과를 기다렸다가 그대로 사용)
+    dup_index = NearDupIndex()
+    verdict_futures = {}
+    dup_lock = threading.Lock()
+
+    def summarize(art):
+        url = art["url"]
+        with dup_lock:
+            if NEAR_DUP_ENABLED:
+                rep = dup_index.add(url, art.get("company_id"), art.get("date"), art.get("full_text") or "")
+            else:
+                rep = url
+            if rep == url:
+                verdict_futures[url] = Future()
+            future = verdict_futures[rep]
+
+        if rep == url:
+            try:
+                keep, _ = prefilter(art)
+                if not keep:
+                    count("step3_prefiltered")
+                future.set_result(summarize_article(art.get("company_name"), art.get("full_text")) if keep else ("", False))
+            except Exception:
+                # 대표 기사 오류는 _StageWorkers 가 기록, 기다리던 유사 기사는 아래에서 오류로 처리
+                future.set_result(None)
+                raise
+        else:
+            count("step3_near_dup")
+
+        verdict = future.result()
+        if verdict is None:
+            # GPT 오류는 관련 없음과 구분해서 실패로 남김 (워터마크가 넘어가지 않음)
+            count("step3_error")
+            fail(art)
+            return
+        summary, is_related = verdict
+        if not is_related:
+            print(f"step3: id({art.get('id')}) 회사와 관련 없는 기사 스킵  {url}")
+            count("step3_not_related")
+            return
+
+        new_art = {**art, "summary_text": summary}
+        if rep != url:
+            new_art["dup_of"] = rep
+        count("step3_related")
+        sentiment_q.put(new_art)
+
+    # step4: 감정분석 (큐에 쌓인 만큼 모아서 배치 추론)
+    def sentiment_loop():
+        done = False
+        while not done:
+            first = sentiment_q.get()
+            if first is _DONE:
+                break
+            batch, done = _drain_batch(sentiment_q, first, SENTIMENT_BATCH_SIZE, 0.2)
+            try:
+                sentiments = analyze_sentiment_batch([art.get("summary_text") for art in batch])
+            except Exception as e:
+                print(f"stream: step4 처리 오류 - {e}")
+                count("step4_error", len(batch))
+                fail(*batch)
+                continue
+            for art, sentiment in zip(batch, sentiments):
+                new_art = with_sentiment(art, sentiment)
+                if new_art is None:
+                    count("step4_skipped")
+                    continue
+                count("step4_scored")
+                db_q.put(("full", new_art))
+        db_q.put(_DONE)
+
+    # DB 저장: STREAM_DB_BATCH 건 또는 STREAM_FLUSH_SECONDS 마다 배치 저장
+    def db_loop():
+        done = False
+        while not done:
+            first = db_q.get()
+            if first is _DONE:
+                break
+            batch, done = _drain_batch(db_q, first, STREAM_DB_BATCH, STREAM_FLUSH_SECONDS)
+            full_articles = [art for kind, art in batch if kind == "full"]
+            db_only_articles = [art for kind, art in batch if kind == "db_only"]
+            if stopped.is_set():
+                count("db_stopped", len(batch))
+                fail(*(art for _, art in batch))
+                continue
+            try:
+                if before_save is not None:
+                    before_save()
+            except Exception as e:
+                # 리스를 잃음: 저장하지 않고 남은 기사는 다운로드 없이 흘려보냄
+                print(f"stream: DB 저장 중단 - {e}")
+                stopped.set()
+                count("db_stopped", len(batch))
+                fail(*(art for _, art in batch))
+                continue
+            try:
+                with db_connection() as conn:
+                    if full_articles:
+                        save_step4_results_to_db(conn, full_articles)
+                    if db_only_articles:
+                        save_step2_results_to_db(conn, db_only_articles)
+                count("db_saved", len(batch))
+            except Exception as e:
+                print(f"stream: DB 저장 오류 - {e}")
+                count("db_error", len(batch))
+                fail(*(art for _, art in batch))
+
+    sentiment_thread = threading.Thread(target=sentiment_loop, name="sentiment", daemon=True)
+    db_thread = threading.Thread(target=db_loop, name="db", daemon=True)
+    sentiment_thread.start()
+    db_thread.start()
+
+    summarizers = _StageWorkers(
+        "step3", summary_q, summarize, max(1, SUMMARY_WORKERS),
+        on_done=lambda: sentiment_q.put(_DONE), count=count, on_error=fail,
+    ).start()
+    downloaders = _StageWorkers(
+        "step2", download_q, download, max(1, FETCH_WORKERS),
+        on_done=lambda: summary_q.put(_DONE), count=count, on_error=fail,
+    ).start()
+
+    for item in candidates:
+        download_q.put(item)
+    download_q.put(_DONE)
+
+    # 종료 신호는 step2 -> step3 -> step4 -> DB 순서로 전달되므로
+    # DB 스레드가 끝나면 DB_ONLY 기사까지 모두 저장된 상태
+    for t in downloaders.threads + summarizers.threads + [sentiment_thread, db_thread]:
+        t.join()
+
+    session.close()
+    parse_pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print("stream pipeline 완료")
+    for key in sorted(stats):
+        print(f" - {key}: {stats[key]}")
+    print(f" - 소요 시간: {elapsed:.2f}s")
+    return stats
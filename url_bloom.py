@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# News.url_hash(MD5) 블룸 필터 - filter_step1_by_db_urls 에서 DB 조회 전에 사용
+#  - 필터에 없다고 나오면 확실히 새 URL 이므로 DB 조회 생략
+#  - 있다고 나오면(오탐 가능) url_hash 로 DB 에서 확인
+# 최근 URL_BLOOM_DAYS 일 News 로 처음 만들고, 이후에는 마지막으로 읽은 News.id 이후 행만 추가로 읽음
+# 필터에 없는 오래된 기사일 수도 있으므로 pubDate 가 기간 밖인 기사는 항상 DB 에서 확인
+URL_BLOOM_ENABLED = os.getenv("URL_BLOOM_ENABLED", "0") == "1"
+URL_BLOOM_PATH = os.getenv("URL_BLOOM_PATH", "url_bloom.npz")
+URL_BLOOM_DAYS = float(os.getenv("URL_BLOOM_DAYS", "30"))
+URL_BLOOM_CAPACITY = int(os.getenv("URL_BLOOM_CAPACITY", "2000000"))
+URL_BLOOM_ERROR_RATE = float(os.getenv("URL_BLOOM_ERROR_RATE", "0.001"))
+
+# 동시에 커밋된 트랜잭션은 id 순서와 커밋 순서가 다를 수 있어서 마지막 id 보다 조금 앞에서부터 다시 읽음
+_ID_OVERLAP = 5000
+_WARM_BATCH = 50000
+
+
+class UrlBloom:
+    def __init__(self, capacity=URL_BLOOM_CAPACITY, error_rate=URL_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = int(np.ceil(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * np.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+        self.last_news_id = 0
+        self.source = None
+        self.built_at = None
+
+    def _positions(self, hashes):
+        # MD5 128비트를 64비트 두 개로 나눠서 double hashing (h1 + i * h2)
+        digests = np.frombuffer(b"".join(bytes.fromhex(h) for h in hashes), dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (digests[:, :1] + steps * (digests[:, 1:] | np.uint64(1))) % np.uint64(self.num_bits)
+
+    def add(self, hashes, new_count=None):
+        # new_count: 이미 들어있던 해시를 다시 넣는 경우 실제로 늘어난 건수 (기본: 전부 새 해시)
+        if not hashes:
+            return
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(hashes) if new_count is None else new_count
+
+    def might_contain(self, hashes):
+        # 반환: hashes 와 같은 순서의 bool 배열
+        if not hashes:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(hashes)
+        hits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+    def save(self, path=URL_BLOOM_PATH):
+        meta = {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "last_news_id": self.last_news_id,
+            "source": self.source,
+            "built_at": self.built_at,
+        }
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, bits=self.bits, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=URL_BLOOM_PATH):
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                bloom = cls(meta["capacity"], meta["error_rate"])
+                if data["bits"].shape != bloom.bits.shape:
+                    return None
+                bloom.bits = data["bits"].copy()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"url_bloom: 파일 읽기 실패, 새로 생성 - {e}")
+            return None
+        bloom.count = meta["count"]
+        bloom.last_news_id = meta["last_news_id"]
+        bloom.source = meta["source"]
+        bloom.built_at = meta["built_at"]
+        return bloom
+
+
+def _source():
+    # 다른 DB 로 만든 필터를 쓰지 않도록 접속 대상 기록
+    return f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+
+
+def _warm(cur, bloom, where, params, counted_after=0):
+    # counted_after 이하 id 는 이미 필터에 있던 행 (건수에 다시 더하지 않음)
+    added = 0
+    while True:
+        cur.execute(
+            f"SELECT id, url_hash FROM News WHERE id > %s AND {where} ORDER BY id LIMIT {_WARM_BATCH}",
+            [bloom.last_news_id, *params],
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return added
+        fresh = [row for row in rows if row["id"] > counted_after]
+        bloom.add([row["url_hash"] for row in rows if row["url_hash"]], new_count=len(fresh))
+        bloom.last_news_id = rows[-1]["id"]
+        added += len(fresh)
+
+
+def _rebuild(cur):
+    bloom = UrlBloom()
+    bloom.source = _source()
+    bloom.built_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    since = datetime.now() - timedelta(days=URL_BLOOM_DAYS)
+    added = _warm(cur, bloom, "date >= %s", [since])
+    print(f"url_bloom: 최근 {URL_BLOOM_DAYS:g}일 News {added}건으로 새로 생성")
+    return bloom
+
+
+_bloom = None
+_bloom_lock = threading.Lock()
+
+
+def get_url_bloom(cur):
+    """
+    파일에서 읽은(또는 새로 만든) 필터에 마지막 News.id 이후 행을 추가하고 저장
+    반환: (필터, 필터가 보장하는 가장 오래된 기사 시각)
+    """
+    global _bloom
+    with _bloom_lock:
+        bloom = _bloom or UrlBloom.load()
+        stale = (
+            bloom is None
+            or bloom.source != _source()
+            or bloom.count >= bloom.capacity
+            or datetime.strptime(bloom.built_at, "%Y-%m-%d %H:%M:%S") < datetime.now() - timedelta(days=URL_BLOOM_DAYS)
+        )
+        if stale:
+            bloom = _rebuild(cur)
+        else:
+            counted_after = bloom.last_news_id
+            bloom.last_news_id = max(0, counted_after - _ID_OVERLAP)
+            added = _warm(cur, bloom, "1 = 1", [], counted_after)
+            if added:
+                print(f"url_bloom: News {added}건 추가 (누적 {bloom.count}건)")
+        bloom.save()
+        _bloom = bloom
+        covered_since = datetime.strptime(bloom.built_at, "%Y-%m-%d %H:%M:%S") - timedelta(days=URL_BLOOM_DAYS)
+        return bloom, covered_since